@@ -1,9 +1,19 @@
+import os
+
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_login import LoginManager
 from flask_migrate import Migrate
 from flask_mail import Mail
+from app.notifications import NotificationDispatcher
+from app.cache import CatalogCache
+from app.reports import ReportRunner
+from app.passwords import PasswordHasher
+from app.ratelimit import RateLimiter
+from app.config import database_url, init_engine, select_profile
+from app.profiler import QueryProfiler
+from app.metrics import Metrics
 
 # 1. Creación de las instancias de las extensiones (Globales)
 db = SQLAlchemy()
@@ -11,6 +21,13 @@ bcrypt = Bcrypt()
 login_manager = LoginManager()
 migrate = Migrate()
 mail = Mail()
+notifier = NotificationDispatcher()  # Envío de correos en segundo plano
+cache = CatalogCache()  # Caché de lecturas del catálogo (ver app/cache.py)
+reports = ReportRunner()  # Generación de PDFs en segundo plano
+passwords = PasswordHasher()  # bcrypt en un pool de procesos (ver app/passwords.py)
+limiter = RateLimiter()  # Límite de intentos de login/registro (ver app/ratelimit.py)
+profiler = QueryProfiler()  # Perfil SQL por petición (ver app/profiler.py)
+metrics = Metrics()  # Métricas para Prometheus en /metrics (ver app/metrics.py)
 
 # 2. Configuración del LoginManager
 # Define a qué ruta se redirige si el usuario no está logueado
@@ -18,10 +35,14 @@ login_manager.login_view = 'auth_routes.login'
 login_manager.login_message_category = 'info'
 
 
-def create_app():
+def create_app(config_overrides=None, profile=None):
     """
     Fábrica de Aplicaciones (Application Factory).
     Crea y configura la instancia de la aplicación Flask.
+    'config_overrides' permite sustituir valores de configuración
+    (por ejemplo la base de datos en las pruebas de carga).
+    'profile' elige el perfil de la BD ('sqlite' o 'postgresql', ver app/config.py);
+    por defecto se toma de APP_PROFILE o del tipo de base de datos.
     """
     app = Flask(__name__)
 
@@ -29,8 +50,8 @@ def create_app():
     # Clave secreta para proteger formularios y sesiones
     app.config['SECRET_KEY'] = 'mi_clave_secreta_12345_cambiar_despues'
 
-    # Configuración de la Base de Datos (SQLite)
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///proyecto.db'
+    # Configuración de la Base de Datos: DATABASE_URL o SQLite local (proyecto.db)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url()
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
     # --- 4. CONFIGURACIÓN DEL SERVIDOR DE CORREO (Para Alertas) ---
@@ -41,12 +62,67 @@ def create_app():
     app.config['MAIL_USERNAME'] = 'tu_correo@gmail.com'  # <--- PON TU CORREO
     app.config['MAIL_PASSWORD'] = 'tu_contraseña_de_aplicacion'  # <--- PON TU CLAVE
 
+    # Cola de envío en segundo plano (ver app/notifications.py)
+    app.config['MAIL_QUEUE_MAXSIZE'] = 1000  # Máximo de correos pendientes
+    app.config['MAIL_WORKERS'] = 1  # Hilos de envío (cada uno con su conexión SMTP)
+    app.config['MAIL_MAX_RETRIES'] = 3
+
+    # --- CACHÉ DEL CATÁLOGO ---
+    # 'memory' = dentro de cada proceso; 'sqlite' = compartida entre workers
+    app.config['CACHE_BACKEND'] = 'memory'
+    app.config['CACHE_MAX_ENTRIES'] = 512
+    # Segundos que se guarda el usuario de la sesión (se invalida al cambiar su rol).
+    # Con varios workers, usar CACHE_BACKEND='sqlite' para que la invalidación llegue a todos.
+    app.config['USER_CACHE_TTL'] = 60
+
+    # --- CONTRASEÑAS (bcrypt) ---
+    app.config['BCRYPT_LOG_ROUNDS'] = 12  # Coste de los hashes nuevos (los antiguos se actualizan al entrar)
+    app.config['PASSWORD_WORKERS'] = 2  # Procesos para bcrypt (0 = en el propio hilo)
+    # app.config['PASSWORD_TARGET_MS'] = 250  # Calibrar el coste para que un hash tarde ~250 ms
+
+    # --- LÍMITE DE INTENTOS (login y registro) ---
+    # (fichas, segundos): ráfaga máxima y tiempo en recuperarlas todas.
+    # 'memory' = dentro de cada proceso; 'sqlite' = compartido entre workers
+    app.config['RATELIMIT_BACKEND'] = 'memory'
+    app.config['RATE_LIMITS'] = {
+        'login': {'ip': (20, 60), 'username': (5, 60)},
+        'register': {'ip': (5, 3600)},
+    }
+
+    # --- ALERTAS DE STOCK (ver app/services/alert_service.py) ---
+    # Se avisa una vez al bajar del 10% del objetivo y no se vuelve a avisar
+    # hasta reponer por encima de este porcentaje (banda de histéresis).
+    app.config['STOCK_ALERT_REARM_PERCENT'] = 20
+    # True = en vez de un correo por producto, un resumen periódico con
+    # 'flask send-stock-digest' (programarlo con cron, p. ej. cada hora)
+    app.config['STOCK_ALERT_DIGEST'] = False
+
+    # --- MÉTRICAS (Prometheus, ver app/metrics.py) ---
+    # Con varios workers, definir PROMETHEUS_MULTIPROC_DIR antes de arrancar el servidor
+    # /metrics exige 'Authorization: Bearer <token>'; sin token solo responde en modo debug
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+
+    # Valores que sustituyen a los anteriores (pruebas, benchmarks...)
+    if config_overrides:
+        app.config.update(config_overrides)
+
+    # Opciones del motor de BD según el perfil (PRAGMA de SQLite, pool de PostgreSQL)
+    select_profile(app, profile)
+
     # --- 5. INICIALIZACIÓN DE EXTENSIONES CON LA APP ---
     db.init_app(app)
+    init_engine(app, db)
+    profiler.init_app(app)
+    metrics.init_app(app)
     bcrypt.init_app(app)
+    passwords.init_app(app)
+    limiter.init_app(app)
     login_manager.init_app(app)
     migrate.init_app(app, db)
     mail.init_app(app)
+    notifier.init_app(app)
+    cache.init_app(app)
+    reports.init_app(app)
 
     # --- 6. REGISTRO DE BLUEPRINTS (RUTAS) ---
     # Importamos aquí dentro para evitar referencias circulares
@@ -63,8 +139,24 @@ def create_app():
     from app.routes.supplier_routes import supplier_bp
     app.register_blueprint(supplier_bp, url_prefix='/proveedores')
 
+    # Pedidos de compra a proveedores (reposición de stock)
+    from app.routes.purchase_routes import purchase_bp
+    app.register_blueprint(purchase_bp, url_prefix='/compras')
+
     # Gestión de Ventas (Carrito de compra)
     from app.routes.sale_routes import sale_bp
     app.register_blueprint(sale_bp, url_prefix='/ventas')
 
+    # Exportación de datos (CSV / NDJSON)
+    from app.routes.export_routes import export_bp
+    app.register_blueprint(export_bp, url_prefix='/exportar')
+
+    # API JSON para apps móviles
+    from app.routes.api_routes import api_bp
+    app.register_blueprint(api_bp, url_prefix='/api/v1')
+
+    # --- 7. COMANDOS DE CONSOLA (flask <comando>) ---
+    from app.commands import register_commands
+    register_commands(app)
+
     return app
\ No newline at end of file
@@ -0,0 +1,247 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from importlib import import_module
+
+
+class CachedRow(dict):
+    """
+    Diccionario que también se lee como objeto (row.nombre == row['nombre']).
+    Es lo que devuelven los servicios desde la caché: las plantillas y las
+    rutas lo usan igual que un modelo, pero no está ligado a la sesión de la BD.
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    @classmethod
+    def from_model(cls, obj, fields, **extra):
+        row = cls((field, getattr(obj, field)) for field in fields)
+        row.update(extra)
+        return row
+
+
+# --- BACKENDS (dónde se guardan los datos) ---
+
+class MemoryCacheBackend:
+    """
+    Caché dentro del proceso: un LRU acotado protegido con un lock.
+    Es el backend por defecto. Cada proceso tiene el suyo.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # clave -> (valor, caduca_en)
+        self._lock = threading.Lock()
+        # Versión inicial basada en el reloj: distinta en cada arranque
+        # (las claves y ETags de una ejecución anterior no se confunden)
+        self._version = time.time_ns()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)  # Sale el menos usado
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_version(self):
+        return self._version
+
+    def bump_version(self):
+        with self._lock:
+            self._version += 1
+            return self._version
+
+
+class SQLiteCacheBackend:
+    """
+    Caché compartida entre procesos (varios workers de gunicorn, por ejemplo)
+    usando un fichero SQLite local. Guarda también el contador de versión,
+    así que un cambio hecho en un worker invalida la caché de todos.
+    """
+
+    def __init__(self, path, max_entries=512):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()  # Una conexión por hilo
+
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS cache_entry ('
+                         'key TEXT PRIMARY KEY, value BLOB, expires_at REAL, used_at REAL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_cache_entry_used_at ON cache_entry (used_at)')
+            conn.execute('CREATE TABLE IF NOT EXISTS cache_meta (name TEXT PRIMARY KEY, value INTEGER)')
+            conn.execute("INSERT OR IGNORE INTO cache_meta (name, value) VALUES ('version', ?)",
+                         (time.time_ns(),))
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._connect()
+        row = conn.execute('SELECT value, expires_at FROM cache_entry WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        now = time.time()
+        if expires_at is not None and expires_at < now:
+            conn.execute('DELETE FROM cache_entry WHERE key = ?', (key,))
+            return None
+        conn.execute('UPDATE cache_entry SET used_at = ? WHERE key = ?', (now, key))
+        return value
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        conn = self._connect()
+        conn.execute('INSERT OR REPLACE INTO cache_entry (key, value, expires_at, used_at) '
+                     'VALUES (?, ?, ?, ?)', (key, value, now + ttl if ttl else None, now))
+        # Recortamos al tamaño máximo quitando las entradas menos usadas
+        conn.execute('DELETE FROM cache_entry WHERE key IN ('
+                     'SELECT key FROM cache_entry ORDER BY used_at DESC LIMIT -1 OFFSET ?)',
+                     (self.max_entries,))
+
+    def delete(self, key):
+        self._connect().execute('DELETE FROM cache_entry WHERE key = ?', (key,))
+
+    def clear(self):
+        self._connect().execute('DELETE FROM cache_entry')
+
+    def get_version(self):
+        return self._connect().execute(
+            "SELECT value FROM cache_meta WHERE name = 'version'").fetchone()[0]
+
+    def bump_version(self):
+        return self._connect().execute(
+            "UPDATE cache_meta SET value = value + 1 WHERE name = 'version' RETURNING value"
+        ).fetchone()[0]
+
+
+# --- CACHÉ DEL CATÁLOGO ---
+
+class CatalogCache:
+    """
+    Caché de lecturas del catálogo (productos, proveedores...) con versión global.
+
+    - Cada lectura se guarda bajo "versión:clave".
+    - Cada escritura en los servicios llama a 'bump()': la versión sube y las
+      entradas antiguas dejan de usarse (el LRU las acaba descartando).
+    - Los valores se guardan serializados (pickle), nunca objetos de la sesión.
+    - 'get' / 'set' / 'delete' guardan entradas SIN versión (no caducan con
+      'bump()'), por ejemplo el usuario de la sesión; se borran a mano.
+
+    Configuración:
+      CACHE_BACKEND     'memory' (por defecto), 'sqlite' o 'paquete.modulo:Clase'
+      CACHE_MAX_ENTRIES tamaño del LRU
+      CACHE_PATH        fichero del backend 'sqlite' (por defecto instance/cache.db)
+    """
+
+    MODIFIED_KEY = 'catalog:modified'  # Entrada sin versión con la hora del último 'bump()'
+
+    def __init__(self, app=None):
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CACHE_BACKEND', 'memory')
+        app.config.setdefault('CACHE_MAX_ENTRIES', 512)
+        app.config.setdefault('CACHE_PATH', os.path.join(app.instance_path, 'cache.db'))
+
+        backend = app.config['CACHE_BACKEND']
+        max_entries = app.config['CACHE_MAX_ENTRIES']
+
+        if backend == 'memory':
+            self.backend = MemoryCacheBackend(max_entries)
+        elif backend == 'sqlite':
+            os.makedirs(os.path.dirname(app.config['CACHE_PATH']), exist_ok=True)
+            self.backend = SQLiteCacheBackend(app.config['CACHE_PATH'], max_entries)
+        elif isinstance(backend, str):
+            module_name, class_name = backend.split(':')
+            self.backend = getattr(import_module(module_name), class_name)(app)
+        else:
+            self.backend = backend  # Un objeto ya construido
+
+        app.extensions['catalog_cache'] = self
+
+    def version(self):
+        """Versión actual del catálogo (cambia con cada escritura)."""
+        return self.backend.get_version()
+
+    def bump(self):
+        """Invalida todas las lecturas cacheadas del catálogo."""
+        version = self.backend.bump_version()
+        self.set(self.MODIFIED_KEY, time.time())
+        return version
+
+    def last_modified(self):
+        """
+        Momento (timestamp) del último cambio del catálogo. Si no se conoce
+        (arranque, o el LRU lo ha descartado) se toma el actual: nunca es
+        anterior al cambio real.
+        """
+        modified = self.get(self.MODIFIED_KEY)
+        if modified is None:
+            modified = time.time()
+            self.set(self.MODIFIED_KEY, modified)
+        return modified
+
+    def remember(self, key, loader, ttl=None):
+        """
+        Devuelve el valor cacheado para 'key' en la versión actual.
+        Si no está, llama a 'loader()', guarda el resultado y lo devuelve.
+        Si 'loader' lanza una excepción no se guarda nada.
+        """
+        versioned_key = f'{self.version()}:{key}'
+
+        data = self.backend.get(versioned_key)
+        if data is not None:
+            return pickle.loads(data)
+
+        value = loader()
+        self.backend.set(versioned_key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ttl)
+        return value
+
+    # --- Entradas sin versión ---
+
+    def get(self, key):
+        """Valor guardado con 'set' o None si no está (o ha caducado)."""
+        data = self.backend.get(key)
+        return pickle.loads(data) if data is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ttl)
+
+    def delete(self, key):
+        self.backend.delete(key)
@@ -0,0 +1,111 @@
+import click
+from flask.cli import with_appcontext
+
+
+@click.command('rebuild-rollups')
+@with_appcontext
+def rebuild_rollups_command():
+    """Recalcula los resúmenes de ventas (diario y mensual) desde la tabla de ventas."""
+    from app.services import sale_service
+
+    daily, monthly = sale_service.rebuild_sales_rollups()
+    click.echo(f"Resúmenes reconstruidos: {daily} filas diarias, {monthly} mensuales.")
+
+
+@click.command('import-products')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson', 'json']),
+              help='Formato del fichero (por defecto, según la extensión).')
+@click.option('--batch-size', type=int, default=None, help='Filas por lote.')
+@click.option('--errors', 'errors_path', type=click.Path(dir_okay=False, writable=True),
+              help='Guarda el informe de errores en este CSV.')
+@with_appcontext
+def import_products_command(path, fmt, batch_size, errors_path):
+    """Importa productos (crear o actualizar por referencia) desde CSV, NDJSON o JSON."""
+    from app.services import import_service
+
+    fmt = fmt or import_service.detect_format(path)
+    if fmt is None:
+        raise click.UsageError('No se reconoce el formato: usa --format csv|ndjson|json.')
+
+    with open(path, 'rb') as f:
+        result = import_service.import_products(import_service.open_text(f), fmt,
+                                                batch_size=batch_size or import_service.IMPORT_BATCH_SIZE)
+
+    click.echo(f"{result['filas']} filas: {result['creados']} creados, "
+               f"{result['actualizados']} actualizados, {len(result['errores'])} con errores.")
+
+    if errors_path:
+        with open(errors_path, 'w', newline='', encoding='utf-8') as f:
+            import_service.write_error_report(result['errores'], f)
+        click.echo(f"Informe de errores: {errors_path}")
+    else:
+        for error in result['errores'][:20]:
+            click.echo(f"  fila {error['fila']}: {error['error']}", err=True)
+        if len(result['errores']) > 20:
+            click.echo(f"  ... y {len(result['errores']) - 20} más (usa --errors para el informe completo)", err=True)
+
+
+@click.command('calibrate-bcrypt')
+@click.option('--target-ms', type=int, default=250, show_default=True,
+              help='Tiempo objetivo de un hash, en milisegundos.')
+@with_appcontext
+def calibrate_bcrypt_command(target_ms):
+    """Recomienda el BCRYPT_LOG_ROUNDS para que un hash tarde unos --target-ms en esta máquina."""
+    from app import passwords
+
+    rounds = passwords.calibrate(target_ms)
+    click.echo(f"BCRYPT_LOG_ROUNDS recomendado: {rounds} (actual: {passwords.rounds})")
+    click.echo("Los hashes con un coste menor se actualizan solos cuando el usuario inicia sesión.")
+
+
+@click.command('check-query-plans')
+@click.option('--verbose', '-v', is_flag=True, help='Muestra el SQL y el plan de todas las consultas.')
+@with_appcontext
+def check_query_plans_command(verbose):
+    """
+    Revisa con EXPLAIN el plan de las consultas de los servicios y avisa de
+    los recorridos completos de tabla y de las ordenaciones sin índice.
+    Termina con error si hay alguno (útil en CI, sobre una BD con el esquema al día).
+    Con ANALYZE hecho sobre tablas pequeñas, la BD puede preferir recorrerlas enteras.
+    """
+    from app.query_plans import check_query_plans
+
+    results = check_query_plans()
+    problems = [result for result in results if result['problemas']]
+
+    for result in results:
+        if verbose or result['problemas']:
+            status = 'REVISAR' if result['problemas'] else 'ok'
+            click.echo(f"[{status}] {result['nombre']}: {', '.join(result['problemas'])}")
+            click.echo(f"    {' '.join(result['sql'].split())}")
+            for line in result['plan']:
+                click.echo(f"      {line}")
+
+    click.echo(f"{len(results)} consultas revisadas, {len(problems)} con problemas.")
+    if problems:
+        raise SystemExit(1)
+
+
+@click.command('send-stock-digest')
+@with_appcontext
+def send_stock_digest_command():
+    """
+    Manda el resumen de alertas de stock pendientes (con STOCK_ALERT_DIGEST).
+    Pensado para cron, p. ej.: 0 * * * * flask send-stock-digest
+    """
+    from app import notifier
+    from app.services import alert_service
+
+    count = alert_service.send_alert_digest()
+    notifier.shutdown()  # Espera a que salga el correo antes de terminar
+    click.echo(f"Resumen enviado con {count} producto(s)." if count else "No hay alertas pendientes.")
+
+
+def register_commands(app):
+    """Registra los comandos de 'flask <comando>' de la aplicación."""
+    app.cli.add_command(rebuild_rollups_command)
+    app.cli.add_command(import_products_command)
+    app.cli.add_command(calibrate_bcrypt_command)
+    app.cli.add_command(check_query_plans_command)
+    app.cli.add_command(send_stock_digest_command)
@@ -0,0 +1,93 @@
+import os
+
+from sqlalchemy import event
+
+
+class SQLiteProfile:
+    """
+    Perfil para SQLite (portátil, servidor pequeño).
+    Los PRAGMA se aplican a cada conexión nueva:
+    - journal_mode=WAL: los lectores no bloquean al que escribe (y viceversa).
+    - synchronous=NORMAL: con WAL es seguro y evita un fsync por commit.
+    - busy_timeout: espera al lock en vez de fallar con "database is locked".
+    - mmap_size / cache_size: más páginas en memoria (cache_size negativo = KiB).
+    """
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,
+    }
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+
+
+class PostgreSQLProfile:
+    """
+    Perfil para PostgreSQL (servidor con varios workers).
+    Pool de conexiones acotado por proceso; 'pool_pre_ping' descarta las
+    conexiones que el servidor haya cerrado antes de usarlas.
+    """
+    SQLITE_PRAGMAS = {}
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': 30,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True,
+    }
+
+
+PROFILES = {
+    'sqlite': SQLiteProfile,
+    'postgresql': PostgreSQLProfile,
+}
+
+
+def database_url():
+    """
+    URL de la BD: variable de entorno DATABASE_URL o el SQLite local de siempre.
+    Acepta el esquema 'postgres://' de algunos proveedores.
+    """
+    url = os.environ.get('DATABASE_URL', 'sqlite:///proyecto.db')
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def select_profile(app, name=None):
+    """
+    Elige el perfil: el indicado, el de DB_PROFILE (config) o APP_PROFILE
+    (entorno), o el que corresponde al motor de SQLALCHEMY_DATABASE_URI.
+    Sus valores solo se aplican si la configuración no los define ya.
+    """
+    name = name or app.config.get('DB_PROFILE') or os.environ.get('APP_PROFILE')
+    if not name:
+        name = 'postgresql' if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql') else 'sqlite'
+    if name not in PROFILES:
+        raise ValueError(f"Perfil de base de datos desconocido: {name} (opciones: {', '.join(PROFILES)})")
+
+    profile = PROFILES[name]
+    for key in dir(profile):
+        if key.isupper():
+            app.config.setdefault(key, getattr(profile, key))
+    app.config['DB_PROFILE'] = name
+
+
+def init_engine(app, db):
+    """
+    Registra los PRAGMA de SQLITE_PRAGMAS para cada conexión nueva del motor
+    de la app (solo si la BD es SQLite). Llamar después de 'db.init_app(app)'.
+    """
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
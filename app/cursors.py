@@ -0,0 +1,28 @@
+"""
+Cursores de la paginación por clave ("keyset"): los valores de la clave de
+orden de una fila (p. ej. [nombre, id]) como texto opaco para la URL.
+"""
+import base64
+import json
+
+
+def encode_key(values):
+    """Valores de la clave de orden -> texto base64 apto para URL."""
+    raw = json.dumps(list(values)).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_key(cursor, types):
+    """
+    Operación inversa de 'encode_key': convierte cada valor con su tipo de
+    'types'. Devuelve una tupla, o None si el cursor está vacío o no es válido.
+    """
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if len(values) != len(types):
+            return None
+        return tuple(cast(value) for cast, value in zip(types, values))
+    except (ValueError, TypeError):
+        return None
@@ -0,0 +1,142 @@
+"""
+Servidor SMTP local para pruebas y desarrollo.
+
+Acepta cualquier correo y lo guarda en memoria (no lo reenvía a nadie),
+así se pueden probar las alertas de stock sin tocar Gmail.
+
+Uso desde la consola:
+    python -m app.mail_stub --port 8025
+
+y en la configuración de la app:
+    MAIL_SERVER = 'localhost', MAIL_PORT = 8025, MAIL_USE_TLS = False
+"""
+import argparse
+import socketserver
+import threading
+import time
+from email import message_from_bytes
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """
+    Implementa el mínimo del protocolo SMTP: HELO/EHLO, MAIL, RCPT, DATA,
+    RSET, NOOP y QUIT. Una conexión puede enviar varios mensajes seguidos.
+    """
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self._reply('220 localhost SMTP de pruebas')
+        sender, recipients = None, []
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command[:4].upper()
+
+            if server.delay:
+                time.sleep(server.delay)  # Simula un servidor lento
+
+            if verb == 'EHLO':
+                self._reply('250-localhost')
+                self._reply('250 8BITMIME')
+            elif verb == 'HELO':
+                self._reply('250 localhost')
+            elif verb == 'MAIL':
+                sender, recipients = command[10:].strip('<> '), []
+                self._reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command[8:].strip('<> '))
+                self._reply('250 OK')
+            elif verb == 'DATA':
+                self._reply('354 Fin de datos con <CR><LF>.<CR><LF>')
+                server.store(sender, recipients, self._read_data())
+                self._reply('250 OK')
+            elif verb == 'RSET':
+                sender, recipients = None, []
+                self._reply('250 OK')
+            elif verb == 'NOOP':
+                self._reply('250 OK')
+            elif verb == 'QUIT':
+                self._reply('221 Adiós')
+                return
+            else:
+                self._reply('502 Comando no implementado')
+
+    def _read_data(self):
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b'.\r\n', b'.\n'):
+                break
+            if line.startswith(b'..'):
+                line = line[1:]  # "Dot-stuffing" del protocolo
+            lines.append(line)
+        return b''.join(lines)
+
+    def _reply(self, text):
+        self.wfile.write(f'{text}\r\n'.encode('utf-8'))
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """
+    Servidor SMTP en un hilo aparte que guarda los mensajes recibidos.
+
+        with LocalSMTPServer(port=0) as smtp:
+            app.config['MAIL_PORT'] = smtp.port
+            ...
+            smtp.messages  # Lista de email.message.Message recibidos
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=8025, delay=0.0):
+        super().__init__((host, port), _SMTPHandler)
+        self.delay = delay
+        self.messages = []
+        self.connections = 0
+        self._messages_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def store(self, sender, recipients, data):
+        message = message_from_bytes(data)
+        message['X-Envelope-From'] = sender
+        message['X-Envelope-To'] = ', '.join(recipients)
+        with self._messages_lock:
+            self.messages.append(message)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Servidor SMTP local de pruebas.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8025)
+    args = parser.parse_args()
+
+    server = LocalSMTPServer(args.host, args.port)
+    print(f"SMTP de pruebas escuchando en {args.host}:{server.port} (Ctrl+C para salir)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
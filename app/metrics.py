@@ -0,0 +1,199 @@
+"""
+Métricas para Prometheus (formato de texto en /metrics).
+
+- Latencia de cada petición HTTP por endpoint, método y código de respuesta.
+- Ventas (process_cart) según el resultado, y lo que tardan.
+- Alertas de stock y correos: encolados, enviados, fallidos y descartados.
+- Duración de la generación de PDFs y de los hashes bcrypt.
+- Conexiones de la BD en uso (pool del motor de SQLAlchemy).
+
+Las funciones 'observe_*' / 'count_*' se pueden llamar desde cualquier
+sitio (servicios, hilos en segundo plano, consola): si 'prometheus_client'
+no está instalado no hacen nada.
+
+Con varios procesos (gunicorn) cada worker tiene sus propios contadores;
+para sumarlos hay que definir PROMETHEUS_MULTIPROC_DIR (un directorio vacío)
+ANTES de arrancar el servidor, y en 'gunicorn.conf.py':
+
+    from app.metrics import child_exit  # Limpia los datos de los workers que terminan
+
+Configuración:
+  METRICS_ENABLED  registrar los hooks y la ruta /metrics (por defecto, si
+                   'prometheus_client' está instalado)
+  METRICS_TOKEN    /metrics exige 'Authorization: Bearer <token>'. Sin token,
+                   /metrics solo responde en modo debug (403 en producción)
+"""
+import hmac
+import os
+import time
+
+from flask import Response, abort, g, request
+from sqlalchemy import event
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+except ImportError:  # Sin prometheus_client no hay métricas (todo lo demás funciona igual)
+    prometheus_client = None
+
+# Tramos de los histogramas (segundos)
+PDF_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+PASSWORD_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+if prometheus_client is not None:
+    REQUEST_LATENCY = Histogram(
+        'app_request_duration_seconds', 'Duración de las peticiones HTTP',
+        ['endpoint', 'method', 'status'])
+    SALES = Counter(
+        'app_sales_total', 'Carritos procesados según el resultado', ['resultado'])
+    SALE_LATENCY = Histogram(
+        'app_sale_duration_seconds', 'Duración del proceso de venta', ['resultado'])
+    STOCK_ALERTS = Counter(
+        'app_stock_alerts_total', 'Alertas de stock según el resultado', ['resultado'])
+    MAILS = Counter(
+        'app_mail_total', 'Correos del notificador según el resultado', ['resultado'])
+    PDF_LATENCY = Histogram(
+        'app_pdf_duration_seconds', 'Duración de la generación de PDFs', ['tipo'],
+        buckets=PDF_BUCKETS)
+    PASSWORD_LATENCY = Histogram(
+        'app_password_hash_seconds', 'Duración de los hashes bcrypt (incluida la espera al pool)',
+        ['operacion'], buckets=PASSWORD_BUCKETS)
+    # 'livesum': con varios procesos se suman los de los workers vivos
+    DB_POOL_CHECKED_OUT = Gauge(
+        'app_db_pool_checked_out', 'Conexiones de la BD en uso', multiprocess_mode='livesum')
+    DB_POOL_SIZE = Gauge(
+        'app_db_pool_size', 'Tamaño del pool de conexiones de la BD', multiprocess_mode='livesum')
+
+
+# --- Registro desde el código de la aplicación ---
+
+def observe_sale(outcome, seconds):
+    """Resultado de 'process_cart': 'ok', 'sin_stock', 'no_encontrado', 'invalido' o 'error'."""
+    if prometheus_client is not None:
+        SALES.labels(outcome).inc()
+        SALE_LATENCY.labels(outcome).observe(seconds)
+
+
+def count_stock_alert(outcome, amount=1):
+    """
+    'encolada', 'descartada' (cola llena), 'error' (no se pudo preparar el
+    correo) o 'suprimida' (producto bajo el umbral del que ya se había avisado).
+    """
+    if prometheus_client is not None:
+        STOCK_ALERTS.labels(outcome).inc(amount)
+
+
+def count_mail(outcome):
+    """'enviado', 'fallido' (tras los reintentos) o 'descartado' (cola llena o detenida)."""
+    if prometheus_client is not None:
+        MAILS.labels(outcome).inc()
+
+
+def observe_pdf(kind, seconds):
+    """'pagina' (al momento) o 'inventario' (completo, en segundo plano)."""
+    if prometheus_client is not None:
+        PDF_LATENCY.labels(kind).observe(seconds)
+
+
+def observe_password(operation, seconds):
+    """'hash' o 'check'."""
+    if prometheus_client is not None:
+        PASSWORD_LATENCY.labels(operation).observe(seconds)
+
+
+def child_exit(server, worker):
+    """Hook de gunicorn: borra los datos de un worker que ha terminado (modo multiproceso)."""
+    if prometheus_client is not None and os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(worker.pid)
+
+
+# --- EXTENSIÓN ---
+
+class Metrics:
+    """
+    Mide cada petición (hooks de Flask), sigue el uso del pool de la BD
+    (eventos del motor) y publica todo en /metrics.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Llamar después de 'db.init_app(app)' (necesita el motor de la BD)."""
+        app.config.setdefault('METRICS_ENABLED', prometheus_client is not None)
+        app.config.setdefault('METRICS_TOKEN', None)
+
+        self.app = app
+        app.extensions['metrics'] = self
+
+        if not self.enabled:
+            return
+
+        with app.app_context():
+            engine = app.extensions['sqlalchemy'].engine
+        size = getattr(engine.pool, 'size', None)
+        if callable(size):  # QueuePool; los pools de SQLite en memoria no tienen tamaño
+            DB_POOL_SIZE.set(size())  # 'set' y no 'inc': cada create_app() lo volvería a sumar
+        event.listen(engine, 'checkout', self._checkout)
+        event.listen(engine, 'checkin', self._checkin)
+
+        app.before_request(self._start_request)
+        app.after_request(self._record_status)
+        app.teardown_request(self._finish_request)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+
+    @property
+    def enabled(self):
+        return bool(prometheus_client is not None and self.app and self.app.config['METRICS_ENABLED'])
+
+    # --- Pool de la BD ---
+
+    @staticmethod
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKED_OUT.inc()
+
+    @staticmethod
+    def _checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.dec()
+
+    # --- Hooks de petición ---
+
+    @staticmethod
+    def _start_request():
+        g._metrics_started = time.perf_counter()
+
+    @staticmethod
+    def _record_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+    @staticmethod
+    def _finish_request(exc=None):
+        started = g.pop('_metrics_started', None)
+        if started is None:
+            return
+        status = 500 if exc is not None else g.pop('_metrics_status', 500)
+        REQUEST_LATENCY.labels(request.endpoint or '(sin endpoint)', request.method,
+                               str(status)).observe(time.perf_counter() - started)
+
+    # --- /metrics ---
+
+    def metrics_view(self):
+        token = self.app.config['METRICS_TOKEN']
+        if not token:
+            if not self.app.debug:
+                abort(403)  # Sin METRICS_TOKEN no se publican las métricas fuera de debug
+        elif not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            abort(401)
+
+        if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            # Suma los ficheros de todos los procesos (cada uno escribe los suyos)
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = prometheus_client.REGISTRY
+        return Response(prometheus_client.generate_latest(registry),
+                        content_type=prometheus_client.CONTENT_TYPE_LATEST)
@@ -1,4 +1,6 @@
 from app import db
+from sqlalchemy import DDL, and_, event, literal_column
+from sqlalchemy.ext.hybrid import hybrid_property
 
 # --- Tabla de Asociación ---
 product_supplier_association = db.Table('product_supplier_association',
@@ -8,6 +10,22 @@ product_supplier_association = db.Table('product_supplier_association',
                                                   primary_key=True)
                                         )
 
+# --- Estados de la alerta de stock ---
+ALERT_ARMED = 'armada'  # Se avisará cuando el stock baje del umbral
+ALERT_PENDING = 'pendiente'  # Bajo el umbral, a la espera del resumen periódico
+ALERT_NOTIFIED = 'notificada'  # Ya avisado: no se repite hasta reponer stock
+
+
+def _stock_margin(cls):
+    """
+    Expresión SQL 'cantidad_stock * 10 - stock_objetivo'.
+    Es negativa (o cero) cuando el stock está por debajo del 10% del objetivo.
+    El 10 va escrito en la sentencia (no como parámetro) para que coincida
+    con la expresión del índice.
+    """
+    return cls.cantidad_stock * literal_column('10') - cls.stock_objetivo
+
+
 class Product(db.Model):
     """
     Modelo de Base de Datos para un Producto.
@@ -33,6 +51,14 @@ class Product(db.Model):
     # si el stock actual es <= 10% de ese objetivo.
     stock_objetivo = db.Column(db.Integer, nullable=False, default=100)
 
+    # Estado de la alerta (ver app/services/alert_service.py): se avisa una sola
+    # vez al cruzar el umbral y se vuelve a armar al reponer por encima de
+    # STOCK_ALERT_REARM_PERCENT del objetivo. Está en la BD para que lo vean
+    # todos los workers y no se pierda al reiniciar.
+    alerta_estado = db.Column(db.String(10), nullable=False, default=ALERT_ARMED,
+                              server_default=ALERT_ARMED)
+    alerta_fecha = db.Column(db.DateTime)  # Cuándo cruzó el umbral por última vez
+
     # --- Relación Muchos-a-Muchas ---
     # 'suppliers' es un campo "virtual" que nos dará una lista de
     # objetos Supplier asociados a este Producto.
@@ -43,17 +69,87 @@ class Product(db.Model):
     )
 
     # --- Propiedad para la Alerta de Stock ---
-    @property
+    # Es "híbrida": en Python se evalúa sobre el objeto y en las consultas
+    # (Product.query.filter(Product.stock_alert)) se traduce a SQL.
+    @hybrid_property
     def stock_alert(self):
         """
         Propiedad que devuelve True si el stock es peligrosamente bajo.
         """
-        if self.stock_objetivo == 0:
-            return False  # Evitar división por cero
+        if self.stock_objetivo <= 0:
+            return False  # Sin objetivo no hay alerta (igual que en SQL)
+
+        # Stock <= 10% del objetivo (el 90% consumido), en enteros:
+        # cantidad_stock * 10 <= stock_objetivo
+        return self.cantidad_stock * 10 <= self.stock_objetivo
 
-        # Calcula el 10% del stock objetivo (el 90% consumido)
-        umbral_minimo = self.stock_objetivo * 0.10
-        return self.cantidad_stock <= umbral_minimo
+    @stock_alert.expression
+    def stock_alert(cls):
+        # Se escribe como "margen <= 0" para que la BD use el índice
+        # 'ix_product_stock_alert' (definido debajo de la clase).
+        return and_(cls.stock_objetivo > 0, _stock_margin(cls) <= 0)
 
     def __repr__(self):
-        return f'<Product {self.nombre} (Ref: {self.referencia})>'
\ No newline at end of file
+        return f'<Product {self.nombre} (Ref: {self.referencia})>'
+
+
+# Índice sobre la expresión de la alerta: la BD lo mantiene sola en cada
+# venta, edición o reposición, y la consulta de alertas solo recorre los
+# productos en alerta en lugar de toda la tabla.
+db.Index('ix_product_stock_alert', _stock_margin(Product))
+
+# Índice para buscar las alertas pendientes del resumen y las que hay que rearmar
+db.Index('ix_product_alerta_estado', Product.alerta_estado)
+
+# Índice para el listado paginado del catálogo (orden por nombre, id)
+db.Index('ix_product_nombre_id', Product.nombre, Product.id)
+
+# La clave primaria de la asociación (product_id, supplier_id) sirve para ir de
+# producto a proveedores; este índice sirve para el sentido contrario
+# (los productos de un proveedor).
+db.Index('ix_product_supplier_supplier', product_supplier_association.c.supplier_id,
+         product_supplier_association.c.product_id)
+
+
+# --- Búsqueda de Texto Completo (solo SQLite, con FTS5) ---
+# 'product_fts' es un índice de texto sobre nombre, referencia y descripción:
+# - 'remove_diacritics 2' ignora las tildes ("raton" encuentra "Ratón").
+# - 'prefix' acelera las búsquedas por prefijo ("tecl*").
+# - 'content=product' no duplica el texto: el índice apunta a la tabla product.
+# Los triggers lo mantienen al día en cada alta, edición o borrado
+# (los cambios de stock no lo tocan: el trigger solo vigila esas 3 columnas).
+PRODUCT_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+        nombre, referencia, descripcion,
+        content='product', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS product_fts_ai AFTER INSERT ON product BEGIN
+        INSERT INTO product_fts(rowid, nombre, referencia, descripcion)
+        VALUES (new.id, new.nombre, new.referencia, new.descripcion);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS product_fts_ad AFTER DELETE ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, nombre, referencia, descripcion)
+        VALUES ('delete', old.id, old.nombre, old.referencia, old.descripcion);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS product_fts_au AFTER UPDATE OF nombre, referencia, descripcion ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, nombre, referencia, descripcion)
+        VALUES ('delete', old.id, old.nombre, old.referencia, old.descripcion);
+        INSERT INTO product_fts(rowid, nombre, referencia, descripcion)
+        VALUES (new.id, new.nombre, new.referencia, new.descripcion);
+    END
+    """,
+]
+
+# Así 'db.create_all()' también crea el índice (las migraciones lo crean aparte)
+for _statement in PRODUCT_FTS_DDL:
+    event.listen(Product.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+event.listen(Product.__table__, 'before_drop',
+             DDL('DROP TABLE IF EXISTS product_fts').execute_if(dialect='sqlite'))
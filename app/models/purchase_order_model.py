@@ -0,0 +1,79 @@
+from app import db
+from datetime import datetime
+
+# Estados de un pedido a proveedor
+ORDER_OPEN = 'abierto'  # Pedido hecho, pendiente de llegar
+ORDER_RECEIVED = 'recibido'  # Mercancía recibida y sumada al stock
+ORDER_CANCELLED = 'cancelado'
+
+
+class PurchaseOrder(db.Model):
+    """
+    Pedido de compra a un proveedor (reposición de stock).
+    Al recibirlo se suma al stock lo que ha llegado de cada línea
+    (ver purchase_service.receive_purchase_order).
+    """
+    __tablename__ = 'purchase_order'
+
+    id = db.Column(db.Integer, primary_key=True)
+    supplier_id = db.Column(db.Integer, db.ForeignKey('supplier.id'), nullable=False)
+
+    estado = db.Column(db.String(10), nullable=False, default=ORDER_OPEN, server_default=ORDER_OPEN)
+    fecha = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    notas = db.Column(db.Text)
+
+    # Quién lo pidió y quién lo recibió (y cuándo)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    fecha_recepcion = db.Column(db.DateTime)
+    recibido_por_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+
+    supplier = db.relationship('Supplier', backref=db.backref('purchase_orders', lazy='dynamic'))
+    user = db.relationship('User', foreign_keys=[user_id])
+    recibido_por = db.relationship('User', foreign_keys=[recibido_por_id])
+    lines = db.relationship('PurchaseOrderLine', back_populates='order',
+                            cascade='all, delete-orphan', order_by='PurchaseOrderLine.id')
+
+    __table_args__ = (
+        # Listado de pedidos (los más recientes primero), filtrado por estado
+        db.Index('ix_purchase_order_estado_fecha', 'estado', 'fecha'),
+        db.Index('ix_purchase_order_supplier_id', 'supplier_id'),
+    )
+
+    def __repr__(self):
+        return f'<PurchaseOrder {self.id} ({self.estado})>'
+
+
+class PurchaseOrderLine(db.Model):
+    """
+    Línea de un pedido de compra: un producto, la cantidad pedida y la
+    recibida (vacía hasta que llega el pedido).
+    """
+    __tablename__ = 'purchase_order_line'
+
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('purchase_order.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+
+    cantidad = db.Column(db.Integer, nullable=False)
+    cantidad_recibida = db.Column(db.Integer)
+
+    # Precio unitario estimado al hacer el pedido
+    precio_unitario = db.Column(db.Float, nullable=False, default=0.0)
+
+    order = db.relationship('PurchaseOrder', back_populates='lines')
+    product = db.relationship('Product')
+
+    __table_args__ = (
+        # Un producto aparece una sola vez por pedido: la recepción suma al
+        # stock con una subconsulta que debe devolver una única fila por producto
+        db.UniqueConstraint('order_id', 'product_id', name='uq_purchase_order_line_order_product'),
+        # Pedidos pendientes de un producto (stock en camino)
+        db.Index('ix_purchase_order_line_product_id', 'product_id'),
+    )
+
+    @property
+    def total(self):
+        return self.cantidad * self.precio_unitario
+
+    def __repr__(self):
+        return f'<PurchaseOrderLine {self.order_id} {self.product_id} x{self.cantidad}>'
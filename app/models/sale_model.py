@@ -1,5 +1,6 @@
 from app import db
 from datetime import datetime
+from sqlalchemy.ext.hybrid import hybrid_property
 
 
 class Sale(db.Model):
@@ -28,6 +29,19 @@ class Sale(db.Model):
     user = db.relationship('User', backref=db.backref('sales', lazy=True))
     product = db.relationship('Product', backref=db.backref('sales', lazy=True))
 
-    @property
+    @hybrid_property
     def total(self):
-        return self.cantidad * self.precio_unitario
\ No newline at end of file
+        """
+        Importe de la línea. Funciona en Python (sale.total) y también
+        dentro de consultas (func.sum(Sale.total)), calculado por la BD.
+        """
+        return self.cantidad * self.precio_unitario
+
+
+# Índices para los listados de ventas (ver la migración de índices):
+# - historial de un usuario: WHERE user_id = ? ORDER BY fecha DESC, id DESC
+# - todas las ventas y la exportación: ORDER BY fecha, id (y rangos de fechas)
+# - ventas de un producto (Product.sales, resúmenes por producto)
+db.Index('ix_sale_user_fecha_id', Sale.user_id, Sale.fecha, Sale.id)
+db.Index('ix_sale_fecha_id', Sale.fecha, Sale.id)
+db.Index('ix_sale_product_fecha', Sale.product_id, Sale.fecha)
@@ -0,0 +1,52 @@
+from app import db
+
+# product_id que guarda el total de todos los productos en las tablas de resumen
+ALL_PRODUCTS = 0
+
+
+class SalesDaily(db.Model):
+    """
+    Resumen de ventas por día y producto.
+    Se actualiza en la misma transacción que cada venta (ver sale_service),
+    así los informes leen unos cientos de filas en lugar de toda la tabla 'sale'.
+    La fila con product_id = 0 (ALL_PRODUCTS) es el total del día.
+    """
+    __tablename__ = 'sales_daily'
+
+    dia = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+
+    unidades = db.Column(db.Integer, nullable=False, default=0)
+    ingresos = db.Column(db.Float, nullable=False, default=0.0)
+    pedidos = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Serie temporal de un producto concreto. Con 'unidades' dentro, la
+        # demanda por producto (replenishment_service) se lee solo del índice.
+        db.Index('ix_sales_daily_product_dia_unidades', 'product_id', 'dia', 'unidades'),
+    )
+
+    def __repr__(self):
+        return f'<SalesDaily {self.dia} {self.product_id}>'
+
+
+class SalesMonthly(db.Model):
+    """
+    Resumen de ventas por mes y producto ('mes' es el día 1 de cada mes).
+    Igual que SalesDaily, con product_id = 0 para el total del mes.
+    """
+    __tablename__ = 'sales_monthly'
+
+    mes = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+
+    unidades = db.Column(db.Integer, nullable=False, default=0)
+    ingresos = db.Column(db.Float, nullable=False, default=0.0)
+    pedidos = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_sales_monthly_product_mes', 'product_id', 'mes'),
+    )
+
+    def __repr__(self):
+        return f'<SalesMonthly {self.mes} {self.product_id}>'
@@ -1,14 +1,59 @@
-from app import db, login_manager, bcrypt
+from flask import current_app
+from app import db, login_manager, passwords, cache
 from flask_login import UserMixin
 
 
+class CachedUser(UserMixin):
+    """
+    Copia ligera del usuario de la sesión (id, nombre y rol) que se guarda en
+    la caché. Es lo que devuelve 'current_user' en cada petición: tiene lo que
+    usan las rutas y plantillas, sin tocar la BD (ni guardar el hash de la contraseña).
+    """
+
+    def __init__(self, id, username, role):
+        self.id = id
+        self.username = username
+        self.role = role
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.username, user.role)
+
+    def __repr__(self):
+        return f'<CachedUser {self.username} ({self.role})>'
+
+
+def _user_cache_key(user_id):
+    return f'user:{int(user_id)}'
+
+
+def forget_user(user_id):
+    """
+    Borra al usuario de la caché. Hay que llamarlo después de cambiar su
+    nombre o su rol (o al cerrar sesión) para que se note en la siguiente petición.
+    """
+    cache.delete(_user_cache_key(user_id))
+
+
 @login_manager.user_loader
 def load_user(user_id):
     """
     Función requerida por Flask-Login.
     Permite cargar el usuario actual desde la sesión.
+    Se lee de la caché (USER_CACHE_TTL segundos); solo si no está se consulta la BD.
     """
-    return User.query.get(int(user_id))
+    key = _user_cache_key(user_id)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    user = User.query.get(int(user_id))
+    if user is None:
+        return None
+
+    cached = CachedUser.from_user(user)
+    cache.set(key, cached, ttl=current_app.config['USER_CACHE_TTL'])
+    return cached
 
 
 class User(db.Model, UserMixin):
@@ -43,13 +88,14 @@ class User(db.Model, UserMixin):
         raise AttributeError('¡El password no es un atributo legible!')
 
     # Método para "hashear" (encriptar) la contraseña al asignarla.
+    # (el cálculo se hace en el pool de procesos de 'passwords')
     @password.setter
     def password(self, password_texto_plano):
-        self.password_hash = bcrypt.generate_password_hash(password_texto_plano).decode('utf-8')
+        self.password_hash = passwords.hash(password_texto_plano)
 
     # Método para verificar la contraseña durante el login.
     def check_password(self, password_texto_plano):
-        return bcrypt.check_password_hash(self.password_hash, password_texto_plano)
+        return passwords.check(self.password_hash, password_texto_plano)
 
     def __repr__(self):
         # Representación en string del objeto, útil para debugging.
@@ -0,0 +1,184 @@
+import atexit
+import queue
+import threading
+import time
+
+from app.metrics import count_mail
+
+
+# Marca interna que indica a un hilo trabajador que debe terminar.
+_STOP = object()
+
+
+class NotificationDispatcher:
+    """
+    Despachador de notificaciones en segundo plano.
+
+    Las rutas encolan los mensajes y vuelven enseguida; uno o varios hilos
+    trabajadores los envían por SMTP reutilizando una única conexión abierta
+    por hilo. Si el envío falla se reintenta con espera exponencial.
+    Al apagar la aplicación se vacía la cola antes de salir.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._queue = None
+        self._threads = []
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._atexit_registered = False
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Lee la configuración de la app. Los hilos no se arrancan aquí, sino
+        con el primer mensaje (así los comandos 'flask ...' no lanzan hilos).
+        """
+        app.config.setdefault('MAIL_QUEUE_MAXSIZE', 1000)
+        app.config.setdefault('MAIL_WORKERS', 1)
+        app.config.setdefault('MAIL_MAX_RETRIES', 3)
+        app.config.setdefault('MAIL_RETRY_BACKOFF', 1.0)  # Segundos (se duplica en cada intento)
+        app.config.setdefault('MAIL_IDLE_TIMEOUT', 60)  # Cerrar la conexión SMTP tras N segundos sin uso
+
+        self.app = app
+        self._queue = queue.Queue(maxsize=app.config['MAIL_QUEUE_MAXSIZE'])
+        self._stopped = False
+        app.extensions['notifier'] = self
+        if not self._atexit_registered:  # Una vez por despachador, aunque se llame a create_app() varias veces
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+
+    # --- API PÚBLICA ---
+
+    def enqueue(self, message):
+        """
+        Encola un 'flask_mail.Message' para enviarlo en segundo plano.
+        Nunca bloquea: si la cola está llena el mensaje se descarta.
+        Devuelve True si el mensaje quedó encolado.
+        """
+        if self._stopped:
+            print(f"Notificador detenido, se descarta el correo: {message.subject}")
+            count_mail('descartado')
+            return False
+
+        self._ensure_workers()
+
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except queue.Full:
+            print(f"Cola de correo llena, se descarta el correo: {message.subject}")
+            count_mail('descartado')
+            return False
+
+    def drain(self, timeout=None):
+        """
+        Espera a que se hayan procesado todos los mensajes encolados.
+        Devuelve True si la cola quedó vacía antes del 'timeout'.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def shutdown(self, timeout=10):
+        """
+        Vacía la cola y detiene los hilos trabajadores.
+        Se registra con 'atexit' para no perder alertas al apagar el servidor.
+        """
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            threads = list(self._threads)
+            self._threads = []
+
+        for _ in threads:
+            # Bloqueamos (con límite) porque el aviso de parada debe entrar en la cola
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                break
+
+        for thread in threads:
+            thread.join(timeout)
+
+    # --- HILOS TRABAJADORES ---
+
+    def _ensure_workers(self):
+        if self._threads:
+            return
+
+        with self._lock:
+            if self._threads or self._stopped:
+                return
+            for i in range(self.app.config['MAIL_WORKERS']):
+                thread = threading.Thread(target=self._worker,
+                                          name=f'mail-worker-{i}',
+                                          daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker(self):
+        # Cada hilo necesita su propio contexto de aplicación (Flask-Mail lo usa)
+        with self.app.app_context():
+            idle_timeout = self.app.config['MAIL_IDLE_TIMEOUT']
+            connection = None
+
+            while True:
+                try:
+                    message = self._queue.get(timeout=idle_timeout)
+                except queue.Empty:
+                    # Sin tráfico: cerramos la conexión para no dejarla colgada
+                    connection = self._close(connection)
+                    continue
+
+                try:
+                    if message is _STOP:
+                        break
+                    connection = self._deliver(connection, message)
+                finally:
+                    self._queue.task_done()
+
+            self._close(connection)
+
+    def _deliver(self, connection, message):
+        """
+        Envía un mensaje reutilizando la conexión abierta.
+        Reintenta con espera exponencial y devuelve la conexión (o None).
+        """
+        mail = self.app.extensions['mail']
+        retries = self.app.config['MAIL_MAX_RETRIES']
+        backoff = self.app.config['MAIL_RETRY_BACKOFF']
+
+        for attempt in range(retries + 1):
+            try:
+                if connection is None:
+                    connection = mail.connect().__enter__()
+                connection.send(message)
+                print(f"Correo enviado: {message.subject}")
+                count_mail('enviado')
+                return connection
+            except Exception as e:
+                print(f"Error al enviar correo (intento {attempt + 1}/{retries + 1}): {e}")
+                # La conexión puede haber quedado inservible: la descartamos
+                connection = self._close(connection)
+                if attempt < retries:
+                    time.sleep(backoff * (2 ** attempt))
+
+        print(f"Se descarta el correo tras {retries + 1} intentos: {message.subject}")
+        count_mail('fallido')
+        return None
+
+    @staticmethod
+    def _close(connection):
+        if connection is not None:
+            try:
+                connection.__exit__(None, None, None)
+            except Exception:
+                pass  # El servidor ya había cerrado la conexión
+        return None
@@ -0,0 +1,188 @@
+import atexit
+import hashlib
+import hmac
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt as _bcrypt
+
+from app.metrics import observe_password
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Hay demasiados hashes de contraseña pendientes: se rechaza en vez de esperar sin límite."""
+
+
+# --- Trabajo que se ejecuta en los procesos del pool ---
+# (funciones de módulo para poder enviarlas a otro proceso)
+
+def _to_bytes(password, handle_long_passwords):
+    password = password.encode('utf-8') if isinstance(password, str) else password
+    if handle_long_passwords:
+        # Igual que Flask-Bcrypt: bcrypt solo usa los primeros 72 bytes
+        password = hashlib.sha256(password).hexdigest().encode('utf-8')
+    return password
+
+
+def _hash_password(password, rounds, prefix, handle_long_passwords):
+    salt = _bcrypt.gensalt(rounds=rounds, prefix=prefix.encode('ascii'))
+    return _bcrypt.hashpw(_to_bytes(password, handle_long_passwords), salt).decode('utf-8')
+
+
+def _check_password(pw_hash, password, handle_long_passwords):
+    pw_hash = pw_hash.encode('utf-8')
+    try:
+        candidate = _bcrypt.hashpw(_to_bytes(password, handle_long_passwords), pw_hash)
+    except ValueError:
+        return False  # Hash mal formado o contraseña demasiado larga
+    return hmac.compare_digest(candidate, pw_hash)
+
+
+# Nombre de cada operación en las métricas
+_OPERATIONS = {_hash_password: 'hash', _check_password: 'check'}
+
+
+def hash_cost(pw_hash):
+    """Coste (log2 de las rondas) guardado en un hash bcrypt: '$2b$12$...' -> 12."""
+    try:
+        return int(pw_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+# --- EXTENSIÓN ---
+
+class PasswordHasher:
+    """
+    Calcula y comprueba los hashes bcrypt de las contraseñas en un pool de
+    procesos, para que una ráfaga de logins no deje a los hilos del servidor
+    ocupados con bcrypt (es CPU pura y muy lento a propósito).
+
+    - La concurrencia está acotada: como mucho PASSWORD_MAX_PENDING hashes en
+      curso; si no hay hueco en PASSWORD_WAIT_TIMEOUT segundos se lanza
+      PasswordHasherBusy.
+    - El coste es BCRYPT_LOG_ROUNDS, o el que se calibre para tardar unos
+      PASSWORD_TARGET_MS en esta máquina (si se configura).
+    - Con PASSWORD_WORKERS = 0 se calcula en el propio hilo (pruebas, consola).
+
+    Los hashes son los mismos que los de Flask-Bcrypt (mismas opciones
+    BCRYPT_HASH_PREFIX y BCRYPT_HANDLE_LONG_PASSWORDS).
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self._rounds = None
+        self._atexit_registered = False
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('BCRYPT_LOG_ROUNDS', 12)
+        app.config.setdefault('BCRYPT_HASH_PREFIX', '2b')
+        app.config.setdefault('BCRYPT_HANDLE_LONG_PASSWORDS', False)
+        app.config.setdefault('PASSWORD_WORKERS', os.cpu_count() or 1)
+        app.config.setdefault('PASSWORD_MAX_PENDING', 8 * max(1, app.config['PASSWORD_WORKERS']))
+        app.config.setdefault('PASSWORD_WAIT_TIMEOUT', 10)
+        app.config.setdefault('PASSWORD_TARGET_MS', None)
+
+        self.app = app
+        self._slots = threading.BoundedSemaphore(app.config['PASSWORD_MAX_PENDING'])
+        self._rounds = None
+        app.extensions['passwords'] = self
+        if not self._atexit_registered:  # Una vez, aunque se llame a create_app() varias veces
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+
+    # --- API ---
+
+    @property
+    def rounds(self):
+        """Coste actual: el configurado o, si hay PASSWORD_TARGET_MS, el calibrado."""
+        if self._rounds is None:
+            target_ms = self.app.config['PASSWORD_TARGET_MS']
+            self._rounds = (self.calibrate(target_ms) if target_ms
+                            else self.app.config['BCRYPT_LOG_ROUNDS'])
+        return self._rounds
+
+    def hash(self, password):
+        """Devuelve el hash bcrypt (texto) de 'password'."""
+        if not password:
+            raise ValueError('La contraseña no puede estar vacía.')
+        return self._run(_hash_password, password, self.rounds,
+                         self.app.config['BCRYPT_HASH_PREFIX'],
+                         self.app.config['BCRYPT_HANDLE_LONG_PASSWORDS'])
+
+    def check(self, pw_hash, password):
+        """True si 'password' corresponde a 'pw_hash' (comparación en tiempo constante)."""
+        if not pw_hash or not password:
+            return False
+        return self._run(_check_password, pw_hash, password,
+                         self.app.config['BCRYPT_HANDLE_LONG_PASSWORDS'])
+
+    def needs_rehash(self, pw_hash):
+        """
+        True si el hash se calculó con un coste menor que el actual.
+        (Nunca se rebaja: un coste menor en la configuración no debilita
+        las contraseñas ya guardadas.)
+        """
+        cost = hash_cost(pw_hash)
+        return cost is not None and cost < self.rounds
+
+    def calibrate(self, target_ms, min_rounds=10, max_rounds=16):
+        """
+        Busca el mayor coste cuyo hash tarda como mucho 'target_ms' en esta
+        máquina. Mide un hash con 'min_rounds' y extrapola (cada ronda dobla
+        el tiempo). Nunca devuelve menos de 'min_rounds'.
+        """
+        start = time.perf_counter()
+        _hash_password('calibración', min_rounds, '2b', False)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        rounds = min_rounds
+        while rounds < max_rounds and elapsed_ms * 2 <= target_ms:
+            rounds += 1
+            elapsed_ms *= 2
+        return rounds
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    # --- Ejecución ---
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # 'spawn': los procesos no heredan los hilos ni las conexiones del servidor
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.app.config['PASSWORD_WORKERS'],
+                    mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def _run(self, fn, *args):
+        start = time.perf_counter()
+        try:
+            return self._execute(fn, *args)
+        finally:
+            # Se mide lo que espera la petición, cola del pool incluida
+            observe_password(_OPERATIONS[fn], time.perf_counter() - start)
+
+    def _execute(self, fn, *args):
+        if not self.app.config['PASSWORD_WORKERS']:
+            return fn(*args)
+
+        if not self._slots.acquire(timeout=self.app.config['PASSWORD_WAIT_TIMEOUT']):
+            raise PasswordHasherBusy('Demasiados inicios de sesión a la vez.')
+        try:
+            return self._pool().submit(fn, *args).result()
+        finally:
+            self._slots.release()
@@ -0,0 +1,203 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+
+class _RequestProfile:
+    """Lo que cuesta una petición en la BD (se guarda en 'g' mientras dura)."""
+    __slots__ = ('started', 'queries', 'db_time', 'statements', 'status')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = {}  # sql -> [veces, tiempo total, tiempo máximo]
+        self.status = None
+
+
+class QueryProfiler:
+    """
+    Perfil SQL por petición, con los eventos del motor de SQLAlchemy y los
+    hooks de petición de Flask:
+
+    - Por petición: nº de consultas, tiempo total en la BD, las sentencias más
+      lentas y las repetidas (la misma SQL muchas veces = posible N+1).
+    - Por endpoint: totales acumulados (peticiones, tiempo, consultas...).
+    - Las peticiones lentas, con demasiadas consultas o con sentencias
+      repetidas se guardan en un búfer circular (las últimas N).
+
+    El coste por consulta es un par de sumas y una búsqueda en un diccionario,
+    y el lock solo se toma una vez al final de cada petición. Los datos son
+    de este proceso (con varios workers, cada uno ve los suyos).
+
+    Configuración:
+      SQL_PROFILER_ENABLED             activar/desactivar (por defecto True)
+      SQL_PROFILER_SLOW_MS             petición lenta a partir de N ms (500)
+      SQL_PROFILER_MAX_QUERIES         demasiadas consultas a partir de N (30)
+      SQL_PROFILER_DUPLICATE_THRESHOLD sentencia repetida a partir de N veces (5)
+      SQL_PROFILER_RING_SIZE           peticiones guardadas en el búfer (200)
+      SQL_PROFILER_TOP_STATEMENTS      sentencias más lentas por petición (5)
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._slow = deque()
+        self._since = datetime.now()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Llamar después de 'db.init_app(app)' (necesita el motor de la BD)."""
+        app.config.setdefault('SQL_PROFILER_ENABLED', True)
+        app.config.setdefault('SQL_PROFILER_SLOW_MS', 500)
+        app.config.setdefault('SQL_PROFILER_MAX_QUERIES', 30)
+        app.config.setdefault('SQL_PROFILER_DUPLICATE_THRESHOLD', 5)
+        app.config.setdefault('SQL_PROFILER_RING_SIZE', 200)
+        app.config.setdefault('SQL_PROFILER_TOP_STATEMENTS', 5)
+
+        self.app = app
+        self._slow = deque(maxlen=app.config['SQL_PROFILER_RING_SIZE'])
+        app.extensions['sql_profiler'] = self
+
+        if not app.config['SQL_PROFILER_ENABLED']:
+            return
+
+        with app.app_context():
+            engine = app.extensions['sqlalchemy'].engine
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        app.before_request(self._start_request)
+        app.after_request(self._record_status)
+        app.teardown_request(self._finish_request)
+
+    # --- Eventos del motor (una vez por consulta) ---
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._profiler_started = time.perf_counter()
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not has_request_context():
+            return  # Consultas de comandos de consola, hilos en segundo plano...
+        profile = g.get('_sql_profile')
+        if profile is None:
+            return
+
+        elapsed = time.perf_counter() - context._profiler_started
+        profile.queries += 1
+        profile.db_time += elapsed
+        entry = profile.statements.get(statement)
+        if entry is None:
+            profile.statements[statement] = [1, elapsed, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+            if elapsed > entry[2]:
+                entry[2] = elapsed
+
+    # --- Hooks de petición ---
+
+    @staticmethod
+    def _start_request():
+        g._sql_profile = _RequestProfile()
+
+    @staticmethod
+    def _record_status(response):
+        profile = g.get('_sql_profile')
+        if profile is not None:
+            profile.status = response.status_code
+        return response
+
+    def _finish_request(self, exc=None):
+        # Las consultas que haga después una respuesta en streaming (exportaciones)
+        # ya no cuentan: la petición se cierra al entregar la respuesta.
+        profile = g.pop('_sql_profile', None)
+        if profile is None:
+            return
+
+        config = current_app.config
+        elapsed_ms = (time.perf_counter() - profile.started) * 1000
+        db_ms = profile.db_time * 1000
+        duplicates = [(sql, count, total * 1000) for sql, (count, total, _) in profile.statements.items()
+                      if count >= config['SQL_PROFILER_DUPLICATE_THRESHOLD']]
+        endpoint = request.endpoint or '(sin endpoint)'
+        is_slow = elapsed_ms >= config['SQL_PROFILER_SLOW_MS']
+        too_many = profile.queries >= config['SQL_PROFILER_MAX_QUERIES']
+
+        record = None
+        if is_slow or too_many or duplicates:
+            slowest = sorted(profile.statements.items(), key=lambda item: item[1][2], reverse=True)
+            record = {
+                'fecha': datetime.now(),
+                'metodo': request.method,
+                'ruta': request.full_path.rstrip('?'),
+                'endpoint': endpoint,
+                'estado': 500 if exc is not None else profile.status,
+                'ms': elapsed_ms,
+                'consultas': profile.queries,
+                'bd_ms': db_ms,
+                'motivos': [reason for reason, flag in (('lenta', is_slow), ('consultas', too_many),
+                                                        ('repetidas', bool(duplicates))) if flag],
+                'mas_lentas': [(sql, count, maximum * 1000) for sql, (count, _, maximum)
+                               in slowest[:config['SQL_PROFILER_TOP_STATEMENTS']]],
+                'repetidas': sorted(duplicates, key=lambda item: item[1], reverse=True),
+            }
+
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = {
+                    'endpoint': endpoint, 'peticiones': 0, 'ms': 0.0, 'max_ms': 0.0,
+                    'consultas': 0, 'max_consultas': 0, 'bd_ms': 0.0, 'marcadas': 0,
+                }
+            stats['peticiones'] += 1
+            stats['ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['consultas'] += profile.queries
+            stats['max_consultas'] = max(stats['max_consultas'], profile.queries)
+            stats['bd_ms'] += db_ms
+            if record is not None:
+                stats['marcadas'] += 1
+                self._slow.append(record)
+
+    # --- Consulta de los datos ---
+
+    @property
+    def enabled(self):
+        return bool(self.app and self.app.config['SQL_PROFILER_ENABLED'])
+
+    @property
+    def since(self):
+        return self._since
+
+    def endpoint_stats(self, order='bd_ms'):
+        """
+        Totales por endpoint, con medias, de mayor a menor según 'order'
+        ('bd_ms', 'ms', 'consultas', 'peticiones', 'marcadas').
+        """
+        with self._lock:
+            rows = [dict(stats) for stats in self._endpoints.values()]
+        for row in rows:
+            row['media_ms'] = row['ms'] / row['peticiones']
+            row['media_consultas'] = row['consultas'] / row['peticiones']
+            row['media_bd_ms'] = row['bd_ms'] / row['peticiones']
+        return sorted(rows, key=lambda row: row.get(order, 0), reverse=True)
+
+    def slow_requests(self):
+        """Peticiones marcadas (lentas, muchas consultas o repetidas), la más reciente primero."""
+        with self._lock:
+            return list(reversed(self._slow))
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self._slow.clear()
+            self._since = datetime.now()
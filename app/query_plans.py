@@ -0,0 +1,165 @@
+import re
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event, func, select
+
+from app import cache, db
+from app.cursors import encode_key
+
+
+# --- Consultas que se revisan ---
+# Cada entrada: (nombre, función que lanza las consultas, problemas permitidos).
+# Los problemas permitidos son recorridos completos esperados, p. ej. una
+# exportación o un agregado que necesita todas las filas.
+
+def _sample_ids():
+    """Ids reales (si los hay) para que las consultas tengan parámetros válidos."""
+    from app.models.product_model import Product
+    from app.models.supplier_model import Supplier
+    from app.models.user_model import User
+
+    return {
+        'user_id': db.session.execute(select(func.min(User.id))).scalar() or 1,
+        'product_id': db.session.execute(select(func.min(Product.id))).scalar() or 1,
+        'supplier_id': db.session.execute(select(func.min(Supplier.id))).scalar() or 1,
+    }
+
+
+def hot_queries():
+    from app.models.product_model import Product, product_supplier_association
+    from app.services import export_service, product_service, purchase_service, sale_service, supplier_service
+
+    ids = _sample_ids()
+    last_week = date.today() - timedelta(days=7)
+    # Cursores de "página siguiente" (a mitad del catálogo / del historial)
+    products_after = encode_key(['m', 0])
+    history_after = encode_key([datetime.utcnow().isoformat(), 0])
+
+    def supplier_products():
+        # La misma consulta que la carga de 'supplier.products'
+        return db.session.scalars(
+            select(Product).join(product_supplier_association)
+            .where(product_supplier_association.c.supplier_id == ids['supplier_id'])).all()
+
+    return [
+        # Listados completos (se guardan en la caché): recorren la tabla en el orden del índice
+        ('product_service.get_all_products', product_service.get_all_products,
+         ('SCAN product USING INDEX ix_product_nombre_id',)),
+        ('product_service.get_products_page',
+         lambda: product_service.get_products_page(after=products_after), ()),
+        ('product_service.get_product_by_id',
+         lambda: product_service.get_product_by_id(ids['product_id']), ()),
+        ('product_service.get_stock_alerts', product_service.get_stock_alerts, ()),
+        ('product_service.get_inventory_statistics', product_service.get_inventory_statistics,
+         ('SCAN product', 'ORDER BY sin índice')),
+        ('product_service.search_products', lambda: product_service.search_products('raton'),
+         ('ORDER BY sin índice',)),  # Orden por relevancia
+        ('supplier_service.get_all_suppliers', supplier_service.get_all_suppliers,
+         ('SCAN supplier USING INDEX sqlite_autoindex_supplier_2',)),
+        ('supplier_service.get_supplier_by_id',
+         lambda: supplier_service.get_supplier_by_id(ids['supplier_id']), ()),
+        ('Supplier.products', supplier_products, ()),
+        ('sale_service.get_sales_by_user', lambda: sale_service.get_sales_by_user(ids['user_id']), ()),
+        ('sale_service.get_user_sales_page',
+         lambda: sale_service.get_user_sales_page(ids['user_id'], after=history_after), ()),
+        ('sale_service.get_user_sales_summary',
+         lambda: sale_service.get_user_sales_summary(ids['user_id']), ()),
+        ('sale_service.get_all_sales', sale_service.get_all_sales,
+         ('SCAN sale USING INDEX ix_sale_fecha_id',)),
+        ('sale_service.get_revenue_over_time',
+         lambda: sale_service.get_revenue_over_time('day', start=last_week), ()),
+        ('sale_service.get_top_sellers',
+         lambda: sale_service.get_top_sellers(start=last_week), ('ORDER BY sin índice',)),
+        ('purchase_service.get_purchase_orders',
+         lambda: purchase_service.get_purchase_orders('abierto'),
+         ('ORDER BY sin índice',)),  # Se ordena después de agregar las líneas
+        ('purchase_service.get_purchase_order', lambda: purchase_service.get_purchase_order(1), ()),
+        ('export_service.product_rows', lambda: list(export_service.product_rows()),
+         ('SCAN product', 'SCAN product_supplier_association USING INDEX '
+                          'sqlite_autoindex_product_supplier_association_1')),
+        ('export_service.supplier_rows', lambda: list(export_service.supplier_rows()),
+         ('SCAN supplier',)),
+        ('export_service.sale_rows',
+         lambda: list(export_service.sale_rows(*export_service.parse_date_range(
+             last_week.isoformat(), None))), ()),
+    ]
+
+
+# --- Captura y análisis de los planes ---
+
+def capture_statements(fn):
+    """Ejecuta 'fn' y devuelve las SELECT que ha lanzado, como (sql, parámetros)."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            statements.append((statement, parameters))
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        fn()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return statements
+
+
+def explain(statement, parameters):
+    """Líneas del plan de ejecución de una sentencia (SQLite o PostgreSQL)."""
+    connection = db.session.connection()
+    if connection.dialect.name == 'sqlite':
+        rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+        return [row[-1] for row in rows]
+    rows = connection.exec_driver_sql('EXPLAIN ' + statement, parameters).all()
+    return [row[0] for row in rows]
+
+
+# 'SCAN t' y también 'SCAN t USING [COVERING] INDEX i': recorrer un índice
+# entero sigue siendo leer todas las filas (solo evita ordenar)
+_SQLITE_SCAN = re.compile(r'^SCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?')
+_POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+def plan_problems(plan):
+    """
+    Problemas de un plan:
+    - 'SCAN <tabla>': la tabla se recorre entera sin índice.
+    - 'SCAN <tabla> USING INDEX <índice>': se recorre entera en el orden de
+      un índice (p. ej. para el ORDER BY). Los recorridos acotados (un LIMIT
+      de paginación) se permiten uno a uno en 'hot_queries'.
+    - 'ORDER BY sin índice': la BD ordena en una tabla temporal.
+    Los alias de SQLAlchemy ('product_1') cuentan como su tabla.
+    """
+    tables = db.metadata.tables
+    problems = []
+    for line in plan:
+        match = _SQLITE_SCAN.match(line) or _POSTGRES_SCAN.search(line)
+        if match:
+            table = match.group(1)
+            if table not in tables:
+                table = re.sub(r'_\d+$', '', table)
+            if table in tables:
+                index = match.group(2) if match.re is _SQLITE_SCAN else None
+                problems.append(f'SCAN {table} USING INDEX {index}' if index else f'SCAN {table}')
+        elif 'TEMP B-TREE FOR ORDER BY' in line or 'TEMP B-TREE FOR RIGHT PART OF ORDER BY' in line:
+            problems.append('ORDER BY sin índice')
+    return problems
+
+
+def check_query_plans():
+    """
+    Lanza cada consulta de 'hot_queries', pide su plan a la BD y marca los
+    recorridos completos y las ordenaciones sin índice no permitidos.
+    La caché se invalida antes de cada consulta para que lleguen a la BD.
+
+    Devuelve una lista de diccionarios: 'nombre', 'sql', 'plan' y 'problemas'.
+    """
+    results = []
+    for name, fn, allowed in hot_queries():
+        cache.bump()
+        for statement, parameters in capture_statements(fn):
+            plan = explain(statement, parameters)
+            problems = [p for p in dict.fromkeys(plan_problems(plan)) if p not in allowed]
+            results.append({'nombre': name, 'sql': statement, 'plan': plan, 'problemas': problems})
+    db.session.rollback()
+    return results
@@ -0,0 +1,211 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from importlib import import_module
+
+from flask import current_app, make_response, render_template, request
+
+
+# --- BACKENDS (dónde se guardan los "cubos" de fichas) ---
+
+def _refill(tokens, updated, capacity, rate, now):
+    """Fichas disponibles tras rellenar el cubo desde 'updated' hasta 'now'."""
+    return min(capacity, tokens + (now - updated) * rate)
+
+
+class MemoryRateLimitBackend:
+    """
+    Cubos dentro del proceso (un diccionario con lock). Es el backend por
+    defecto; con varios workers cada uno lleva su propia cuenta.
+    """
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # clave -> (fichas, actualizado_en)
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, rate, now, cost=1):
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = _refill(tokens, updated, capacity, rate, now)
+            allowed = tokens >= cost
+            if allowed:
+                tokens = min(capacity, tokens - cost)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)  # El cubo más antiguo ya estaría lleno
+        return allowed, 0 if allowed else (1 - tokens) / rate
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteRateLimitBackend:
+    """
+    Cubos compartidos entre procesos (varios workers de gunicorn) en un
+    fichero SQLite local. Cada consumo es una transacción corta (BEGIN IMMEDIATE).
+    """
+
+    CLEANUP_EVERY = 1000  # Consumos entre limpiezas de cubos viejos
+    MAX_IDLE = 24 * 3600  # Un cubo sin usar en un día ya está lleno: se puede borrar
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()  # Una conexión por hilo
+        self._counter = 0
+
+        conn = self._connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS rate_bucket ('
+                     'key TEXT PRIMARY KEY, tokens REAL, updated REAL)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def consume(self, key, capacity, rate, now, cost=1):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM rate_bucket WHERE key = ?', (key,)).fetchone()
+            tokens = _refill(*(row or (capacity, now)), capacity, rate, now)
+            allowed = tokens >= cost
+            if allowed:
+                tokens = min(capacity, tokens - cost)
+            conn.execute('INSERT OR REPLACE INTO rate_bucket (key, tokens, updated) VALUES (?, ?, ?)',
+                         (key, tokens, now))
+
+            self._counter += 1
+            if self._counter % self.CLEANUP_EVERY == 0:
+                conn.execute('DELETE FROM rate_bucket WHERE updated < ?', (now - self.MAX_IDLE,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed, 0 if allowed else (1 - tokens) / rate
+
+    def reset(self):
+        self._connect().execute('DELETE FROM rate_bucket')
+
+
+# --- EXTENSIÓN ---
+
+class RateLimiter:
+    """
+    Control de admisión con "cubos de fichas" (token bucket) por IP y por
+    nombre de usuario, para las rutas que disparan bcrypt (login, registro).
+
+    Cada intento gasta una ficha; los cubos se rellenan poco a poco. Si no
+    quedan fichas se responde 429 al momento, sin tocar la BD ni bcrypt.
+    Un intento que no llega a comprobarse (servidor ocupado) se devuelve con 'refund'.
+
+    Un backend propio necesita 'consume(key, capacity, rate, now, cost=1)'
+    (cost=-1 devuelve una ficha) y 'reset()'.
+
+    Configuración:
+      RATELIMIT_ENABLED   activar/desactivar (por defecto True)
+      RATELIMIT_BACKEND   'memory' (por defecto), 'sqlite' o 'paquete.modulo:Clase'
+      RATELIMIT_PATH      fichero del backend 'sqlite' (por defecto instance/ratelimit.db)
+      RATE_LIMITS         {'ruta': {'ip': (fichas, segundos), 'username': (fichas, segundos)}}
+                          p. ej. (5, 60) = ráfagas de 5 intentos y 5 nuevos por minuto.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RATELIMIT_ENABLED', True)
+        app.config.setdefault('RATELIMIT_BACKEND', 'memory')
+        app.config.setdefault('RATELIMIT_PATH', os.path.join(app.instance_path, 'ratelimit.db'))
+        app.config.setdefault('RATE_LIMITS', {})
+
+        backend = app.config['RATELIMIT_BACKEND']
+        if backend == 'memory':
+            self.backend = MemoryRateLimitBackend()
+        elif backend == 'sqlite':
+            os.makedirs(os.path.dirname(app.config['RATELIMIT_PATH']), exist_ok=True)
+            self.backend = SQLiteRateLimitBackend(app.config['RATELIMIT_PATH'])
+        elif isinstance(backend, str):
+            module_name, class_name = backend.split(':')
+            self.backend = getattr(import_module(module_name), class_name)(app)
+        else:
+            self.backend = backend  # Un objeto ya construido
+
+        app.extensions['ratelimit'] = self
+
+    @staticmethod
+    def request_keys():
+        """Claves de los cubos para la petición actual: IP y nombre de usuario del formulario."""
+        return {
+            'ip': request.remote_addr,
+            'username': (request.form.get('username') or '').strip().lower(),
+        }
+
+    def check(self, name, keys):
+        """
+        Gasta una ficha de cada cubo de la ruta 'name' ('keys' = {'ip': ..., 'username': ...}).
+        Devuelve 0 si se admite o los segundos a esperar si se rechaza.
+        Se para en el primer cubo vacío (los siguientes no gastan ficha).
+        """
+        limits = current_app.config['RATE_LIMITS'].get(name, {})
+        now = time.time()
+        for scope, (capacity, period) in limits.items():
+            value = keys.get(scope)
+            if not value:
+                continue
+            allowed, retry_after = self.backend.consume(f'{name}:{scope}:{value}',
+                                                        capacity, capacity / period, now)
+            if not allowed:
+                return retry_after
+        return 0
+
+    def refund(self, name, keys=None):
+        """
+        Devuelve la ficha gastada en cada cubo de la ruta 'name' (por defecto,
+        los de la petición actual): el intento no cuenta para el límite.
+        """
+        if not current_app.config['RATELIMIT_ENABLED']:
+            return
+        keys = keys if keys is not None else self.request_keys()
+        limits = current_app.config['RATE_LIMITS'].get(name, {})
+        now = time.time()
+        for scope, (capacity, period) in limits.items():
+            value = keys.get(scope)
+            if value:
+                self.backend.consume(f'{name}:{scope}:{value}', capacity, capacity / period, now, cost=-1)
+
+    def limit(self, name):
+        """
+        Decorador para una ruta: limita sus POST con los cubos de RATE_LIMITS[name].
+        Las peticiones GET (ver el formulario) no gastan fichas.
+        """
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                if request.method == 'POST' and current_app.config['RATELIMIT_ENABLED']:
+                    retry_after = self.check(name, self.request_keys())
+                    if retry_after:
+                        return self._reject(retry_after)
+                return f(*args, **kwargs)
+
+            return decorated_function
+
+        return decorator
+
+    def _reject(self, retry_after):
+        seconds = max(1, int(retry_after + 0.999))
+        response = make_response(render_template('rate_limited.html', title='Demasiados Intentos',
+                                                 retry_after=seconds), 429)
+        response.headers['Retry-After'] = str(seconds)
+        return response
@@ -0,0 +1,131 @@
+import glob
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ReportRunner:
+    """
+    Genera reportes (PDF) en segundo plano y los guarda en disco.
+
+    Cada reporte se identifica por un nombre y una clave (por ejemplo la
+    versión del catálogo): si el fichero ya existe se reutiliza, y si otra
+    petición ya lo está generando no se vuelve a lanzar. Un fichero '.lock'
+    evita que dos procesos generen el mismo reporte a la vez.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._executor = None
+        self._jobs = {}  # ruta -> Future
+        self._lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('REPORTS_DIR', os.path.join(app.instance_path, 'reports'))
+        app.config.setdefault('REPORT_WORKERS', 1)  # Reportes generándose a la vez
+        app.config.setdefault('REPORTS_KEEP', 3)  # Ficheros antiguos que se conservan por reporte
+        app.config.setdefault('REPORT_LOCK_TIMEOUT', 600)  # Segundos hasta dar un '.lock' por abandonado
+
+        self.app = app
+        self._executor = ThreadPoolExecutor(max_workers=app.config['REPORT_WORKERS'],
+                                            thread_name_prefix='report')
+        app.extensions['reports'] = self
+
+    def path_for(self, name, key):
+        return os.path.join(self.app.config['REPORTS_DIR'], f'{name}-{key}.pdf')
+
+    def status(self, name, key):
+        """
+        Estado del reporte: 'ready', 'running', 'failed' o 'missing'.
+        """
+        path = self.path_for(name, key)
+        if os.path.exists(path):
+            return 'ready'
+
+        with self._lock:
+            future = self._jobs.get(path)
+        if future is not None:
+            if not future.done():
+                return 'running'
+            if future.exception() is not None:
+                return 'failed'
+
+        if self._lock_is_active(path):
+            return 'running'  # Lo está generando otro proceso
+        return 'missing'
+
+    def submit(self, name, key, build):
+        """
+        Lanza la generación del reporte si no existe ni se está generando.
+        'build(ruta)' escribe el fichero; se ejecuta en un hilo aparte con
+        su propio contexto de aplicación. Devuelve el estado resultante.
+        """
+        status = self.status(name, key)
+        if status in ('ready', 'running'):
+            return status
+
+        path = self.path_for(name, key)
+        with self._lock:
+            future = self._jobs.get(path)
+            if future is not None and not future.done():
+                return 'running'
+            self._jobs[path] = self._executor.submit(self._run, name, path, build)
+        return 'running'
+
+    # --- Ejecución en segundo plano ---
+
+    def _run(self, name, path, build):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        lock_path = path + '.lock'
+
+        if os.path.exists(lock_path) and not self._lock_is_active(path):
+            try:
+                os.remove(lock_path)  # Quedó de un proceso que se cayó
+            except OSError:
+                pass
+
+        try:
+            # O_EXCL: solo un proceso puede crear el '.lock'
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return  # Otro proceso lo está generando
+
+        tmp_path = path + '.tmp'
+        try:
+            with self.app.app_context():
+                start = time.perf_counter()
+                build(tmp_path)
+            # Renombrar es atómico: nadie descarga un PDF a medio escribir
+            os.replace(tmp_path, path)
+            print(f"Reporte generado: {os.path.basename(path)} ({time.perf_counter() - start:.1f} s)")
+            self._cleanup(name, keep=path)
+        except Exception as e:
+            print(f"Error al generar el reporte {os.path.basename(path)}: {e}")
+            raise
+        finally:
+            for leftover in (tmp_path, lock_path):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+
+    def _lock_is_active(self, path):
+        lock_path = path + '.lock'
+        try:
+            age = time.time() - os.path.getmtime(lock_path)
+        except OSError:
+            return False
+        return age < self.app.config['REPORT_LOCK_TIMEOUT']
+
+    def _cleanup(self, name, keep):
+        """Borra los reportes antiguos, dejando los REPORTS_KEEP más recientes."""
+        pattern = os.path.join(self.app.config['REPORTS_DIR'], f'{name}-*.pdf')
+        files = sorted(glob.glob(pattern), key=os.path.getmtime, reverse=True)
+        for old in files[self.app.config['REPORTS_KEEP']:]:
+            if old != keep:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
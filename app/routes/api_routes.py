@@ -0,0 +1,236 @@
+import hashlib
+import json
+import math
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import Blueprint, Response, request
+from flask_login import current_user
+from app import cache
+from app.services import product_service, sale_service, supplier_service
+from app.routes.cart import CHECKOUT_STATUS, read_cart
+
+try:
+    import orjson
+except ImportError:  # Sin orjson se usa el módulo json estándar (más lento)
+    orjson = None
+
+# Blueprint de la API JSON para apps móviles (versión 1)
+api_bp = Blueprint('api_routes', __name__)
+
+# Columnas que se pueden pedir con ?fields= en cada recurso
+PRODUCT_API_FIELDS = product_service.PRODUCT_FIELDS + ('stock_alert',)
+PRODUCT_DETAIL_FIELDS = PRODUCT_API_FIELDS + ('proveedores',)
+SUPPLIER_API_FIELDS = supplier_service.SUPPLIER_FIELDS
+STOCK_FIELDS = ('id', 'referencia', 'nombre', 'cantidad_stock', 'stock_objetivo', 'stock_alert')
+
+
+# --- Utilidades ---
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+@api_bp.errorhandler(ApiError)
+def handle_api_error(error):
+    return json_response({'error': error.message}, error.status)
+
+
+@api_bp.errorhandler(404)
+def handle_not_found(error):
+    return json_response({'error': 'Recurso no encontrado.'}, 404)
+
+
+def json_response(data, status=200):
+    """Respuesta JSON (con orjson si está instalado)."""
+    if orjson is not None:
+        body = orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        body = json.dumps(data, ensure_ascii=False, default=str, separators=(',', ':'))
+    return Response(body, status=status, mimetype='application/json')
+
+
+def api_login_required(f):
+    """Como 'login_required', pero responde 401 en JSON en vez de redirigir al login."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated:
+            raise ApiError(401, 'Hay que iniciar sesión.')
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+
+def requested_fields(allowed):
+    """
+    Columnas pedidas con ?fields=id,nombre,precio (por defecto, todas).
+    Un nombre desconocido es un error 400 (así el cliente ve la errata).
+    """
+    value = request.args.get('fields')
+    if not value:
+        return allowed
+    fields = tuple(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in allowed]
+    if unknown or not fields:
+        raise ApiError(400, f"Campos desconocidos: {', '.join(unknown) or value}. "
+                            f"Disponibles: {', '.join(allowed)}.")
+    return fields
+
+
+def select_fields(row, fields):
+    return {field: row[field] for field in fields}
+
+
+def http_last_modified():
+    """
+    Last-Modified del catálogo en segundos enteros (HTTP no admite fracciones).
+    Se redondea hacia arriba: cualquier escritura posterior da una fecha mayor.
+    Mientras no termina el segundo de la última escritura se da el segundo
+    anterior, porque otra escritura en ese mismo segundo tendría la misma fecha
+    y un cliente que solo revalida con If-Modified-Since recibiría un 304 con
+    datos viejos (así, como mucho, recibe una respuesta completa de más).
+    """
+    modified = math.ceil(cache.last_modified())
+    if time.time() < modified:
+        modified -= 1
+    return datetime.fromtimestamp(modified, timezone.utc)
+
+
+def conditional(build):
+    """
+    Respuesta GET con ETag y Last-Modified sacados de la versión del catálogo
+    (cambia con cada escritura). Si el cliente ya tiene esa versión
+    (If-None-Match / If-Modified-Since) se responde 304 sin llamar a 'build'.
+    El ETag incluye la URL completa: cada página y selección de campos tiene el suyo.
+    """
+    version = cache.version()
+    etag = hashlib.sha1(f'{version}:{request.full_path}'.encode('utf-8')).hexdigest()[:20]
+    last_modified = http_last_modified()
+
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    else:
+        since = request.if_modified_since
+        not_modified = since is not None and since >= last_modified
+
+    response = Response(status=304) if not_modified else json_response(build())
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Datos de un usuario con sesión: solo en su caché, y siempre revalidando
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+# --- Catálogo ---
+
+@api_bp.route('/productos')
+@api_login_required
+def list_products():
+    """
+    Catálogo paginado por cursor (los mismos parámetros que el listado web):
+    ?after= / ?before= / ?limit= / ?q= y ?fields=.
+    """
+    fields = requested_fields(PRODUCT_API_FIELDS)
+
+    def build():
+        page = product_service.get_products_page(after=request.args.get('after'),
+                                                 before=request.args.get('before'),
+                                                 limit=request.args.get('limit'),
+                                                 query=request.args.get('q', '').strip() or None)
+        return {
+            'items': [select_fields(product, fields) for product in page['items']],
+            'next_cursor': page['next_cursor'],
+            'prev_cursor': page['prev_cursor'],
+            'limit': page['limit'],
+            'total': page['total'],
+            'total_is_estimate': page['total_is_estimate'],
+        }
+
+    return conditional(build)
+
+
+@api_bp.route('/productos/<int:product_id>')
+@api_login_required
+def product_detail(product_id):
+    """Un producto con sus proveedores (id y nombre)."""
+    fields = requested_fields(PRODUCT_DETAIL_FIELDS)
+
+    def build():
+        product = product_service.get_product_by_id(product_id)
+        if product is None:
+            raise ApiError(404, 'Producto no encontrado.')
+        row = {field: getattr(product, field) for field in PRODUCT_API_FIELDS}
+        row['proveedores'] = [{'id': s.id, 'nombre_empresa': s.nombre_empresa}
+                              for s in product.suppliers]
+        return select_fields(row, fields)
+
+    return conditional(build)
+
+
+@api_bp.route('/proveedores')
+@api_login_required
+def list_suppliers():
+    """Todos los proveedores, ordenados por nombre (?fields=)."""
+    fields = requested_fields(SUPPLIER_API_FIELDS)
+    return conditional(lambda: {
+        'items': [select_fields(supplier, fields) for supplier in supplier_service.get_all_suppliers()]
+    })
+
+
+@api_bp.route('/stock')
+@api_login_required
+def stock_levels():
+    """
+    Niveles de stock del catálogo, paginados por cursor como /productos
+    (?after= / ?before= / ?limit=, orden por nombre). Con ?alertas=1, solo
+    los productos por debajo del umbral (sin paginar: son pocos y es la
+    misma lista cacheada que usa el dashboard).
+    """
+    fields = requested_fields(STOCK_FIELDS)
+    only_alerts = request.args.get('alertas') in ('1', 'true', 'si')
+
+    def build():
+        if only_alerts:
+            return {'items': [select_fields(product, fields) for product in product_service.get_stock_alerts()]}
+
+        page = product_service.get_products_page(after=request.args.get('after'),
+                                                 before=request.args.get('before'),
+                                                 limit=request.args.get('limit'))
+        return {
+            'items': [select_fields(product, fields) for product in page['items']],
+            'next_cursor': page['next_cursor'],
+            'prev_cursor': page['prev_cursor'],
+            'limit': page['limit'],
+        }
+
+    return conditional(build)
+
+
+# --- Pedidos ---
+
+@api_bp.route('/pedidos', methods=['POST'])
+@api_login_required
+def checkout():
+    """
+    Compra un carrito en un solo pedido:
+    {"items": [{"product_id": 1, "cantidad": 2}, ...]}
+    Responde 201 si se ha vendido; si no, 400 (carrito no válido), 404 (producto
+    inexistente), 409 (sin stock) o 500 (error interno).
+    """
+    if not request.is_json:
+        raise ApiError(415, 'El pedido debe enviarse en JSON.')
+
+    lines = read_cart()
+    if lines is None:
+        raise ApiError(400, 'El carrito contiene líneas no válidas.')
+
+    success, message, outcome = sale_service.process_cart(current_user.id, lines)
+    if success:
+        return json_response({'ok': True, 'mensaje': message}, 201)
+    return json_response({'ok': False, 'error': message}, CHECKOUT_STATUS[outcome])
+
@@ -1,14 +1,32 @@
-from flask import Blueprint, render_template, redirect, url_for, request, flash
+from flask import Blueprint, render_template, redirect, url_for, request, flash, make_response
 from flask_login import current_user, login_required
 from app.routes.auth_forms import LoginForm, RegistrationForm, EditUserForm
+from app import limiter, profiler
+from app.passwords import PasswordHasherBusy
 from app.services import auth_service
 from app.routes.product_routes import admin_required
 
 # Creamos el "Blueprint" para estas rutas de autenticación
 auth_bp = Blueprint('auth_routes', __name__)
 
+BUSY_RETRY_AFTER = 5  # Segundos que se sugiere esperar si bcrypt está saturado
+
+
+def _server_busy(limit_name, template, **context):
+    """
+    Respuesta cuando el pool de bcrypt está saturado (PasswordHasherBusy):
+    503 con el formulario y un aviso para reintentar. La contraseña no se ha
+    llegado a comprobar, así que el intento no cuenta para el límite.
+    """
+    limiter.refund(limit_name)
+    flash('El servidor está ocupado. Vuelve a intentarlo en unos segundos.', 'warning')
+    response = make_response(render_template(template, **context), 503)
+    response.headers['Retry-After'] = str(BUSY_RETRY_AFTER)
+    return response
+
 
 @auth_bp.route('/register', methods=['GET', 'POST'])
+@limiter.limit('register')  # Se rechaza antes de calcular ningún hash
 def register():
     """
     Ruta para la página de registro de usuarios.
@@ -22,10 +40,13 @@ def register():
     # Si el formulario es enviado (POST) y es válido
     if form.validate_on_submit():
         # 1. Llamar a la Capa de Servicio
-        user = auth_service.register_user(
-            username=form.username.data,
-            password=form.password.data
-        )
+        try:
+            user = auth_service.register_user(
+                username=form.username.data,
+                password=form.password.data
+            )
+        except PasswordHasherBusy:
+            return _server_busy('register', 'register.html', title='Registro', form=form)
 
         if user:
             # 2. Mostrar mensaje de éxito y redirigir
@@ -39,6 +60,7 @@ def register():
 
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
+@limiter.limit('login')  # Por IP y por nombre de usuario, antes de bcrypt
 def login():
     """
     Ruta para la página de inicio de sesión.
@@ -50,10 +72,13 @@ def login():
 
     if form.validate_on_submit():
         # 1. Llamar a la Capa de Servicio
-        user = auth_service.attempt_login(
-            username=form.username.data,
-            password=form.password.data
-        )
+        try:
+            user = auth_service.attempt_login(
+                username=form.username.data,
+                password=form.password.data
+            )
+        except PasswordHasherBusy:
+            return _server_busy('login', 'login.html', title='Iniciar Sesión', form=form)
 
         if user:
             # 2. Si el login es exitoso, redirigir (Flask-Login ya hizo su trabajo)
@@ -156,4 +181,29 @@ def edit_user(user_id):
         else:
             flash('Error al actualizar el usuario. Puede que el nombre ya exista.', 'danger')
 
-    return render_template('edit_user.html', title='Editar Usuario', form=form, user=user)
\ No newline at end of file
+    return render_template('edit_user.html', title='Editar Usuario', form=form, user=user)
+
+
+@auth_bp.route('/admin/perfil-sql')
+@login_required
+@admin_required
+def sql_profile():
+    """
+    Perfil SQL de este proceso: endpoints que más cuestan en la BD y las
+    últimas peticiones lentas, con muchas consultas o con sentencias repetidas (N+1).
+    """
+    order = request.args.get('orden', 'bd_ms')
+    if order not in ('bd_ms', 'ms', 'consultas', 'peticiones', 'marcadas'):
+        order = 'bd_ms'
+    return render_template('sql_profile.html', title='Perfil SQL', profiler=profiler, order=order,
+                           endpoints=profiler.endpoint_stats(order), slow=profiler.slow_requests())
+
+
+@auth_bp.route('/admin/perfil-sql/reiniciar', methods=['POST'])
+@login_required
+@admin_required
+def reset_sql_profile():
+    """Vacía los totales y el búfer de peticiones marcadas."""
+    profiler.reset()
+    flash('Perfil SQL reiniciado.', 'info')
+    return redirect(url_for('auth_routes.sql_profile'))
@@ -0,0 +1,39 @@
+from flask import request
+
+from app.services import sale_service
+
+# Código HTTP de cada resultado de 'sale_service.process_cart'.
+# Solo la falta de stock es un conflicto (otra compra se llevó las unidades):
+# así un cliente JSON distingue un carrito mal formado de una carrera por el stock.
+CHECKOUT_STATUS = {
+    sale_service.SALE_OK: 200,
+    sale_service.SALE_INVALID: 400,
+    sale_service.SALE_NOT_FOUND: 404,
+    sale_service.SALE_OUT_OF_STOCK: 409,
+    sale_service.SALE_ERROR: 500,
+}
+
+
+def read_cart():
+    """
+    Lee las líneas del carrito de la petición. Acepta:
+    - JSON: {"items": [{"product_id": 1, "cantidad": 2}, ...]} (o solo la lista).
+    - Formulario: campos repetidos 'product_id' y 'cantidad' (en el mismo orden).
+      Las líneas con cantidad 0 o vacía se ignoran.
+    """
+    if request.is_json:
+        data = request.get_json(silent=True)
+        items = data.get('items', []) if isinstance(data, dict) else data
+        if not isinstance(items, list):
+            return None
+        try:
+            return [(item['product_id'], item.get('cantidad', 1)) for item in items]
+        except (AttributeError, KeyError, TypeError):
+            return None
+
+    product_ids = request.form.getlist('product_id')
+    cantidades = request.form.getlist('cantidad')
+    if len(product_ids) != len(cantidades):
+        return None
+    return [(product_id, cantidad) for product_id, cantidad in zip(product_ids, cantidades)
+            if cantidad.strip() not in ('', '0')]
@@ -0,0 +1,63 @@
+from flask import Blueprint, Response, abort, request, stream_with_context
+from flask_login import login_required
+from app.services import export_service
+from app.routes.product_routes import admin_required
+
+# Blueprint para descargar los datos en CSV / NDJSON
+export_bp = Blueprint('export_routes', __name__)
+
+MIMETYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+
+def _download(rows, columns, fmt, filename):
+    """
+    Respuesta que se genera mientras se envía: las filas se leen de la BD por
+    lotes y se escriben (y comprimen, con ?gzip=1) según salen, así que la
+    memoria del worker no crece con el tamaño de la tabla.
+    """
+    if fmt not in export_service.EXPORT_FORMATS:
+        abort(404)
+
+    compress = request.args.get('gzip') in ('1', 'true', 'si')
+    filename = f'{filename}.{fmt}' + ('.gz' if compress else '')
+
+    body = export_service.render(rows, columns, fmt, compress=compress)
+    response = Response(stream_with_context(body),
+                        mimetype='application/gzip' if compress else MIMETYPES[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+@export_bp.route('/productos.<fmt>')
+@login_required
+@admin_required
+def export_products(fmt):
+    """Exporta todos los productos (con sus proveedores)."""
+    return _download(export_service.product_rows(), export_service.PRODUCT_COLUMNS, fmt, 'productos')
+
+
+@export_bp.route('/proveedores.<fmt>')
+@login_required
+@admin_required
+def export_suppliers(fmt):
+    """Exporta todos los proveedores."""
+    return _download(export_service.supplier_rows(), export_service.SUPPLIER_COLUMNS, fmt, 'proveedores')
+
+
+@export_bp.route('/ventas.<fmt>')
+@login_required
+@admin_required
+def export_sales(fmt):
+    """
+    Exporta las ventas. Filtros opcionales por fecha (AAAA-MM-DD, incluidas):
+    ?desde=2026-01-01&hasta=2026-03-31
+    """
+    desde, hasta = request.args.get('desde'), request.args.get('hasta')
+    try:
+        start, end = export_service.parse_date_range(desde, hasta)
+    except ValueError:
+        abort(400, description='Las fechas deben tener el formato AAAA-MM-DD.')
+
+    filename = 'ventas' + (f'_{desde}' if desde else '') + (f'_{hasta}' if hasta else '')
+    return _download(export_service.sale_rows(start, end), export_service.SALE_COLUMNS, fmt, filename)
@@ -1,6 +1,7 @@
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileAllowed, FileField, FileRequired
 from wtforms import StringField, TextAreaField, FloatField, IntegerField, SubmitField, SelectMultipleField
-from wtforms.validators import DataRequired, NumberRange
+from wtforms.validators import DataRequired, InputRequired, NumberRange
 
 
 
@@ -13,11 +14,23 @@ class ProductForm(FlaskForm):
     referencia = StringField('Número de Referencia')
     descripcion = TextAreaField('Descripción')
     precio = FloatField('Precio (€)', validators=[DataRequired(), NumberRange(min=0.01)])
-    cantidad_stock = IntegerField('Cantidad en Stock', validators=[DataRequired(), NumberRange(min=0)])
+    # InputRequired (y no DataRequired) para aceptar 0 unidades: un producto puede estar agotado
+    cantidad_stock = IntegerField('Cantidad en Stock', validators=[InputRequired(), NumberRange(min=0)])
     stock_objetivo = IntegerField('Stock Objetivo', validators=[DataRequired(), NumberRange(min=1)])
     ubicacion = StringField('Ubicación en Almacén')
 
     # Coerce=int asegura que los valores seleccionados se traten como números (IDs)
     suppliers = SelectMultipleField('Proveedores', coerce=int)
 
-    submit = SubmitField('Guardar Producto')
\ No newline at end of file
+    submit = SubmitField('Guardar Producto')
+
+
+class ProductImportForm(FlaskForm):
+    """
+    Formulario para importar productos desde un fichero (CSV, NDJSON o JSON).
+    """
+    fichero = FileField('Fichero de Productos', validators=[
+        FileRequired(),
+        FileAllowed(['csv', 'ndjson', 'jsonl', 'json'], 'Solo se admiten ficheros CSV, NDJSON o JSON.')
+    ])
+    submit = SubmitField('Importar')
@@ -1,20 +1,20 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from functools import wraps
-import io
-from xhtml2pdf import pisa
-from flask import make_response
-from datetime import datetime
+from flask import make_response, jsonify, send_file, abort
 
 # Importamos formularios y servicios
-from app.routes.product_forms import ProductForm
-from app.services import product_service, supplier_service
+from app.routes.product_forms import ProductForm, ProductImportForm
+from app.services import product_service, supplier_service, report_service, import_service
+from app.services import replenishment_service
 
 # Ya no importamos 'save_picture' ni 'db' porque no guardamos imágenes manuales
 
 # Creamos el Blueprint
 product_bp = Blueprint('product_routes', __name__)
 
+IMPORT_ERRORS_SHOWN = 200  # Filas con error que se listan tras una importación
+
 
 # --- DECORADOR PERSONALIZADO ---
 def admin_required(f):
@@ -35,19 +35,25 @@ def admin_required(f):
 def product_list():
     """
     Muestra la lista de productos.
-    Incluye: Búsqueda y Alertas de Stock.
+    Incluye: Búsqueda, Paginación y Alertas de Stock.
     """
-    # 1. Lógica de Búsqueda
+    # 1. Lógica de Búsqueda y Paginación (por cursor)
     search_query = request.args.get('q')
+    after = request.args.get('after')
+    before = request.args.get('before')
+
+    page = product_service.get_products_page(after=after,
+                                             before=before,
+                                             limit=request.args.get('limit'),
+                                             query=search_query)
+    products = page['items']
 
-    if search_query:
-        products = product_service.search_products(search_query)
+    # Solo avisamos en la primera página de resultados (no al pasar de página)
+    if search_query and not (after or before):
         if not products:
             flash(f'No se encontraron productos para "{search_query}"', 'warning')
         else:
             flash(f'Mostrando resultados para: "{search_query}"', 'info')
-    else:
-        products = product_service.get_all_products()
 
     # 2. Lógica de Alertas
     stock_alerts = product_service.get_stock_alerts()
@@ -55,6 +61,7 @@ def product_list():
     return render_template('product_list.html',
                            title='Inventario de Productos',
                            products=products,
+                           page=page,
                            alerts=stock_alerts,
                            current_query=search_query)
 
@@ -89,6 +96,30 @@ def create_product():
                            form_action=url_for('product_routes.create_product'))
 
 
+@product_bp.route('/importar', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def import_products():
+    """
+    Importa (crea o actualiza por referencia) productos desde un fichero.
+    Muestra un resumen y la lista de filas con errores.
+    """
+    form = ProductImportForm()
+    result = None
+
+    if form.validate_on_submit():
+        upload = form.fichero.data
+        fmt = import_service.detect_format(upload.filename)
+        result = import_service.import_products(import_service.open_text(upload.stream), fmt)
+
+        message = (f"Importación terminada: {result['creados']} creados, "
+                   f"{result['actualizados']} actualizados, {len(result['errores'])} con errores.")
+        flash(message, 'warning' if result['errores'] else 'success')
+
+    return render_template('product_import.html', title='Importar Productos',
+                           form=form, result=result, max_errors=IMPORT_ERRORS_SHOWN)
+
+
 @product_bp.route('/<int:product_id>/editar', methods=['GET', 'POST'])
 @login_required
 @admin_required
@@ -151,44 +182,91 @@ def delete_product(product_id):
 @admin_required
 def dashboard():
     """
-    Panel de Estadísticas (Gráficas).
+    Panel de Estadísticas (Gráficas) y propuesta de reposición.
+    Con ?recalcular=1 se vuelve a calcular la propuesta (normalmente se reutiliza unos minutos).
     """
     stats = product_service.get_inventory_statistics()
+    plan = replenishment_service.get_replenishment_plan(refresh=request.args.get('recalcular') == '1')
 
     return render_template('dashboard.html',
                            title='Dashboard Administrativo',
-                           names=stats['names'],
-                           current_stock=stats['current_stock'],
-                           target_stock=stats['target_stock'])
+                           totals=stats['totals'],
+                           bands=stats['bands'],
+                           critical=stats['critical'],
+                           names=[p.nombre for p in stats['critical']],
+                           current_stock=[p.cantidad_stock for p in stats['critical']],
+                           target_stock=[p.stock_objetivo for p in stats['critical']],
+                           plan=plan)
 
 
 @product_bp.route('/reporte_pdf')
 @login_required
 def generate_pdf():
     """
-    Genera un PDF con el listado actual de productos.
+    Descarga el PDF con el listado de productos.
+    Acepta los mismos parámetros de página que el listado (after, before, limit, q):
+    con ellos se genera solo esa página, al momento. Sin ellos se pide el
+    inventario completo, que se genera en segundo plano y se guarda en disco
+    hasta que cambie el catálogo.
     """
-    # 1. Obtener datos
-    products = product_service.get_all_products()
-    fecha = datetime.now().strftime("%d/%m/%Y %H:%M")
-
-    # 2. Renderizar la plantilla HTML a un string
-    rendered_html = render_template('report_pdf.html', products=products, fecha_actual=fecha)
-
-    # 3. Crear el PDF usando xhtml2pdf
-    pdf_output = io.BytesIO()
-    pisa_status = pisa.CreatePDF(io.BytesIO(rendered_html.encode('utf-8')), dest=pdf_output)
-
-    # 4. Verificar errores
-    if pisa_status.err:
+    if not any(request.args.get(arg) for arg in ('after', 'before', 'limit', 'q')):
+        key, status = report_service.request_inventory_report()
+        if status == 'ready':
+            return redirect(url_for('product_routes.download_report', key=key))
+        return redirect(url_for('product_routes.report_status', key=key))
+
+    # 1. Obtener datos (solo la página pedida)
+    page = product_service.get_products_page(after=request.args.get('after'),
+                                             before=request.args.get('before'),
+                                             limit=request.args.get('limit'),
+                                             query=request.args.get('q'))
+
+    # 2. Renderizar la plantilla y convertirla a PDF
+    try:
+        pdf = report_service.render_inventory_pdf(page['items'], page=page)
+    except RuntimeError:
         flash('Hubo un error al generar el PDF', 'danger')
         return redirect(url_for('product_routes.product_list'))
 
-    # 5. Preparar la respuesta para descargar
-    pdf_output.seek(0)
-    response = make_response(pdf_output.read())
+    # 3. Preparar la respuesta para descargar
+    response = make_response(pdf)
     response.headers['Content-Type'] = 'application/pdf'
     # 'attachment' hace que se descargue. 'inline' haría que se abra en el navegador.
     response.headers['Content-Disposition'] = 'attachment; filename=inventario.pdf'
 
-    return response
\ No newline at end of file
+    return response
+
+
+@product_bp.route('/reporte_pdf/estado/<key>')
+@login_required
+def report_status(key):
+    """
+    Estado del reporte de inventario que se está generando.
+    Devuelve JSON si se pide (para consultarlo desde JS); si no, una página
+    que se recarga sola hasta que el PDF está listo.
+    """
+    status, _ = report_service.get_inventory_report(key)
+
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({
+            'estado': status,
+            'descarga': url_for('product_routes.download_report', key=key) if status == 'ready' else None,
+        })
+
+    return render_template('report_status.html', title='Reporte de Inventario', key=key, status=status)
+
+
+@product_bp.route('/reporte_pdf/descargar/<key>')
+@login_required
+def download_report(key):
+    """
+    Descarga un reporte ya generado. Admite peticiones condicionales
+    (If-None-Match / If-Modified-Since), que responden 304 sin reenviar el PDF.
+    """
+    status, path = report_service.get_inventory_report(key)
+    if status != 'ready':
+        abort(404)
+
+    return send_file(path, mimetype='application/pdf', as_attachment=True,
+                     download_name='inventario.pdf', etag=f'inventario-{key}',
+                     conditional=True, max_age=0)
@@ -0,0 +1,25 @@
+from flask_wtf import FlaskForm
+from wtforms import SelectField, TextAreaField, SubmitField
+from wtforms.validators import DataRequired
+
+
+class PurchaseOrderForm(FlaskForm):
+    """
+    Formulario para crear un pedido de compra a un proveedor.
+    Las líneas se escriben (o se pegan) una por producto: "referencia, cantidad".
+    """
+    supplier_id = SelectField('Proveedor', coerce=int, validators=[DataRequired()])
+
+    lineas = TextAreaField('Líneas (referencia, cantidad)', validators=[DataRequired()])
+
+    notas = TextAreaField('Notas')
+
+    submit = SubmitField('Crear Pedido')
+
+
+class ReceiveOrderForm(FlaskForm):
+    """
+    Recepción de un pedido. Las cantidades recibidas llegan como campos
+    repetidos 'line_id' y 'recibido' (uno por línea de la tabla).
+    """
+    submit = SubmitField('Recibir Pedido')
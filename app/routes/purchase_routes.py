@@ -0,0 +1,136 @@
+from flask import Blueprint, render_template, redirect, request, url_for, flash
+from flask_login import current_user, login_required
+from app.models.purchase_order_model import ORDER_CANCELLED, ORDER_OPEN, ORDER_RECEIVED
+from app.routes.purchase_forms import PurchaseOrderForm, ReceiveOrderForm
+from app.services import purchase_service, supplier_service
+from app.routes.product_routes import admin_required
+
+# Creamos el Blueprint para los pedidos de compra a proveedores
+purchase_bp = Blueprint('purchase_routes', __name__)
+
+ORDER_STATES = (ORDER_OPEN, ORDER_RECEIVED, ORDER_CANCELLED)
+
+
+def _read_received():
+    """
+    Lee las cantidades recibidas del formulario: campos repetidos 'line_id'
+    y 'recibido' (en el mismo orden). Devuelve {line_id: cantidad} o None si
+    no cuadran.
+    """
+    line_ids = request.form.getlist('line_id')
+    cantidades = request.form.getlist('recibido')
+    if len(line_ids) != len(cantidades):
+        return None
+    return {line_id: cantidad.strip() or 0 for line_id, cantidad in zip(line_ids, cantidades)}
+
+
+@purchase_bp.route('/')
+@login_required
+@admin_required
+def order_list():
+    """
+    Ruta para LEER (Read) - Lista de pedidos de compra (?estado=abierto|recibido|cancelado).
+    """
+    estado = request.args.get('estado')
+    if estado not in ORDER_STATES:
+        estado = None
+    orders = purchase_service.get_purchase_orders(estado)
+    return render_template('purchase_order_list.html',
+                           title='Pedidos a Proveedores',
+                           orders=orders,
+                           estado=estado,
+                           states=ORDER_STATES)
+
+
+@purchase_bp.route('/nuevo', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def create_order():
+    """
+    Ruta para CREAR (Create) - Pedido con las líneas escritas o pegadas en el formulario.
+    """
+    form = PurchaseOrderForm()
+    form.supplier_id.choices = [(s.id, s.nombre_empresa) for s in supplier_service.get_all_suppliers()]
+
+    if form.validate_on_submit():
+        try:
+            lines = purchase_service.parse_order_lines(form.lineas.data)
+        except ValueError as e:
+            form.lineas.errors.append(str(e))
+        else:
+            order, message = purchase_service.create_purchase_order(
+                form.supplier_id.data, lines, current_user.id, form.notas.data)
+            if order:
+                flash(message, 'success')
+                return redirect(url_for('purchase_routes.order_detail', order_id=order.id))
+            flash(message, 'danger')
+
+    return render_template('purchase_order_form.html',
+                           title='Nuevo Pedido a Proveedor',
+                           form=form)
+
+
+@purchase_bp.route('/desde-propuesta/<int:supplier_id>', methods=['POST'])
+@login_required
+@admin_required
+def create_from_plan(supplier_id):
+    """
+    Crea el pedido que sugiere la propuesta de reposición del dashboard para un proveedor.
+    """
+    order, message = purchase_service.create_order_from_plan(supplier_id, current_user.id)
+    if not order:
+        flash(message, 'danger')
+        return redirect(url_for('product_routes.dashboard'))
+
+    flash(message, 'success')
+    return redirect(url_for('purchase_routes.order_detail', order_id=order.id))
+
+
+@purchase_bp.route('/<int:order_id>')
+@login_required
+@admin_required
+def order_detail(order_id):
+    """
+    Detalle de un pedido. Si está abierto, la tabla es también el formulario de recepción.
+    """
+    order = purchase_service.get_purchase_order(order_id)
+    if not order:
+        flash('Pedido no encontrado.', 'danger')
+        return redirect(url_for('purchase_routes.order_list'))
+
+    return render_template('purchase_order_detail.html',
+                           title=f'Pedido #{order.id}',
+                           order=order,
+                           form=ReceiveOrderForm(),
+                           open_state=ORDER_OPEN)
+
+
+@purchase_bp.route('/<int:order_id>/recibir', methods=['POST'])
+@login_required
+@admin_required
+def receive_order(order_id):
+    """
+    Recibe el pedido completo con un solo envío del formulario (una transacción).
+    """
+    form = ReceiveOrderForm()
+    received = _read_received()
+
+    if not form.validate_on_submit() or received is None:
+        flash('El formulario de recepción no es válido.', 'danger')
+    else:
+        success, message = purchase_service.receive_purchase_order(order_id, received, current_user.id)
+        flash(message, 'success' if success else 'danger')
+
+    return redirect(url_for('purchase_routes.order_detail', order_id=order_id))
+
+
+@purchase_bp.route('/<int:order_id>/cancelar', methods=['POST'])
+@login_required
+@admin_required
+def cancel_order(order_id):
+    """
+    Cancela un pedido abierto.
+    """
+    success, message = purchase_service.cancel_purchase_order(order_id)
+    flash(message, 'success' if success else 'danger')
+    return redirect(url_for('purchase_routes.order_detail', order_id=order_id))
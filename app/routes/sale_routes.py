@@ -1,6 +1,7 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from app.services import sale_service, product_service
+from app.routes.cart import CHECKOUT_STATUS, read_cart
 
 sale_bp = Blueprint('sale_routes', __name__)
 
@@ -22,7 +23,7 @@ def buy_product(product_id):
         return redirect(url_for('product_routes.product_list'))
 
     # Llamamos al servicio
-    success, message = sale_service.process_sale(current_user.id, product_id, cantidad)
+    success, message, _ = sale_service.process_sale(current_user.id, product_id, cantidad)
 
     if success:
         flash(message, 'success')
@@ -32,11 +33,40 @@ def buy_product(product_id):
     return redirect(url_for('product_routes.product_list'))
 
 
+@sale_bp.route('/carrito', methods=['POST'])
+@login_required
+def checkout_cart():
+    """
+    Ruta para comprar varios productos a la vez (un solo pedido y un solo commit).
+    Si la petición llega en JSON se responde en JSON (400 carrito no válido,
+    404 producto inexistente, 409 sin stock, 500 error); si no, se redirige al listado.
+    """
+    lines = read_cart()
+
+    if lines is None:
+        success, message, status = False, 'El carrito contiene líneas no válidas.', 400
+    else:
+        success, message, outcome = sale_service.process_cart(current_user.id, lines)
+        status = CHECKOUT_STATUS[outcome]
+
+    if request.is_json:
+        return jsonify({'ok': success, 'mensaje': message}), status
+
+    flash(message, 'success' if success else 'danger')
+    return redirect(url_for('product_routes.product_list'))
+
+
 @sale_bp.route('/mis-compras')
 @login_required
 def my_sales():
     """
-    Muestra el historial de compras del usuario.
+    Muestra el historial de compras del usuario, paginado por cursor
+    (parámetros 'after' / 'before' / 'limit'), con un resumen de todas sus compras.
     """
-    sales = sale_service.get_sales_by_user(current_user.id)
-    return render_template('my_sales.html', title='Mis Compras', sales=sales)
\ No newline at end of file
+    page = sale_service.get_user_sales_page(current_user.id,
+                                            after=request.args.get('after'),
+                                            before=request.args.get('before'),
+                                            limit=request.args.get('limit'))
+    summary = sale_service.get_user_sales_summary(current_user.id)
+    return render_template('my_sales.html', title='Mis Compras',
+                           sales=page['items'], page=page, summary=summary)
@@ -0,0 +1,125 @@
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import or_, update
+
+from app import db
+from app.metrics import count_stock_alert
+from app.models.product_model import ALERT_ARMED, ALERT_NOTIFIED, ALERT_PENDING, Product
+from app.utils import send_stock_alert, send_stock_digest
+
+# Máquina de estados de la alerta de stock de cada producto:
+#
+#   armada ──(venta que deja el stock bajo el umbral)──> notificada  (correo al momento)
+#                                                    └─> pendiente   (con STOCK_ALERT_DIGEST)
+#   pendiente ──(resumen periódico: flask send-stock-digest)──> notificada
+#   notificada ──(correo que no se pudo encolar)──> armada / pendiente (si venía del resumen)
+#   pendiente / notificada ──(stock > STOCK_ALERT_REARM_PERCENT % del objetivo)──> armada
+#
+# La banda entre el umbral (10%) y el rearme evita que un producto que oscila
+# alrededor del umbral mande un correo en cada venta. Los cambios de estado son
+# UPDATE condicionales: si dos workers venden a la vez, solo uno avisa.
+
+
+def _rearm_condition():
+    percent = current_app.config['STOCK_ALERT_REARM_PERCENT']
+    return or_(Product.stock_objetivo <= 0,
+               Product.cantidad_stock * 100 > Product.stock_objetivo * percent)
+
+
+def claim_alerts(product_ids):
+    """
+    Marca como avisados los productos de la lista que estaban armados y han
+    quedado bajo el umbral. Se llama dentro de la transacción de la venta
+    (no hace commit). Devuelve los ids a los que hay que mandar el correo
+    ahora (ninguno si las alertas van en el resumen periódico).
+    """
+    digest = current_app.config['STOCK_ALERT_DIGEST']
+    claimed = db.session.execute(
+        update(Product)
+        .where(Product.id.in_(product_ids), Product.alerta_estado == ALERT_ARMED, Product.stock_alert)
+        .values(alerta_estado=ALERT_PENDING if digest else ALERT_NOTIFIED, alerta_fecha=datetime.utcnow())
+        .returning(Product.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+
+    if len(claimed) < len(product_ids):
+        count_stock_alert('suprimida', len(product_ids) - len(claimed))
+    return [] if digest else claimed
+
+
+def notify(products):
+    """
+    Encola el correo de cada producto recién avisado (ya con el commit hecho).
+    Los que no se han podido encolar se vuelven a armar: avisará la próxima venta.
+    """
+    failed = [product.id for product in products if not send_stock_alert(product)]
+    if failed:
+        release_alerts(failed)
+
+
+def release_alerts(product_ids, state=ALERT_ARMED):
+    """
+    Devuelve a 'state' (armada, o pendiente si venían del resumen) las
+    alertas cuyo correo no ha salido. Devuelve cuántas.
+    """
+    try:
+        count = db.session.execute(
+            update(Product)
+            .where(Product.id.in_(product_ids), Product.alerta_estado == ALERT_NOTIFIED)
+            .values(alerta_estado=state)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        return count
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al liberar alertas: {e}")
+        return 0
+
+
+def rearm_alerts(product_ids=None):
+    """
+    Vuelve a armar las alertas de los productos repuestos por encima de la
+    banda de rearme (todos, o solo los de 'product_ids'). Se llama dentro de
+    la transacción que cambia el stock (no hace commit). Devuelve cuántas.
+    """
+    statement = update(Product).where(Product.alerta_estado != ALERT_ARMED, _rearm_condition())
+    if product_ids is not None:
+        statement = statement.where(Product.id.in_(product_ids))
+    return db.session.execute(
+        statement.values(alerta_estado=ALERT_ARMED, alerta_fecha=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def send_alert_digest():
+    """
+    Marca como avisados todos los productos pendientes (con commit) y después
+    encola un único correo con ellos. Si el correo no se puede encolar,
+    vuelven a pendientes para el próximo resumen. Devuelve el número de
+    productos incluidos.
+    """
+    try:
+        rows = db.session.execute(
+            update(Product)
+            .where(Product.alerta_estado == ALERT_PENDING)
+            .values(alerta_estado=ALERT_NOTIFIED)
+            .returning(Product.id, Product.nombre, Product.referencia, Product.cantidad_stock,
+                       Product.stock_objetivo, Product.alerta_fecha)
+            .execution_options(synchronize_session=False)
+        ).all()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al enviar el resumen de alertas: {e}")
+        return 0
+
+    if not rows:
+        return 0
+    # Se encola después del commit: el correo nunca sale para un cambio de
+    # estado que luego se deshace (igual que notify con los avisos al momento)
+    if not send_stock_digest(sorted(rows, key=lambda row: row.nombre)):
+        release_alerts([row.id for row in rows], ALERT_PENDING)
+        return 0
+    return len(rows)
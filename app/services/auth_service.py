@@ -1,12 +1,14 @@
-from app import db, bcrypt
-from app.models.user_model import User
-from flask_login import login_user, logout_user
+from app import db, passwords
+from app.passwords import PasswordHasherBusy
+from app.models.user_model import User, forget_user
+from flask_login import current_user, login_user, logout_user
 
 
 def register_user(username, password):
     """
     Lógica de negocio para registrar un nuevo usuario.
     Hashea la contraseña y guarda el usuario en la BD.
+    Lanza PasswordHasherBusy si el pool de bcrypt está saturado.
     """
     try:
         # El hasheo de la contraseña se hace automáticamente
@@ -20,15 +22,36 @@ def register_user(username, password):
         db.session.add(new_user)
         db.session.commit()
         return new_user
+    except PasswordHasherBusy:
+        db.session.rollback()
+        raise  # No es un error del registro: la ruta pide que se reintente
     except Exception as e:
         db.session.rollback()  # Deshacer cambios si algo falla
         print(f"Error al registrar usuario: {e}")  # Mejor usar logging en producción
         return None
 
 
+def _rehash_if_needed(user, password):
+    """
+    Actualiza el hash de la contraseña al coste actual (BCRYPT_LOG_ROUNDS).
+    Si falla no impide el login: se intentará de nuevo la próxima vez.
+    """
+    if not passwords.needs_rehash(user.password_hash):
+        return
+    try:
+        user.password = password
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al actualizar el hash de la contraseña: {e}")
+
+
 def attempt_login(username, password):
     """
     Lógica de negocio para intentar un inicio de sesión.
+    Devuelve el usuario, o None si las credenciales no son válidas.
+    Lanza PasswordHasherBusy si el pool de bcrypt está saturado (no se ha
+    podido comprobar la contraseña: no significa que sea incorrecta).
     """
     try:
         # 1. Encontrar al usuario
@@ -36,12 +59,18 @@ def attempt_login(username, password):
 
         # 2. Verificar si el usuario existe Y si la contraseña es correcta
         if user and user.check_password(password):
+            # Si el hash se hizo con un coste antiguo (menor), lo rehacemos ahora
+            # que tenemos la contraseña en claro
+            _rehash_if_needed(user, password)
+
             # 3. Registrar la sesión del usuario
             login_user(user)  # 'remember' se puede añadir aquí si se desea
             return user
 
         # Si el usuario no existe o la contraseña es incorrecta
         return None
+    except PasswordHasherBusy:
+        raise
     except Exception as e:
         print(f"Error al intentar login: {e}")
         return None
@@ -51,6 +80,8 @@ def logout_current_user():
     """
     Lógica de negocio para cerrar la sesión.
     """
+    if current_user.is_authenticated:
+        forget_user(current_user.id)
     logout_user()
 
 def get_all_users():
@@ -72,6 +103,7 @@ def change_user_role(user_id, new_role):
         if user:
             user.role = new_role
             db.session.commit()
+            forget_user(user.id)  # El nuevo rol se aplica en su próxima petición
             return True
         return False
     except Exception as e:
@@ -95,6 +127,7 @@ def update_user_details(user_id, new_username, new_role):
             user.username = new_username
             user.role = new_role
             db.session.commit()
+            forget_user(user.id)  # El nuevo rol se aplica en su próxima petición
             return True
         return False
     except Exception as e:
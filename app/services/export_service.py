@@ -0,0 +1,145 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app import db
+from app.models.product_model import Product, product_supplier_association
+from app.models.sale_model import Sale
+from app.models.supplier_model import Supplier
+from app.models.user_model import User
+
+EXPORT_BATCH_SIZE = 2000  # Filas que se leen de la BD de cada vez
+EXPORT_CHUNK_BYTES = 64 * 1024  # Tamaño aproximado de cada trozo enviado al cliente
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+# Mismas columnas (y 'proveedores' separados por '|') que acepta la importación
+PRODUCT_COLUMNS = ('id', 'nombre', 'referencia', 'descripcion', 'precio', 'cantidad_stock',
+                   'stock_objetivo', 'ubicacion', 'proveedores')
+SUPPLIER_COLUMNS = ('id', 'nombre_empresa', 'cif', 'telefono', 'direccion',
+                    'facturacion_info', 'descuento_porcentaje', 'iva')
+SALE_COLUMNS = ('id', 'fecha', 'user_id', 'username', 'product_id', 'referencia',
+                'producto', 'cantidad', 'precio_unitario', 'total')
+
+
+def _join_names(column):
+    """Agrega varios textos en uno ('HP|Dell') según el motor de BD."""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return func.string_agg(column, '|')
+    return func.group_concat(column, '|')
+
+
+def _stream(stmt):
+    """
+    Ejecuta 'stmt' leyendo las filas por lotes (yield_per): en PostgreSQL usa
+    un cursor del servidor y en SQLite el cursor ya es perezoso. Nunca se
+    cargan todas las filas a la vez ni se crean objetos del ORM.
+    """
+    result = db.session.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    for row in result:
+        yield row._mapping
+
+
+def product_rows():
+    """Productos con sus proveedores (una consulta, agregada en la BD)."""
+    names = (select(product_supplier_association.c.product_id,
+                    _join_names(Supplier.nombre_empresa).label('proveedores'))
+             .join(Supplier, Supplier.id == product_supplier_association.c.supplier_id)
+             .group_by(product_supplier_association.c.product_id)
+             .subquery())
+
+    stmt = (select(*[getattr(Product, name) for name in PRODUCT_COLUMNS[:-1]], names.c.proveedores)
+            .outerjoin(names, names.c.product_id == Product.id)
+            .order_by(Product.id))
+    return _stream(stmt)
+
+
+def supplier_rows():
+    stmt = select(*[getattr(Supplier, name) for name in SUPPLIER_COLUMNS]).order_by(Supplier.id)
+    return _stream(stmt)
+
+
+def parse_date_range(desde, hasta):
+    """
+    Convierte 'desde' / 'hasta' (texto AAAA-MM-DD, ambos incluidos) en fechas.
+    Lanza ValueError si alguno no es válido.
+    """
+    start = datetime.strptime(desde, '%Y-%m-%d') if desde else None
+    # 'hasta' incluye todo ese día: filtramos por fecha < día siguiente
+    end = datetime.strptime(hasta, '%Y-%m-%d') + timedelta(days=1) if hasta else None
+    return start, end
+
+
+def sale_rows(start=None, end=None):
+    """Ventas (con usuario y producto) entre 'start' (incluido) y 'end' (excluido)."""
+    stmt = (select(Sale.id, Sale.fecha, Sale.user_id, User.username, Sale.product_id,
+                   Product.referencia, Product.nombre.label('producto'), Sale.cantidad,
+                   Sale.precio_unitario, Sale.total.label('total'))
+            .join(User, User.id == Sale.user_id)
+            .join(Product, Product.id == Sale.product_id)
+            .order_by(Sale.fecha, Sale.id))
+    if start:
+        stmt = stmt.where(Sale.fecha >= start)
+    if end:
+        stmt = stmt.where(Sale.fecha < end)
+    return _stream(stmt)
+
+
+# --- FORMATOS DE SALIDA (generadores de bytes) ---
+
+def _chunked(lines):
+    """Junta líneas pequeñas en trozos de ~EXPORT_CHUNK_BYTES antes de enviarlas."""
+    buffer, size = [], 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield ''.join(buffer).encode('utf-8')
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def _csv_lines(rows, columns):
+    output = io.StringIO()
+    writer = csv.writer(output)
+
+    def line(values):
+        writer.writerow(values)
+        text = output.getvalue()
+        output.seek(0)
+        output.truncate()
+        return text
+
+    yield '\ufeff' + line(columns)  # BOM: Excel abre el fichero como UTF-8
+    for row in rows:
+        yield line([row[column] for column in columns])
+
+
+def _ndjson_lines(rows, columns):
+    for row in rows:
+        yield json.dumps({column: row[column] for column in columns},
+                         default=str, ensure_ascii=False) + '\n'
+
+
+def _gzip(chunks):
+    """Comprime en gzip sobre la marcha, trozo a trozo."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31 = cabecera gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def render(rows, columns, fmt, compress=False):
+    """
+    Devuelve un generador de bytes con las filas en 'csv' o 'ndjson',
+    comprimido en gzip si 'compress'. Nada se acumula en memoria.
+    """
+    lines = _csv_lines(rows, columns) if fmt == 'csv' else _ndjson_lines(rows, columns)
+    chunks = _chunked(lines)
+    return _gzip(chunks) if compress else chunks
@@ -0,0 +1,325 @@
+import csv
+import io
+import itertools
+import json
+import os
+import re
+
+from sqlalchemy import delete, insert, select, update
+from werkzeug.datastructures import MultiDict
+
+from app import db, cache
+from app.models.product_model import Product, product_supplier_association
+from app.models.supplier_model import Supplier
+from app.services import alert_service
+from app.routes.product_forms import ProductForm
+
+IMPORT_BATCH_SIZE = 1000  # Filas por lote (un executemany y un commit por lote)
+
+# Columnas del producto que se importan (las mismas que el formulario)
+IMPORT_FIELDS = ('nombre', 'referencia', 'descripcion', 'precio',
+                 'cantidad_stock', 'stock_objetivo', 'ubicacion')
+
+# Separadores admitidos en la columna 'proveedores' de un CSV: "HP|Dell" o "HP;Dell"
+SUPPLIER_SEPARATORS = re.compile(r'[|;]')
+
+
+# --- LECTURA DEL FICHERO (sin cargarlo entero en memoria) ---
+
+def detect_format(filename):
+    """Deduce el formato por la extensión: csv, ndjson (.ndjson/.jsonl) o json."""
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.ndjson', '.jsonl'):
+        return 'ndjson'
+    if extension == '.json':
+        return 'json'
+    return None
+
+
+def _iter_csv(stream):
+    # Excel en español guarda con ';': lo detectamos por la cabecera
+    header = stream.readline()
+    delimiter = ';' if header.count(';') > header.count(',') else ','
+    reader = csv.DictReader(itertools.chain([header], stream), delimiter=delimiter)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _iter_ndjson(stream):
+    for line_number, line in enumerate(stream, start=1):
+        if line.strip():
+            yield line_number, line
+
+
+def _iter_json_array(stream, chunk_size=64 * 1024):
+    """
+    Recorre un array JSON ('[{...}, {...}]') objeto a objeto, leyendo el
+    fichero por trozos: nunca se tiene el array completo en memoria.
+    """
+    decoder = json.JSONDecoder()
+    buffer = stream.read(chunk_size).lstrip()
+    if not buffer.startswith('['):
+        raise ValueError('El fichero JSON debe contener una lista de productos.')
+    buffer = buffer[1:]
+    position = 0
+
+    for number in itertools.count(1):
+        # Saltamos espacios y comas hasta el siguiente objeto
+        while True:
+            buffer = buffer.lstrip().lstrip(',').lstrip()
+            if buffer.startswith(']'):
+                return
+            if buffer:
+                break
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                raise ValueError('El fichero JSON está incompleto.')
+            buffer += chunk
+
+        while True:
+            try:
+                value, position = decoder.raw_decode(buffer)
+                break
+            except json.JSONDecodeError:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    raise ValueError(f'El elemento {number} no es JSON válido.')
+                buffer += chunk
+
+        yield number, value
+        buffer = buffer[position:]
+
+
+def iter_rows(stream, fmt):
+    """
+    Devuelve pares (número_de_fila, datos) leyendo 'stream' (texto) poco a poco.
+    'datos' es un diccionario, o el texto original si la fila no se pudo leer.
+    """
+    if fmt == 'csv':
+        yield from _iter_csv(stream)
+    elif fmt == 'ndjson':
+        for number, line in _iter_ndjson(stream):
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                yield number, line
+    elif fmt == 'json':
+        yield from _iter_json_array(stream)
+    else:
+        raise ValueError(f'Formato no soportado: {fmt}')
+
+
+# --- VALIDACIÓN (mismas reglas que ProductForm) ---
+
+def _supplier_lookup():
+    """
+    Diccionario para encontrar proveedores por id, CIF o nombre de empresa
+    (sin distinguir mayúsculas). Una sola consulta para todo el fichero.
+    """
+    lookup = {}
+    for supplier_id, nombre, cif in db.session.execute(
+            select(Supplier.id, Supplier.nombre_empresa, Supplier.cif)):
+        lookup[str(supplier_id)] = supplier_id
+        lookup[nombre.strip().lower()] = supplier_id
+        if cif:
+            lookup[cif.strip().lower()] = supplier_id
+    return lookup
+
+
+def _to_formdata(row):
+    """Pasa una fila del fichero a los campos del formulario (todo como texto)."""
+    data = MultiDict()
+    for field in IMPORT_FIELDS:
+        value = row.get(field)
+        if value is None:
+            continue
+        value = str(value).strip()
+        # Precios con coma decimal ("12,50"), habituales en CSV en español
+        if field == 'precio' and re.fullmatch(r'\d+,\d+', value):
+            value = value.replace(',', '.')
+        data[field] = value
+    return data
+
+
+def _parse_suppliers(value, lookup):
+    """Devuelve (ids, desconocidos) a partir de una lista o un texto 'A|B'."""
+    if value is None or value == '':
+        return None, []
+    names = value if isinstance(value, list) else SUPPLIER_SEPARATORS.split(str(value))
+    ids, unknown = [], []
+    for name in names:
+        key = str(name).strip().lower()
+        if not key:
+            continue
+        if key in lookup:
+            ids.append(lookup[key])
+        else:
+            unknown.append(str(name).strip())
+    return sorted(set(ids)), unknown
+
+
+def _import_form():
+    """
+    Un ProductForm sin CSRF para validar filas. Se crea una vez por
+    importación y se reutiliza (crear un formulario por fila es lo más lento).
+    """
+    form = ProductForm(formdata=None, meta={'csrf': False})
+    form.suppliers.choices = []  # Los proveedores se validan aparte (por nombre o CIF)
+    return form
+
+
+def validate_row(row, suppliers, form=None):
+    """
+    Valida una fila con ProductForm. Devuelve (datos_limpios, None) o
+    (None, mensaje_de_error). La referencia es obligatoria: es la clave para
+    decidir si el producto se crea o se actualiza.
+    """
+    if not isinstance(row, dict):
+        return None, 'La fila no se puede leer.'
+
+    form = form or _import_form()
+    form.process(formdata=_to_formdata(row))
+    errors = [] if form.validate() else [
+        f"{field}: {', '.join(messages)}" for field, messages in form.errors.items()
+    ]
+
+    referencia = (form.referencia.data or '').strip()
+    if not referencia:
+        errors.append('referencia: es obligatoria para importar')
+
+    supplier_ids, unknown = _parse_suppliers(row.get('proveedores'), suppliers)
+    if unknown:
+        errors.append(f"proveedores: no existen ({', '.join(unknown)})")
+
+    if errors:
+        return None, '; '.join(errors)
+
+    clean = {field: form[field].data for field in IMPORT_FIELDS}
+    clean['referencia'] = referencia
+    return (clean, supplier_ids), None
+
+
+# --- ESCRITURA POR LOTES ---
+
+def _write_batch(batch):
+    """
+    Guarda un lote de filas válidas: un INSERT múltiple para las nuevas, un
+    UPDATE múltiple (por id) para las que ya existían y los enlaces con
+    proveedores en bloque. Devuelve (creados, actualizados).
+    """
+    # Si una referencia se repite en el lote, gana la última fila
+    rows = {clean['referencia']: (clean, supplier_ids) for clean, supplier_ids in batch}
+
+    existing = dict(db.session.execute(
+        select(Product.referencia, Product.id).where(Product.referencia.in_(list(rows)))
+    ).all())
+
+    new_rows = [clean for referencia, (clean, _) in rows.items() if referencia not in existing]
+    changed_rows = [dict(clean, id=existing[referencia])
+                    for referencia, (clean, _) in rows.items() if referencia in existing]
+
+    if new_rows:
+        db.session.execute(insert(Product), new_rows)
+    if changed_rows:
+        db.session.execute(update(Product), changed_rows)
+        alert_service.rearm_alerts([row['id'] for row in changed_rows])
+
+    # Enlaces con proveedores: las filas que traen proveedores sustituyen los que había
+    linked = {referencia: supplier_ids for referencia, (_, supplier_ids) in rows.items()
+              if supplier_ids is not None}
+    if linked:
+        ids = dict(db.session.execute(
+            select(Product.referencia, Product.id).where(Product.referencia.in_(list(linked)))
+        ).all())
+        db.session.execute(delete(product_supplier_association).where(
+            product_supplier_association.c.product_id.in_(list(ids.values()))))
+        links = [{'product_id': ids[referencia], 'supplier_id': supplier_id}
+                 for referencia, supplier_ids in linked.items() for supplier_id in supplier_ids]
+        if links:
+            db.session.execute(insert(product_supplier_association), links)
+
+    db.session.commit()
+    return len(new_rows), len(changed_rows)
+
+
+def import_products(stream, fmt, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Importa productos desde un fichero CSV, NDJSON o JSON (array), en streaming.
+
+    - Cada fila se valida con las reglas de ProductForm.
+    - Se crea o actualiza por 'referencia' (obligatoria).
+    - Columna opcional 'proveedores': nombres, CIF o ids ("HP|Dell" en CSV,
+      una lista en JSON). Si viene, sustituye los proveedores del producto.
+    - Las filas válidas se guardan por lotes (un commit por lote); las
+      erróneas se anotan y no detienen la importación. Si la base de datos
+      rechaza un lote, se reintenta en trozos más pequeños y solo se anotan
+      las filas que fallan.
+
+    Devuelve un diccionario con 'filas', 'creados', 'actualizados' y
+    'errores' (lista de {'fila', 'referencia', 'error'}).
+    """
+    result = {'filas': 0, 'creados': 0, 'actualizados': 0, 'errores': []}
+    suppliers = _supplier_lookup()
+    form = _import_form()
+    batch = []  # Pares (número_de_fila, datos_válidos) pendientes de guardar
+
+    def save(rows):
+        # Si el lote falla, lo partimos en dos y reintentamos cada mitad: así
+        # solo se anotan como erróneas las filas que la base de datos rechaza
+        try:
+            created, updated = _write_batch([valid for _, valid in rows])
+            result['creados'] += created
+            result['actualizados'] += updated
+        except Exception as e:
+            db.session.rollback()
+            if len(rows) > 1:
+                middle = len(rows) // 2
+                save(rows[:middle])
+                save(rows[middle:])
+                return
+            number, (clean, _) = rows[0]
+            print(f"Error al importar la fila {number} ({clean['referencia']}): {e}")
+            result['errores'].append({'fila': number, 'referencia': clean['referencia'],
+                                      'error': 'No se pudo guardar en la base de datos.'})
+
+    def flush():
+        save(list(batch))
+        batch.clear()
+
+    try:
+        for number, row in iter_rows(stream, fmt):
+            result['filas'] += 1
+            valid, error = validate_row(row, suppliers, form)
+            if error:
+                referencia = row.get('referencia') if isinstance(row, dict) else None
+                result['errores'].append({'fila': number, 'referencia': referencia, 'error': error})
+                continue
+
+            batch.append((number, valid))
+            if len(batch) >= batch_size:
+                flush()
+    except (ValueError, csv.Error, UnicodeDecodeError) as e:
+        # El fichero está mal formado a partir de aquí: guardamos lo leído y paramos
+        result['errores'].append({'fila': result['filas'] + 1, 'referencia': None, 'error': str(e)})
+
+    if batch:
+        flush()
+
+    if result['creados'] or result['actualizados']:
+        cache.bump()  # El catálogo ha cambiado
+
+    return result
+
+
+def open_text(binary_stream):
+    """Envuelve un fichero binario (subida o disco) como texto UTF-8 (acepta BOM)."""
+    return io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+
+
+def write_error_report(errors, stream):
+    """Escribe el informe de errores en CSV (fila, referencia, error)."""
+    writer = csv.DictWriter(stream, fieldnames=['fila', 'referencia', 'error'])
+    writer.writeheader()
+    writer.writerows(errors)
@@ -1,19 +1,265 @@
-from app import db
+import re
+
+from app import db, cache
+from app.cache import CachedRow
+from app.cursors import decode_key, encode_key
 from app.models.product_model import Product
 from app.models.supplier_model import Supplier
-from sqlalchemy import or_
+from app.services import alert_service
+from sqlalchemy import case, column, func, literal_column, or_, select, table, tuple_
+
+# --- Paginación del catálogo ---
+PAGE_SIZE = 25  # Productos por página por defecto
+MAX_PAGE_SIZE = 100  # Límite para que nadie pida "toda la tabla" de golpe
+MAX_COUNTED_RESULTS = 1000  # Las búsquedas cuentan como mucho hasta aquí ("1000+")
+
+# Columnas que se guardan en la caché para cada producto
+PRODUCT_FIELDS = ('id', 'nombre', 'referencia', 'descripcion', 'precio', 'ubicacion',
+                  'cantidad_stock', 'stock_objetivo', 'image_file')
+
+
+def _snapshot(product, **extra):
+    """
+    Copia de un producto para la caché (se lee igual que el modelo:
+    product.nombre, product.stock_alert...).
+    """
+    return CachedRow.from_model(product, PRODUCT_FIELDS, stock_alert=product.stock_alert, **extra)
+
 
 def get_all_products():
     """
     Obtiene todos los productos de la base de datos, ordenados por nombre.
+    El resultado se guarda en la caché hasta el siguiente cambio del catálogo.
     """
     try:
-        return Product.query.order_by(Product.nombre).all()
+        return cache.remember('products:all', lambda: [
+            _snapshot(p) for p in Product.query.order_by(Product.nombre).all()
+        ])
     except Exception as e:
         print(f"Error al obtener productos: {e}")
         return []
 
 
+def encode_cursor(product):
+    """
+    Convierte la posición de un producto en el orden (nombre, id)
+    en un texto opaco para usar en la URL.
+    """
+    return encode_key([product.nombre, product.id])
+
+
+def decode_cursor(cursor):
+    """
+    Operación inversa de 'encode_cursor'. Devuelve (nombre, id) o None si el
+    cursor no es válido.
+    """
+    return decode_key(cursor, (str, int))
+
+
+def _clamp_page_size(limit):
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        return PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _search_filter(query):
+    search_term = f"%{query}%"  # Los % son comodines en SQL
+    return or_(
+        Product.nombre.ilike(search_term),
+        Product.referencia.ilike(search_term)
+    )
+
+
+# --- Búsqueda de Texto Completo (FTS5) ---
+# Pesos de bm25 por columna: nombre, referencia, descripción
+FTS_WEIGHTS = (10.0, 5.0, 1.0)
+
+_product_fts = table('product_fts', column('rowid'))
+_fts_available = {}  # ¿Existe 'product_fts' en esta BD? (se comprueba una vez)
+
+
+def _use_fts():
+    """
+    Devuelve True si la BD es SQLite y tiene el índice 'product_fts'
+    (creado por la migración o por 'db.create_all()').
+    En otro caso las búsquedas usan ilike.
+    """
+    engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return False
+
+    key = str(engine.url)
+    if key not in _fts_available:
+        _fts_available[key] = db.session.execute(db.text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'product_fts'"
+        )).first() is not None
+    return _fts_available[key]
+
+
+def _fts_query(query):
+    """
+    Convierte el texto del usuario en una consulta FTS5 segura:
+    cada palabra entre comillas y con '*' (búsqueda por prefijo).
+    "ratón inal" -> '"ratón"* "inal"*' (deben aparecer todas las palabras).
+    Sin palabras devuelve '""', que no coincide con nada.
+    """
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"*' for word in words) if words else '""'
+
+
+def _fts_matches(query):
+    """
+    Subconsulta (product_id, score) con los productos que coinciden.
+    Cuanto más bajo es 'score' (bm25), más relevante es el producto.
+    """
+    fts = literal_column('product_fts')
+    return (
+        select(_product_fts.c.rowid.label('product_id'),
+               func.bm25(fts, *FTS_WEIGHTS).label('score'))
+        .where(fts.op('MATCH')(_fts_query(query)))
+        .subquery()
+    )
+
+
+def _approximate_total(query=None):
+    """
+    Total aproximado de productos sin contar toda la tabla:
+    - Sin búsqueda: estadística del motor (PostgreSQL) o el mayor ID (SQLite),
+      ambas se leen en tiempo constante.
+    - Con búsqueda: se cuenta como mucho hasta MAX_COUNTED_RESULTS + 1.
+    Devuelve (total, es_aproximado).
+    """
+    if query:
+        if _use_fts():
+            matches = select(_fts_matches(query).c.product_id)
+        else:
+            matches = select(Product.id).where(_search_filter(query))
+        limited = matches.limit(MAX_COUNTED_RESULTS + 1).subquery()
+        total = db.session.execute(select(func.count()).select_from(limited)).scalar()
+        return min(total, MAX_COUNTED_RESULTS), total > MAX_COUNTED_RESULTS
+
+    if db.engine.dialect.name == 'postgresql':
+        estimate = db.session.execute(
+            db.text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'product'")
+        ).scalar()
+        if estimate is not None and estimate >= 0:
+            return int(estimate), True
+
+    # Con IDs autoincrementales, max(id) es una cota (solo falla por los borrados)
+    return db.session.execute(select(func.max(Product.id))).scalar() or 0, True
+
+
+def _fetch_keyset_page(stmt, sort_columns, after_key, before_key, limit):
+    """
+    Lee una página de 'stmt' en el orden de 'sort_columns' a partir de una
+    clave (valores de esas columnas). Devuelve (filas, hay_más_en_la_dirección_leída).
+    """
+    sort_key = tuple_(*sort_columns)
+
+    if before_key:
+        # Página anterior: leemos hacia atrás y luego damos la vuelta
+        rows = (stmt.filter(sort_key < before_key)
+                .order_by(*[c.desc() for c in sort_columns])
+                .limit(limit + 1).all())
+        return list(reversed(rows[:limit])), len(rows) > limit
+
+    if after_key:
+        stmt = stmt.filter(sort_key > after_key)
+    rows = stmt.order_by(*sort_columns).limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
+
+
+def get_products_page(after=None, before=None, limit=None, query=None):
+    """
+    Devuelve una página del catálogo usando paginación por cursor ("keyset"):
+    en lugar de OFFSET se pide "los siguientes después de esta clave", que la
+    BD resuelve igual de rápido en la página 1 que en la 1000.
+
+    - Sin búsqueda: orden (nombre, id), con el índice 'ix_product_nombre_id'.
+    - Con búsqueda (SQLite con FTS5): orden por relevancia (score, id).
+      Sin FTS5 se filtra con ilike y se mantiene el orden por nombre.
+
+    - after / before: cursores de la página siguiente / anterior.
+    - limit: tamaño de página (entre 1 y MAX_PAGE_SIZE).
+    - query: texto de búsqueda opcional.
+
+    Devuelve un diccionario con 'items', 'next_cursor', 'prev_cursor',
+    'total' y 'total_is_estimate'. Las páginas se guardan en la caché hasta
+    el siguiente cambio del catálogo.
+    """
+    limit = _clamp_page_size(limit)
+
+    try:
+        key = 'products:page:' + repr((after, before, limit, query))
+        return cache.remember(key, lambda: _load_products_page(after, before, limit, query))
+    except Exception as e:
+        print(f"Error al obtener página de productos: {e}")
+        return {'items': [], 'next_cursor': None, 'prev_cursor': None,
+                'limit': limit, 'total': 0, 'total_is_estimate': False}
+
+
+def _load_products_page(after, before, limit, query):
+    """
+    Consulta la página en la BD (ver 'get_products_page').
+    Los productos se devuelven como copias para la caché.
+    """
+    if query and _use_fts():
+        # Búsqueda por relevancia: el cursor es (score, id)
+        matches = _fts_matches(query)
+        stmt = (db.session.query(Product, matches.c.score)
+                .join(matches, Product.id == matches.c.product_id))
+        key_types = (float, int)
+        after_key, before_key = decode_key(after, key_types), decode_key(before, key_types)
+        rows, has_more = _fetch_keyset_page(stmt, (matches.c.score, Product.id),
+                                            after_key, before_key, limit)
+        items = [_snapshot(product, search_score=score) for product, score in rows]
+        page_key = lambda product: encode_key([product.search_score, product.id])
+    else:
+        stmt = Product.query
+        if query:
+            stmt = stmt.filter(_search_filter(query))
+        after_key, before_key = decode_cursor(after), decode_cursor(before)
+        rows, has_more = _fetch_keyset_page(stmt, (Product.nombre, Product.id),
+                                            after_key, before_key, limit)
+        items = [_snapshot(product) for product in rows]
+        page_key = encode_cursor
+
+    if before_key:
+        prev_cursor = page_key(items[0]) if has_more and items else None
+        next_cursor = page_key(items[-1]) if items else None
+    else:
+        next_cursor = page_key(items[-1]) if has_more else None
+        prev_cursor = page_key(items[0]) if after_key and items else None
+
+    total, is_estimate = _approximate_total(query)
+
+    return {
+        'items': items,
+        'next_cursor': next_cursor,
+        'prev_cursor': prev_cursor,
+        'limit': limit,
+        'total': total,
+        'total_is_estimate': is_estimate
+    }
+
+
+def iter_products(batch_size=500):
+    """
+    Recorre todo el catálogo por lotes (orden nombre, id) sin cargarlo entero
+    en memoria. Útil para reportes grandes.
+    """
+    after_key = None
+    while True:
+        items, has_more = _fetch_keyset_page(Product.query, (Product.nombre, Product.id),
+                                             after_key, None, batch_size)
+        yield from items
+        if not has_more:
+            break
+        after_key = (items[-1].nombre, items[-1].id)
+
+
 def get_product_by_id(product_id):
     """
     Obtiene un producto específico por su ID.
@@ -48,6 +294,7 @@ def create_product(form_data):
 
         db.session.add(new_product)
         db.session.commit()
+        cache.bump()  # El catálogo ha cambiado: invalidamos las lecturas cacheadas
         return new_product
     except Exception as e:
         db.session.rollback()
@@ -75,7 +322,10 @@ def update_product(product, form_data):
             suppliers = Supplier.query.filter(Supplier.id.in_(supplier_ids)).all()
             product.suppliers.extend(suppliers)
 
+        # Si se ha repuesto stock de sobra, la alerta vuelve a quedar armada
+        alert_service.rearm_alerts([product.id])
         db.session.commit()
+        cache.bump()
         return product
     except Exception as e:
         db.session.rollback()
@@ -92,6 +342,7 @@ def delete_product(product_id):
         if product:
             db.session.delete(product)
             db.session.commit()
+            cache.bump()
             return True
         return False
     except Exception as e:
@@ -103,57 +354,115 @@ def delete_product(product_id):
 def get_stock_alerts():
     """
     Obtiene todos los productos que están por debajo de su umbral de stock (10%).
+    El filtro se hace en la BD (usando el índice 'ix_product_stock_alert'),
+    así que solo se cargan los productos en alerta. Se ordenan aquí y no con
+    ORDER BY: con él, la BD prefiere recorrer 'ix_product_nombre_id' entero.
     """
     try:
-        products = Product.query.all()
-        alerts = [product for product in products if product.stock_alert]
-        return alerts
+        return cache.remember('products:alerts', lambda: [
+            _snapshot(p) for p in sorted(Product.query.filter(Product.stock_alert).all(),
+                                         key=lambda p: (p.nombre, p.id))
+        ])
     except Exception as e:
         print(f"Error al obtener alertas de stock: {e}")
         return []
 
-def get_inventory_statistics():
+# --- Estadísticas del Dashboard ---
+DASHBOARD_TOP_N = 10  # Productos más críticos que se muestran en la gráfica
+
+# Bandas de stock (en el orden en que se muestran)
+STOCK_BANDS = ('agotado', 'critico', 'bajo', 'correcto')
+
+
+def _stock_band():
     """
-    Prepara los datos para las gráficas del Dashboard.
-    Devuelve tres listas: Nombres, Stock Actual, Stock Objetivo.
-     """
-    try:
-        products = Product.query.all()
+    Expresión SQL que clasifica cada producto en una banda de stock:
+    agotado (0), crítico (<= 10% del objetivo), bajo (<= 50%) o correcto.
+    """
+    return case(
+        (Product.cantidad_stock <= 0, 'agotado'),
+        (Product.stock_alert, 'critico'),
+        (Product.cantidad_stock * 2 <= Product.stock_objetivo, 'bajo'),
+        else_='correcto'
+    )
+
 
-        # Creamos listas vacías
-        names = []
-        current_stock = []
-        target_stock = []
+def _load_inventory_statistics(top_n):
+    # 1. Totales en una sola consulta (sin cargar ningún producto)
+    totals = db.session.execute(select(
+        func.count(Product.id),
+        func.coalesce(func.sum(Product.cantidad_stock), 0),
+        func.coalesce(func.sum(Product.stock_objetivo), 0),
+        func.coalesce(func.sum(Product.precio * Product.cantidad_stock), 0.0),
+        func.coalesce(func.sum(case((Product.stock_alert, 1), else_=0)), 0)
+    )).one()
 
-        for product in products:
-            names.append(product.nombre)
-            current_stock.append(product.cantidad_stock)
-            target_stock.append(product.stock_objetivo)
+    # 2. Número de productos por banda de stock
+    band = _stock_band().label('banda')
+    band_counts = dict(db.session.execute(
+        select(band, func.count(Product.id)).group_by(band)
+    ).all())
 
+    # 3. Los N productos más críticos (menor % de stock respecto al objetivo),
+    # leyendo solo las columnas que necesita la gráfica
+    ratio = Product.cantidad_stock * 1.0 / Product.stock_objetivo
+    critical = db.session.execute(
+        select(Product.id, Product.nombre, Product.referencia,
+               Product.cantidad_stock, Product.stock_objetivo)
+        .where(Product.stock_objetivo > 0)
+        .order_by(ratio, Product.id)
+        .limit(top_n)
+    ).all()
+
+    return {
+        'totals': {
+            'productos': totals[0],
+            'unidades': totals[1],
+            'unidades_objetivo': totals[2],
+            'valor_stock': round(totals[3], 2),
+            'en_alerta': totals[4]
+        },
+        'bands': [{'banda': name, 'productos': band_counts.get(name, 0)} for name in STOCK_BANDS],
+        'critical': [CachedRow(row._mapping) for row in critical]
+    }
+
+
+def get_inventory_statistics(top_n=DASHBOARD_TOP_N):
+    """
+    Prepara los datos del Dashboard con agregados calculados en la BD:
+    - 'totals': nº de productos, unidades, unidades objetivo, valor del stock
+      (precio x cantidad_stock) y productos en alerta.
+    - 'bands': nº de productos por banda de stock (agotado, crítico, bajo, correcto).
+    - 'critical': los 'top_n' productos más críticos (para la gráfica).
+    El tamaño del resultado no depende del tamaño del catálogo, y se guarda
+    en la caché hasta el siguiente cambio de stock.
+    """
+    try:
+        return cache.remember(f'products:stats:{top_n}', lambda: _load_inventory_statistics(top_n))
+    except Exception as e:
+        print(f"Error al obtener estadísticas: {e}")
         return {
-            'names': names,
-            'current_stock': current_stock,
-            'target_stock': target_stock
+            'totals': {'productos': 0, 'unidades': 0, 'unidades_objetivo': 0,
+                       'valor_stock': 0.0, 'en_alerta': 0},
+            'bands': [{'banda': name, 'productos': 0} for name in STOCK_BANDS],
+            'critical': []
         }
-    except Exception as e:
-            print(f"Error al obtener estadísticas: {e}")
-            return {'names': [], 'current_stock': [], 'target_stock': []}
 
 
 def search_products(query):
     """
-    Busca productos cuyo nombre O referencia contengan el texto 'query'.
-    Usa ilike para que no importen las mayúsculas/minúsculas.
+    Busca productos cuyo nombre, referencia o descripción contengan las
+    palabras de 'query' (por prefijo y sin importar tildes), de más a menos
+    relevante. Usa el índice FTS5 'product_fts'; si la BD no lo tiene,
+    busca con ilike en nombre y referencia.
     """
     try:
-        search_term = f"%{query}%"  # Los % son comodines en SQL
-
-        return Product.query.filter(
-            or_(
-                Product.nombre.ilike(search_term),
-                Product.referencia.ilike(search_term)
-            )
-        ).order_by(Product.nombre).all()
+        if _use_fts():
+            matches = _fts_matches(query)
+            return (Product.query.join(matches, Product.id == matches.c.product_id)
+                    .order_by(matches.c.score, Product.id).all())
+
+        return Product.query.filter(_search_filter(query)).order_by(Product.nombre).all()
     except Exception as e:
         print(f"Error en la búsqueda: {e}")
-        return []
\ No newline at end of file
+        return []
@@ -0,0 +1,318 @@
+import re
+from datetime import datetime
+
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.orm import joinedload, selectinload
+
+from app import db, cache
+from app.models.product_model import Product
+from app.models.purchase_order_model import (ORDER_CANCELLED, ORDER_OPEN, ORDER_RECEIVED,
+                                             PurchaseOrder, PurchaseOrderLine)
+from app.models.supplier_model import Supplier
+from app.services import alert_service, replenishment_service
+
+# Separadores admitidos entre referencia y cantidad: "REF-1, 10", "REF-1;10" o "REF-1<tab>10"
+LINE_SEPARATORS = re.compile(r'\s*[,;\t]\s*')
+
+
+# --- LECTURA ---
+
+def get_purchase_orders(estado=None):
+    """
+    Pedidos de compra, los más recientes primero, con el proveedor, el número
+    de líneas, las unidades y el importe de cada uno (agregados en la BD).
+    """
+    try:
+        statement = (
+            select(PurchaseOrder.id, PurchaseOrder.estado, PurchaseOrder.fecha,
+                   PurchaseOrder.fecha_recepcion, Supplier.nombre_empresa,
+                   func.count(PurchaseOrderLine.id).label('lineas'),
+                   func.coalesce(func.sum(PurchaseOrderLine.cantidad), 0).label('unidades'),
+                   func.coalesce(func.sum(PurchaseOrderLine.cantidad_recibida), 0).label('recibidas'),
+                   func.coalesce(func.sum(PurchaseOrderLine.cantidad * PurchaseOrderLine.precio_unitario),
+                                 0.0).label('importe'))
+            .join(Supplier, Supplier.id == PurchaseOrder.supplier_id)
+            .outerjoin(PurchaseOrderLine, PurchaseOrderLine.order_id == PurchaseOrder.id)
+            .group_by(PurchaseOrder.id, Supplier.nombre_empresa)
+            .order_by(PurchaseOrder.fecha.desc(), PurchaseOrder.id.desc())
+        )
+        if estado:
+            statement = statement.where(PurchaseOrder.estado == estado)
+        return db.session.execute(statement).all()
+    except Exception as e:
+        print(f"Error al obtener pedidos de compra: {e}")
+        return []
+
+
+def get_purchase_order(order_id):
+    """Un pedido con su proveedor y todas sus líneas (y sus productos) en tres consultas."""
+    try:
+        return db.session.execute(
+            select(PurchaseOrder)
+            .where(PurchaseOrder.id == order_id)
+            .options(joinedload(PurchaseOrder.supplier),
+                     selectinload(PurchaseOrder.lines).joinedload(PurchaseOrderLine.product))
+        ).scalar_one_or_none()
+    except Exception as e:
+        print(f"Error al obtener el pedido de compra: {e}")
+        return None
+
+
+# --- CREACIÓN ---
+
+def parse_order_lines(text):
+    """
+    Convierte el texto del formulario (una línea por producto: "referencia, cantidad")
+    en [(product_id, cantidad), ...]. Las referencias se buscan en una sola
+    consulta. Las líneas vacías o que empiezan por '#' se ignoran.
+    Lanza ValueError con las líneas que no se entienden o las referencias que no existen.
+    """
+    pairs = []
+    errors = []
+    for number, raw in enumerate((text or '').splitlines(), start=1):
+        line = raw.strip()
+        if not line or line.startswith('#'):
+            continue
+        parts = LINE_SEPARATORS.split(line)
+        try:
+            if len(parts) != 2 or not parts[0]:
+                raise ValueError
+            pairs.append((number, parts[0], int(parts[1])))
+        except ValueError:
+            errors.append(f'línea {number}')
+
+    if errors:
+        raise ValueError(f"Formato no válido ({', '.join(errors[:10])}). Use 'referencia, cantidad'.")
+
+    references = {reference for _, reference, _ in pairs}
+    ids = dict(db.session.execute(
+        select(Product.referencia, Product.id).where(Product.referencia.in_(references))
+    ).all()) if references else {}
+
+    missing = [f'{reference} (línea {number})' for number, reference, _ in pairs if reference not in ids]
+    if missing:
+        raise ValueError(f"Referencias desconocidas: {', '.join(missing[:10])}.")
+    return [(ids[reference], cantidad) for _, reference, cantidad in pairs]
+
+
+def _normalize_lines(lines):
+    """
+    Suma las líneas repetidas del mismo producto y las ordena por product_id.
+    Lanza ValueError si alguna cantidad no es válida.
+    """
+    order = {}
+    for line in lines:
+        try:
+            product_id, cantidad = (int(value) for value in line)
+        except (TypeError, ValueError):
+            raise ValueError("El pedido contiene líneas no válidas.")
+        if cantidad < 1:
+            raise ValueError("La cantidad debe ser al menos 1.")
+        order[product_id] = order.get(product_id, 0) + cantidad
+    return sorted(order.items())
+
+
+def create_purchase_order(supplier_id, lines, user_id=None, notas=None):
+    """
+    Crea un pedido abierto para el proveedor con las líneas [(product_id, cantidad), ...].
+    El precio de cada línea es el precio actual del producto (estimación: el
+    modelo no guarda precios de compra). Las líneas se insertan con un único
+    INSERT múltiple. Devuelve (pedido, mensaje); el pedido es None si falla.
+    """
+    try:
+        items = _normalize_lines(lines)
+    except ValueError as e:
+        return None, str(e)
+    if not items:
+        return None, "El pedido no tiene líneas."
+
+    try:
+        if db.session.get(Supplier, supplier_id) is None:
+            return None, "Proveedor no encontrado."
+
+        prices = dict(db.session.execute(
+            select(Product.id, Product.precio).where(Product.id.in_([product_id for product_id, _ in items]))
+        ).all())
+        if len(prices) < len(items):
+            return None, "Algún producto del pedido no existe."
+
+        order = PurchaseOrder(supplier_id=supplier_id, user_id=user_id, notas=notas or None)
+        db.session.add(order)
+        db.session.flush()  # Necesitamos el id del pedido para las líneas
+
+        db.session.execute(insert(PurchaseOrderLine), [
+            {'order_id': order.id, 'product_id': product_id, 'cantidad': cantidad,
+             'precio_unitario': prices[product_id]}
+            for product_id, cantidad in items
+        ])
+        db.session.commit()
+        replenishment_service.forget_plan()  # Lo pedido ya cuenta como stock en camino
+        return order, f"Pedido #{order.id} creado con {len(items)} líneas."
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al crear el pedido de compra: {e}")
+        return None, "Error al crear el pedido."
+
+
+def create_order_from_plan(supplier_id, user_id=None):
+    """
+    Crea un pedido al proveedor con todas las líneas que la propuesta de
+    reposición le asigna (las cantidades sugeridas). Devuelve (pedido, mensaje).
+    """
+    np = replenishment_service.np
+    if np is None:
+        return None, "No se puede calcular la propuesta (¿está instalado NumPy?)."
+
+    try:
+        plan = replenishment_service.compute_replenishment()
+    except Exception as e:
+        print(f"Error al calcular la propuesta de reposición: {e}")
+        return None, "Error al calcular la propuesta de reposición."
+
+    supplier_ids = plan['supplier_ids']
+    position = int(np.searchsorted(supplier_ids, supplier_id))
+    if position >= len(supplier_ids) or supplier_ids[position] != supplier_id:
+        return None, "Proveedor no encontrado."
+
+    chosen = np.flatnonzero((plan['supplier'] == position) & (plan['cantidad'] > 0))
+    if not len(chosen):
+        return None, "La propuesta no tiene nada que pedir a este proveedor."
+
+    lines = zip(plan['product_id'][chosen].tolist(), plan['cantidad'][chosen].astype(np.int64).tolist())
+    return create_purchase_order(supplier_id, lines, user_id, notas='Generado desde la propuesta de reposición.')
+
+
+# --- RECEPCIÓN ---
+
+def _normalize_received(received):
+    """{line_id: cantidad recibida} con enteros >= 0. Lanza ValueError si no."""
+    result = {}
+    for line_id, cantidad in received.items():
+        try:
+            line_id, cantidad = int(line_id), int(cantidad)
+        except (TypeError, ValueError):
+            raise ValueError("Las cantidades recibidas no son válidas.")
+        if cantidad < 0:
+            raise ValueError("La cantidad recibida no puede ser negativa.")
+        result[line_id] = cantidad
+    return result
+
+
+def receive_purchase_order(order_id, received=None, user_id=None):
+    """
+    Recibe un pedido abierto en UNA sola transacción, sin cargar las líneas
+    ni los productos en el ORM (el número de sentencias no depende de las líneas):
+
+    1. Marca el pedido como recibido con un UPDATE condicional (solo si
+       sigue abierto): dos recepciones simultáneas no suman el stock dos veces.
+    2. Guarda lo recibido de cada línea: todo lo pedido y, para las líneas de
+       'received' ({line_id: cantidad}), lo que ha llegado (un executemany).
+    3. Suma lo recibido al stock de todos los productos con un único UPDATE:
+
+           UPDATE product SET cantidad_stock = cantidad_stock +
+               (SELECT cantidad_recibida FROM purchase_order_line
+                WHERE order_id = :id AND product_id = product.id)
+           WHERE id IN (SELECT product_id FROM purchase_order_line
+                        WHERE order_id = :id AND cantidad_recibida > 0)
+
+    4. Vuelve a armar las alertas de stock de los productos repuestos.
+
+    Devuelve (éxito, mensaje).
+    """
+    try:
+        received = _normalize_received(received or {})
+    except ValueError as e:
+        return False, str(e)
+
+    try:
+        if received:
+            line_ids = set(db.session.execute(
+                select(PurchaseOrderLine.id).where(PurchaseOrderLine.order_id == order_id)
+            ).scalars())
+            if not line_ids.issuperset(received):
+                return False, "El pedido contiene líneas no válidas."
+
+        # 1. El pedido pasa a recibido (el número de filas afectadas decide)
+        claimed = db.session.execute(
+            update(PurchaseOrder)
+            .where(PurchaseOrder.id == order_id, PurchaseOrder.estado == ORDER_OPEN)
+            .values(estado=ORDER_RECEIVED, fecha_recepcion=datetime.utcnow(), recibido_por_id=user_id)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if claimed != 1:
+            db.session.rollback()
+            order = db.session.get(PurchaseOrder, order_id)
+            if order is None:
+                return False, "Pedido no encontrado."
+            return False, f"El pedido #{order.id} ya está {order.estado}."
+
+        # 2. Lo recibido de cada línea
+        db.session.execute(
+            update(PurchaseOrderLine)
+            .where(PurchaseOrderLine.order_id == order_id)
+            .values(cantidad_recibida=PurchaseOrderLine.cantidad)
+            .execution_options(synchronize_session=False)
+        )
+        lines = PurchaseOrderLine.__table__
+        changed = [{'line_id': line_id, 'recibido': cantidad} for line_id, cantidad in received.items()]
+        if changed:
+            db.session.execute(
+                update(lines)
+                .where(lines.c.id == bindparam('line_id'))
+                .values(cantidad_recibida=bindparam('recibido')),
+                changed
+            )
+
+        # 3. Todo el stock de golpe
+        received_products = (
+            select(PurchaseOrderLine.product_id)
+            .where(PurchaseOrderLine.order_id == order_id, PurchaseOrderLine.cantidad_recibida > 0)
+        )
+        quantity = (
+            select(PurchaseOrderLine.cantidad_recibida)
+            .where(PurchaseOrderLine.order_id == order_id, PurchaseOrderLine.product_id == Product.id)
+            .scalar_subquery()
+        )
+        products = db.session.execute(
+            update(Product)
+            .where(Product.id.in_(received_products))
+            .values(cantidad_stock=Product.cantidad_stock + quantity)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+        # 4. Alertas de los productos que vuelven a tener stock suficiente
+        alert_service.rearm_alerts(received_products)
+
+        units = db.session.execute(
+            select(func.coalesce(func.sum(PurchaseOrderLine.cantidad_recibida), 0))
+            .where(PurchaseOrderLine.order_id == order_id)
+        ).scalar_one()
+
+        db.session.commit()
+        cache.bump()  # El stock ha cambiado: invalidamos las lecturas cacheadas
+        replenishment_service.forget_plan()
+        return True, f"Pedido #{order_id} recibido: {units} unidades en {products} productos."
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al recibir el pedido de compra: {e}")
+        return False, "Error al recibir el pedido."
+
+
+def cancel_purchase_order(order_id):
+    """Cancela un pedido abierto (los recibidos ya no se pueden cancelar). Devuelve (éxito, mensaje)."""
+    try:
+        cancelled = db.session.execute(
+            update(PurchaseOrder)
+            .where(PurchaseOrder.id == order_id, PurchaseOrder.estado == ORDER_OPEN)
+            .values(estado=ORDER_CANCELLED)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        if cancelled != 1:
+            return False, "Solo se pueden cancelar pedidos abiertos."
+        replenishment_service.forget_plan()
+        return True, f"Pedido #{order_id} cancelado."
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al cancelar el pedido de compra: {e}")
+        return False, "Error al cancelar el pedido."
@@ -0,0 +1,297 @@
+import math
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import String, func, select, type_coerce
+
+from app import db, cache
+from app.cache import CachedRow
+from app.models.product_model import Product, product_supplier_association
+from app.models.purchase_order_model import ORDER_OPEN, PurchaseOrder, PurchaseOrderLine
+from app.models.sales_rollup_model import ALL_PRODUCTS, SalesDaily
+from app.models.supplier_model import Supplier
+
+try:
+    import numpy as np
+except ImportError:  # Sin NumPy no hay propuesta de reposición (el resto funciona igual)
+    np = None
+
+# --- Parámetros de la reposición ---
+HISTORY_DAYS = 365  # Días de ventas (de los resúmenes diarios) para estimar la demanda
+LEAD_TIME_DAYS = 7  # Días que tarda en llegar un pedido al proveedor
+REVIEW_DAYS = 14  # Cada cuántos días se hacen pedidos (lo que debe cubrir cada pedido)
+SERVICE_Z = 1.65  # Stock de seguridad en desviaciones típicas (1.65 ≈ 95% sin roturas)
+PLAN_CACHE_TTL = 300  # Segundos que se reutiliza la propuesta (la demanda cambia despacio)
+PLAN_TOP_N = 20  # Líneas más urgentes que se muestran en el dashboard
+
+NO_SUPPLIER = 'Sin proveedor'
+
+
+def _fetch_columns(connection, statement, dtypes):
+    """
+    Ejecuta 'statement' y devuelve un array de NumPy por columna.
+    Las filas se leen del cursor de la BD tal cual (sin crear un objeto Row
+    por fila) y, si todas las columnas son numéricas, se convierten de una vez.
+    """
+    result = connection.execute(statement)
+    try:
+        rows = result.cursor.fetchall()
+    finally:
+        result.close()
+
+    if rows and all(np.issubdtype(np.dtype(dtype), np.number) for dtype in dtypes):
+        table = np.array(rows, dtype=np.float64)
+        return [table[:, i].astype(dtype) for i, dtype in enumerate(dtypes)]
+    columns = list(zip(*rows)) or [()] * len(dtypes)
+    return [np.array(values, dtype=dtype) for values, dtype in zip(columns, dtypes)]
+
+
+def _load(history_days, today):
+    """
+    Lee todo lo necesario en 5 consultas: productos, demanda agregada por
+    producto, unidades ya pedidas (pedidos abiertos), proveedores y la
+    asociación. La demanda se agrega en la BD (suma, suma de cuadrados y
+    primer día con ventas) recorriendo solo el índice
+    ix_sales_daily_product_dia_unidades, así no se traen millones de filas
+    de sales_daily. Se ejecutan con la conexión (Core) y no con la
+    sesión del ORM (ver '_fetch_columns'): con 100.000 filas, crear los
+    objetos Row cuesta más que la propia consulta.
+    """
+    start = today - timedelta(days=history_days - 1)
+    connection = db.session.connection()
+
+    d_pid, d_units, d_squares, d_first = _fetch_columns(connection, (
+        select(SalesDaily.product_id,
+               func.sum(SalesDaily.unidades),
+               func.sum(SalesDaily.unidades * SalesDaily.unidades),
+               type_coerce(func.min(SalesDaily.dia), String))
+        .where(SalesDaily.dia >= start, SalesDaily.product_id != ALL_PRODUCTS)
+        .group_by(SalesDaily.product_id)
+    ), (np.int64, np.float64, np.float64, 'datetime64[D]'))  # Fecha en texto ISO o 'date', según el driver
+
+    return {
+        'products': _fetch_columns(connection, (
+            select(Product.id, Product.precio, Product.cantidad_stock, Product.stock_objetivo)
+            .order_by(Product.id)
+        ), (np.int64, np.float64, np.float64, np.float64)),
+        'demand': [d_pid, d_units, d_squares,
+                   (np.datetime64(today, 'D') - d_first).astype(np.int64)],  # Días desde la primera venta
+        'on_order': _fetch_columns(connection, (
+            select(PurchaseOrderLine.product_id, func.sum(PurchaseOrderLine.cantidad))
+            .join(PurchaseOrder, PurchaseOrder.id == PurchaseOrderLine.order_id)
+            .where(PurchaseOrder.estado == ORDER_OPEN)
+            .group_by(PurchaseOrderLine.product_id)
+        ), (np.int64, np.float64)),
+        'suppliers': _fetch_columns(connection, (
+            select(Supplier.id, func.coalesce(Supplier.descuento_porcentaje, 0.0),
+                   func.coalesce(Supplier.iva, 0.0))
+            .order_by(Supplier.id)
+        ), (np.int64, np.float64, np.float64)),
+        'links': _fetch_columns(connection, (
+            select(product_supplier_association.c.product_id, product_supplier_association.c.supplier_id)
+        ), (np.int64, np.int64)),
+    }
+
+
+def compute_replenishment(history_days=HISTORY_DAYS, lead_time=LEAD_TIME_DAYS, review_days=REVIEW_DAYS,
+                          service_z=SERVICE_Z, today=None):
+    """
+    Calcula de una vez, con operaciones vectorizadas sobre todo el catálogo:
+
+    - demanda diaria media y su desviación típica (los días sin ventas
+      cuentan como 0; para productos nuevos, desde su primera venta),
+    - días de cobertura (stock / demanda diaria),
+    - punto de pedido  = demanda x plazo + z·σ·√plazo,
+    - stock objetivo   = demanda x (plazo + revisión) + z·σ·√(plazo + revisión),
+    - cantidad a pedir = objetivo - (stock + pedido), si el stock más lo ya pedido
+      a proveedores (pedidos abiertos) está en el punto de pedido o por debajo,
+    - proveedor: el más barato de los del producto, con su descuento e IVA
+      (precio x (1 - descuento) x (1 + IVA)).
+
+    El importe se estima con Product.precio (el modelo no guarda el precio de compra).
+    Devuelve un diccionario de arrays de NumPy, uno por columna (un elemento por
+    producto, en orden de id), más los arrays de los proveedores.
+    """
+    today = today or date.today()
+    return _compute(_load(history_days, today), history_days, lead_time, review_days, service_z)
+
+
+def _compute(data, history_days, lead_time, review_days, service_z):
+    """Cálculo de 'compute_replenishment' sobre los arrays de '_load' (sin tocar la BD)."""
+    product_ids, precio, stock, objetivo = data['products']
+    d_pid, d_units, d_squares, d_age = data['demand']
+    supplier_ids, discount, iva = data['suppliers']
+    l_pid, l_sid = data['links']
+    o_pid, o_units = data['on_order']
+    n = len(product_ids)
+
+    # 1. Demanda: suma y suma de cuadrados por producto -> media y varianza
+    units = np.zeros(n)
+    squares = np.zeros(n)
+    days = np.full(n, float(history_days))
+    at = np.searchsorted(product_ids, d_pid)
+    found = at < n
+    found[found] = product_ids[at[found]] == d_pid[found]  # Descarta ventas de productos borrados
+    at = at[found]
+    units[at] = d_units[found]
+    squares[at] = d_squares[found]
+    days[at] = np.clip(d_age[found] + 1, 1, history_days)
+
+    rate = units / days
+    variance = np.zeros(n)
+    np.divide(squares - units * units / days, days - 1, out=variance, where=days > 1)
+    sigma = np.sqrt(np.maximum(variance, 0.0))
+
+    cover = np.full(n, np.inf)
+    np.divide(stock, rate, out=cover, where=rate > 0)
+
+    # 2. Punto de pedido y cantidad a pedir (lo que ya viene en camino cuenta como stock)
+    on_order = np.zeros(n)
+    at = np.searchsorted(product_ids, o_pid)
+    found = at < n
+    found[found] = product_ids[at[found]] == o_pid[found]
+    on_order[at[found]] = o_units[found]
+    position = stock + on_order
+
+    horizon = lead_time + review_days
+    reorder_point = rate * lead_time + service_z * sigma * math.sqrt(lead_time)
+    target = rate * horizon + service_z * sigma * math.sqrt(horizon)
+    quantity = np.where((position <= reorder_point) & (rate > 0), np.ceil(target - position), 0.0)
+    quantity = np.maximum(quantity, 0.0)
+
+    # 3. Proveedor más barato de cada producto (-1 = sin proveedor)
+    factor = (1 - discount / 100) * (1 + iva / 100)
+    supplier = np.full(n, -1, dtype=np.int64)
+    if len(l_pid) and len(supplier_ids):
+        l_at = np.searchsorted(product_ids, l_pid)
+        l_sup = np.searchsorted(supplier_ids, l_sid)
+        # Orden: producto, factor de coste, id de proveedor -> el primero de cada producto gana
+        order = np.lexsort((l_sup, factor[l_sup], l_at))
+        _, first = np.unique(l_at[order], return_index=True)
+        best = order[first]
+        supplier[l_at[best]] = l_sup[best]
+
+    # 4. Importes de cada línea (bruto, descuento, IVA) según su proveedor
+    # (con un 0 al final: el índice -1 de "sin proveedor" cae ahí)
+    line_discount = np.append(discount, 0.0)[supplier]
+    line_iva = np.append(iva, 0.0)[supplier]
+    gross = quantity * precio
+    discount_amount = gross * line_discount / 100
+    base = gross - discount_amount
+    iva_amount = base * line_iva / 100
+
+    return {
+        'product_id': product_ids, 'cantidad_stock': stock, 'en_camino': on_order, 'stock_objetivo': objetivo,
+        'demanda_diaria': rate, 'desviacion': sigma, 'dias_cobertura': cover,
+        'punto_pedido': reorder_point, 'objetivo_sugerido': target, 'cantidad': quantity,
+        'supplier': supplier, 'bruto': gross, 'descuento': discount_amount, 'base': base,
+        'iva': iva_amount, 'total': base + iva_amount,
+        'supplier_ids': supplier_ids, 'supplier_descuento': discount, 'supplier_iva': iva,
+        'plazo': lead_time,
+    }
+
+
+def _summarize(plan, top_n):
+    """Totales por proveedor y las 'top_n' líneas más urgentes (menos días de cobertura)."""
+    to_order = np.flatnonzero(plan['cantidad'] > 0)
+    supplier_ids = plan['supplier_ids']
+
+    # Agrupar por proveedor: la posición 0 es "sin proveedor"
+    group = plan['supplier'][to_order] + 1
+    size = len(supplier_ids) + 1
+
+    def per_supplier(column):
+        return np.bincount(group, weights=plan[column][to_order], minlength=size)
+
+    lines = np.bincount(group, minlength=size)
+    sums = {column: per_supplier(column) for column in ('cantidad', 'bruto', 'descuento', 'base', 'iva', 'total')}
+
+    names = dict(db.session.execute(select(Supplier.id, Supplier.nombre_empresa)).all())
+    suppliers = []
+    for position in np.flatnonzero(lines):
+        supplier_id = int(supplier_ids[position - 1]) if position else None
+        suppliers.append(CachedRow(
+            supplier_id=supplier_id,
+            nombre_empresa=names.get(supplier_id, NO_SUPPLIER),
+            descuento_porcentaje=float(plan['supplier_descuento'][position - 1]) if position else 0.0,
+            iva_porcentaje=float(plan['supplier_iva'][position - 1]) if position else 0.0,
+            lineas=int(lines[position]),
+            unidades=int(sums['cantidad'][position]),
+            **{column: round(float(sums[column][position]), 2)
+               for column in ('bruto', 'descuento', 'base', 'iva', 'total')},
+        ))
+    suppliers.sort(key=lambda row: row.total, reverse=True)
+
+    # Líneas más urgentes: menos días de cobertura (y, a igualdad, más demanda)
+    urgent = to_order[np.lexsort((-plan['demanda_diaria'][to_order], plan['dias_cobertura'][to_order]))][:top_n]
+    details = {row.id: row for row in db.session.execute(
+        select(Product.id, Product.nombre, Product.referencia)
+        .where(Product.id.in_([int(plan['product_id'][i]) for i in urgent]))).all()}
+    urgent_lines = []
+    for i in urgent:
+        product = details.get(int(plan['product_id'][i]))
+        if product is None:
+            continue  # Borrado mientras se calculaba
+        supplier = plan['supplier'][i]
+        urgent_lines.append(CachedRow(
+            product_id=product.id, nombre=product.nombre, referencia=product.referencia,
+            proveedor=names.get(int(supplier_ids[supplier]), NO_SUPPLIER) if supplier >= 0 else NO_SUPPLIER,
+            cantidad_stock=int(plan['cantidad_stock'][i]), en_camino=int(plan['en_camino'][i]),
+            stock_objetivo=int(plan['stock_objetivo'][i]),
+            demanda_diaria=round(float(plan['demanda_diaria'][i]), 2),
+            dias_cobertura=round(float(plan['dias_cobertura'][i]), 1),
+            objetivo_sugerido=int(math.ceil(plan['objetivo_sugerido'][i])),
+            cantidad=int(plan['cantidad'][i]), total=round(float(plan['total'][i]), 2),
+        ))
+
+    return {
+        'proveedores': suppliers,
+        'lineas': urgent_lines,
+        'totales': {
+            'productos': int(len(plan['product_id'])),
+            'a_pedir': int(len(to_order)),
+            'unidades': int(sums['cantidad'].sum()),
+            'base': round(float(sums['base'].sum()), 2),
+            'total': round(float(sums['total'].sum()), 2),
+            # Productos con ventas y menos cobertura que el plazo de entrega: rotura probable
+            'rotura_probable': int(np.count_nonzero(plan['dias_cobertura'] < plan['plazo'])),
+            'plazo': plan['plazo'],
+        },
+    }
+
+
+def _build_plan(top_n):
+    started = time.perf_counter()
+    summary = _summarize(compute_replenishment(), top_n)
+    summary['fecha'] = datetime.now()
+    summary['segundos'] = round(time.perf_counter() - started, 2)
+    return summary
+
+
+def _plan_key(top_n):
+    return f'replenishment:plan:{top_n}'
+
+
+def forget_plan(top_n=PLAN_TOP_N):
+    """Descarta la propuesta guardada (al pedir o recibir mercancía cambia por completo)."""
+    cache.delete(_plan_key(top_n))
+
+
+def get_replenishment_plan(top_n=PLAN_TOP_N, refresh=False):
+    """
+    Propuesta de reposición para el dashboard: totales por proveedor (con
+    descuento e IVA) y las líneas más urgentes. Se guarda PLAN_CACHE_TTL
+    segundos sin versión (cada venta cambia la versión del catálogo, pero
+    la demanda cambia despacio). Devuelve None si no hay NumPy o si falla.
+    """
+    if np is None:
+        return None
+    try:
+        plan = None if refresh else cache.get(_plan_key(top_n))
+        if plan is None:
+            plan = _build_plan(top_n)
+            cache.set(_plan_key(top_n), plan, PLAN_CACHE_TTL)
+        return plan
+    except Exception as e:
+        print(f"Error al calcular la propuesta de reposición: {e}")
+        return None
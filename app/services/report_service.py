@@ -0,0 +1,53 @@
+import io
+import time
+from datetime import datetime
+
+from flask import render_template
+from xhtml2pdf import pisa
+
+from app import cache, reports
+from app.metrics import observe_pdf
+from app.services import product_service
+
+INVENTORY_REPORT = 'inventario'
+
+
+def render_inventory_pdf(products, page=None):
+    """
+    Convierte la plantilla 'report_pdf.html' en un PDF (bytes).
+    Lanza RuntimeError si xhtml2pdf no puede generarlo.
+    """
+    start = time.perf_counter()
+    fecha = datetime.now().strftime("%d/%m/%Y %H:%M")
+    rendered_html = render_template('report_pdf.html', products=products, page=page, fecha_actual=fecha)
+
+    pdf_output = io.BytesIO()
+    pisa_status = pisa.CreatePDF(io.BytesIO(rendered_html.encode('utf-8')), dest=pdf_output)
+    observe_pdf('inventario' if page is None else 'pagina', time.perf_counter() - start)
+    if pisa_status.err:
+        raise RuntimeError('xhtml2pdf no pudo generar el PDF')
+    return pdf_output.getvalue()
+
+
+def _build_inventory_report(path):
+    # Recorre el catálogo por lotes: no carga todos los productos a la vez
+    with open(path, 'wb') as f:
+        f.write(render_inventory_pdf(product_service.iter_products()))
+
+
+def request_inventory_report():
+    """
+    Pide el reporte de inventario completo para la versión actual del catálogo.
+    Si ya existe se reutiliza; si no, se genera en segundo plano.
+    Devuelve (clave, estado) con estado 'ready', 'running' o 'failed'.
+    """
+    key = str(cache.version())
+    status = reports.submit(INVENTORY_REPORT, key, _build_inventory_report)
+    return key, status
+
+
+def get_inventory_report(key):
+    """
+    Devuelve (estado, ruta_del_fichero) del reporte con esa clave.
+    """
+    return reports.status(INVENTORY_REPORT, key), reports.path_for(INVENTORY_REPORT, key)
@@ -1,57 +1,443 @@
-from app import db
+from app import db, cache
+from app.cache import CachedRow
+from app.cursors import decode_key, encode_key
+from app.metrics import observe_sale
 from app.models.sale_model import Sale
 from app.models.product_model import Product
-from app.utils import send_stock_alert
+from app.models.sales_rollup_model import ALL_PRODUCTS, SalesDaily, SalesMonthly
+from app.services import alert_service
+import time
+from datetime import datetime
+from sqlalchemy import Date, cast, delete, func, insert, literal, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import joinedload
+
+# --- Historial de compras ---
+HISTORY_PAGE_SIZE = 20  # Líneas por página en "Mis Compras"
+MAX_HISTORY_PAGE_SIZE = 100
+
+# --- Resultados de 'process_cart' (también son las etiquetas de las métricas) ---
+SALE_OK = 'ok'
+SALE_INVALID = 'invalido'  # Carrito vacío o cantidades no válidas
+SALE_NOT_FOUND = 'no_encontrado'
+SALE_OUT_OF_STOCK = 'sin_stock'
+SALE_ERROR = 'error'
+
+# --- Resúmenes de ventas (sales_daily / sales_monthly) ---
+ROLLUP_COUNTERS = ('unidades', 'ingresos', 'pedidos')
+TOP_SELLERS_LIMIT = 10
+
+
+def _decrement_stock(product_id, cantidad):
+    """
+    Resta 'cantidad' del stock con un único UPDATE condicional:
+
+        UPDATE product SET cantidad_stock = cantidad_stock - :n
+        WHERE id = :id AND cantidad_stock >= :n
+
+    La comprobación y la resta ocurren dentro de la misma sentencia, así que
+    dos compradores simultáneos nunca pueden dejar el stock en negativo.
+    Devuelve True si se actualizó la fila (había stock suficiente).
+    """
+    result = db.session.execute(
+        update(Product)
+        .where(Product.id == product_id, Product.cantidad_stock >= cantidad)
+        .values(cantidad_stock=Product.cantidad_stock - cantidad)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def _normalize_cart(lines):
+    """
+    Convierte las líneas del carrito [(product_id, cantidad), ...] en una
+    lista ordenada por product_id, sumando las líneas repetidas.
+    Lanza ValueError si alguna cantidad no es válida.
+    """
+    cart = {}
+    for line in lines:
+        try:
+            product_id, cantidad = (int(value) for value in line)
+        except (TypeError, ValueError):
+            raise ValueError("El carrito contiene líneas no válidas.")
+        if cantidad < 1:
+            raise ValueError("La cantidad debe ser al menos 1.")
+        cart[product_id] = cart.get(product_id, 0) + cantidad
+
+    # Ordenar por ID hace que todas las transacciones bloqueen las filas
+    # en el mismo orden (evita interbloqueos entre carritos simultáneos)
+    return sorted(cart.items())
+
+
+def _upsert_rollup(model, rows):
+    """
+    Suma 'rows' a la tabla de resumen 'model' (INSERT ... ON CONFLICT DO UPDATE):
+    si la fila (periodo, producto) no existe se crea, y si existe se le suman
+    los contadores. Es una sola sentencia, así que dos ventas simultáneas
+    del mismo producto no se pisan.
+    """
+    dialect = db.session.get_bind().dialect.name
+    keys = [column.name for column in model.__table__.primary_key]
+
+    if dialect in ('sqlite', 'postgresql'):
+        dialect_insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = dialect_insert(model)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=keys,
+            set_={name: getattr(model, name) + stmt.excluded[name] for name in ROLLUP_COUNTERS}
+        )
+        db.session.execute(stmt, rows)
+        return
+
+    # Otros motores: UPDATE y, si no había fila, INSERT
+    for row in rows:
+        result = db.session.execute(
+            update(model)
+            .where(*[getattr(model, key) == row[key] for key in keys])
+            .values({name: getattr(model, name) + row[name] for name in ROLLUP_COUNTERS})
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            db.session.execute(insert(model), [row])
+
+
+def _update_rollups(fecha, cart, products):
+    """
+    Añade un pedido a los resúmenes diario y mensual (una fila por producto
+    y otra con el total, product_id = ALL_PRODUCTS). Se llama dentro de la
+    transacción de la venta: o se guardan las dos cosas o ninguna.
+    """
+    lines = [
+        {'product_id': product_id, 'unidades': cantidad,
+         'ingresos': cantidad * products[product_id].precio, 'pedidos': 1}
+        for product_id, cantidad in cart
+    ]
+    lines.append({
+        'product_id': ALL_PRODUCTS,
+        'unidades': sum(line['unidades'] for line in lines),
+        'ingresos': sum(line['ingresos'] for line in lines),
+        'pedidos': 1
+    })
+
+    dia = fecha.date()
+    _upsert_rollup(SalesDaily, [dict(line, dia=dia) for line in lines])
+    _upsert_rollup(SalesMonthly, [dict(line, mes=dia.replace(day=1)) for line in lines])
+
 
 def process_sale(user_id, product_id, cantidad):
     """
-    Procesa una venta:
-    1. Verifica stock.
-    2. Crea el registro de venta.
-    3. Resta el stock del producto.
+    Procesa la venta de un único producto (un carrito de una línea).
+    Devuelve (éxito, mensaje, resultado), como 'process_cart'.
     """
+    return process_cart(user_id, [(product_id, cantidad)])
+
+
+def process_cart(user_id, lines):
+    """
+    Procesa un carrito completo en UNA sola transacción:
+    1. Resta el stock de cada línea de forma atómica (solo si hay suficiente).
+       Si alguna línea falla, no se vende nada.
+    2. Inserta todas las ventas de golpe y las suma a los resúmenes diario y mensual.
+    3. Avisa de los productos que crucen ahora el umbral (ver alert_service).
+    Devuelve (éxito, mensaje, resultado): el resultado es una de las
+    constantes SALE_* (para decidir el código HTTP sin mirar el mensaje).
+    """
+    start = time.perf_counter()
+    success, message, outcome = _process_cart(user_id, lines)
+    observe_sale(outcome, time.perf_counter() - start)
+    return success, message, outcome
+
+
+def _process_cart(user_id, lines):
+    """'process_cart' sin medir las métricas."""
     try:
-        product = Product.query.get(product_id)
+        cart = _normalize_cart(lines)
+    except ValueError as e:
+        return False, str(e), SALE_INVALID
 
-        if not product:
-            return False, "Producto no encontrado."
+    if not cart:
+        return False, "El carrito está vacío.", SALE_INVALID
 
-        if product.cantidad_stock < cantidad:
-            return False, f"No hay suficiente stock. Quedan {product.cantidad_stock} unidades."
+    try:
+        # 1. RESTAMOS EL STOCK (el número de filas afectadas decide si hay venta)
+        for product_id, cantidad in cart:
+            if not _decrement_stock(product_id, cantidad):
+                db.session.rollback()
 
-        # Creamos la venta
-        new_sale = Sale(
-            user_id=user_id,
-            product_id=product_id,
-            cantidad=cantidad,
-            precio_unitario=product.precio
-        )
+                product = Product.query.get(product_id)
+                if not product:
+                    return False, "Producto no encontrado.", SALE_NOT_FOUND
+                if len(cart) == 1:
+                    return False, f"No hay suficiente stock. Quedan {product.cantidad_stock} unidades.", SALE_OUT_OF_STOCK
+                return False, (f"No hay suficiente stock de {product.nombre}. "
+                               f"Quedan {product.cantidad_stock} unidades."), SALE_OUT_OF_STOCK
 
-        # RESTAMOS EL STOCK
-        product.cantidad_stock -= cantidad
+        # Releemos los productos ya actualizados (precio y stock restante) en una consulta
+        product_ids = [product_id for product_id, _ in cart]
+        products = {
+            p.id: p for p in
+            Product.query.filter(Product.id.in_(product_ids)).populate_existing().all()
+        }
+
+        # 2. Creamos todas las ventas con un único INSERT múltiple.
+        # Comparten la misma fecha: identifica las líneas de un mismo pedido.
+        fecha = datetime.utcnow()
+        db.session.execute(insert(Sale), [
+            {
+                'user_id': user_id,
+                'product_id': product_id,
+                'cantidad': cantidad,
+                'fecha': fecha,
+                'precio_unitario': products[product_id].precio
+            }
+            for product_id, cantidad in cart
+        ])
+        _update_rollups(fecha, cart, products)
+
+        # Usamos la propiedad .stock_alert que definimos en el Modelo Product.
+        # Solo avisan los que cruzan ahora el umbral (alerta armada): los que ya
+        # estaban bajo mínimos no mandan otro correo en cada venta.
+        low_stock = [product_id for product_id in product_ids if products[product_id].stock_alert]
+        alerted = alert_service.claim_alerts(low_stock) if low_stock else []
 
-        db.session.add(new_sale)
         db.session.commit()
+        cache.bump()  # El stock ha cambiado: invalidamos las lecturas cacheadas
 
-        # --- 2. VERIFICAR ALERTA DE STOCK ---
-        # Usamos la propiedad .stock_alert que definimos en el Modelo Product
-        if product.stock_alert:
-            # Enviamos el correo (esto puede tardar un par de segundos)
-            send_stock_alert(product)
+        # --- 3. AVISAR DE LAS ALERTAS NUEVAS ---
+        # Encolamos los correos (se envían en segundo plano, no retrasan la compra)
+        if alerted:
+            alert_service.notify([products[product_id] for product_id in alerted])
 
-        return True, "¡Compra realizada con éxito!"
+        if len(cart) == 1:
+            return True, "¡Compra realizada con éxito!", SALE_OK
+        return True, f"¡Compra de {len(cart)} productos realizada con éxito!", SALE_OK
 
     except Exception as e:
         db.session.rollback()
         print(f"Error en venta: {e}")
-        return False, "Error interno al procesar la venta."
+        return False, "Error interno al procesar la venta.", SALE_ERROR
 
 
 def get_sales_by_user(user_id):
     """Obtiene el historial de compras de un usuario."""
-    return Sale.query.filter_by(user_id=user_id).order_by(Sale.fecha.desc()).all()
+    return (Sale.query.options(joinedload(Sale.product))
+            .filter_by(user_id=user_id).order_by(Sale.fecha.desc(), Sale.id.desc()).all())
+
+
+def encode_history_cursor(sale):
+    """Posición de una venta en el orden (fecha, id), como texto para la URL."""
+    return encode_key([sale.fecha.isoformat(), sale.id])
+
+
+def decode_history_cursor(cursor):
+    """Operación inversa de 'encode_history_cursor'. Devuelve (fecha, id) o None."""
+    return decode_key(cursor, (datetime.fromisoformat, int))
+
+
+def get_user_sales_page(user_id, after=None, before=None, limit=None):
+    """
+    Una página del historial de compras de un usuario, de la más reciente a la
+    más antigua, con paginación por cursor sobre (fecha, id).
+
+    El producto de cada venta se carga en la misma consulta (joinedload), así
+    que pintar la página no lanza una consulta extra por fila.
+
+    - after: cursor para ver compras más antiguas.
+    - before: cursor para volver a las más recientes.
+
+    Devuelve un diccionario con 'items', 'next_cursor', 'prev_cursor' y 'limit'.
+    """
+    try:
+        limit = max(1, min(int(limit), MAX_HISTORY_PAGE_SIZE))
+    except (TypeError, ValueError):
+        limit = HISTORY_PAGE_SIZE
+
+    after_key, before_key = decode_history_cursor(after), decode_history_cursor(before)
+    sort_key = tuple_(Sale.fecha, Sale.id)
+    stmt = Sale.query.options(joinedload(Sale.product)).filter(Sale.user_id == user_id)
+
+    try:
+        if before_key:
+            # Hacia las más recientes: leemos en orden ascendente y damos la vuelta
+            rows = (stmt.filter(sort_key > before_key)
+                    .order_by(Sale.fecha, Sale.id).limit(limit + 1).all())
+            has_more = len(rows) > limit
+            items = list(reversed(rows[:limit]))
+            prev_cursor = encode_history_cursor(items[0]) if has_more and items else None
+            next_cursor = encode_history_cursor(items[-1]) if items else None
+        else:
+            if after_key:
+                stmt = stmt.filter(sort_key < after_key)
+            rows = stmt.order_by(Sale.fecha.desc(), Sale.id.desc()).limit(limit + 1).all()
+            has_more = len(rows) > limit
+            items = rows[:limit]
+            next_cursor = encode_history_cursor(items[-1]) if has_more else None
+            prev_cursor = encode_history_cursor(items[0]) if after_key and items else None
+    except Exception as e:
+        print(f"Error al obtener historial de compras: {e}")
+        items, next_cursor, prev_cursor = [], None, None
+
+    return {'items': items, 'next_cursor': next_cursor, 'prev_cursor': prev_cursor, 'limit': limit}
+
+
+def get_user_sales_summary(user_id):
+    """
+    Resumen de todas las compras de un usuario, calculado por la BD en una
+    sola consulta: gasto total, unidades y número de pedidos.
+    Las líneas de un mismo pedido (carrito) comparten la fecha, así que los
+    pedidos se cuentan como fechas distintas.
+    """
+    stmt = select(
+        func.coalesce(func.sum(Sale.total), 0),
+        func.coalesce(func.sum(Sale.cantidad), 0),
+        func.count(Sale.fecha.distinct()),
+    ).where(Sale.user_id == user_id)
+
+    try:
+        gasto, unidades, pedidos = db.session.execute(stmt).one()
+    except Exception as e:
+        print(f"Error al calcular el resumen de compras: {e}")
+        gasto, unidades, pedidos = 0, 0, 0
+
+    return {'gasto': float(gasto), 'unidades': int(unidades), 'pedidos': int(pedidos)}
 
 
 def get_all_sales():
     """Obtiene todas las ventas (para admin)."""
-    return Sale.query.order_by(Sale.fecha.desc()).all()
\ No newline at end of file
+    return (Sale.query.options(joinedload(Sale.product), joinedload(Sale.user))
+            .order_by(Sale.fecha.desc(), Sale.id.desc()).all())
+
+
+# --- RESÚMENES DE VENTAS (ANALÍTICA) ---
+
+def _day_of(column):
+    """Expresión SQL con el día (sin hora) de una columna de fecha."""
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return func.date(column)
+    return cast(column, Date)
+
+
+def _month_of(column):
+    """Expresión SQL con el primer día del mes de una columna de fecha."""
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return func.strftime('%Y-%m-01', column)
+    return cast(func.date_trunc('month', column), Date)
+
+
+def rebuild_sales_rollups():
+    """
+    Vuelve a calcular los resúmenes diario y mensual desde la tabla 'sale'
+    (para rellenarlos la primera vez o si se han desajustado).
+    Todo se hace en la BD con INSERT ... SELECT, en una sola transacción.
+    Devuelve (filas_diarias, filas_mensuales).
+    """
+    day = _day_of(Sale.fecha)
+    # Un pedido son las líneas con la misma fecha (ver process_cart)
+    counters = (func.sum(Sale.cantidad), func.sum(Sale.total), func.count(Sale.fecha.distinct()))
+    columns = ['dia', 'product_id', *ROLLUP_COUNTERS]
+
+    try:
+        db.session.execute(delete(SalesDaily))
+        db.session.execute(delete(SalesMonthly))
+
+        db.session.execute(insert(SalesDaily).from_select(
+            columns, select(day, Sale.product_id, *counters).group_by(day, Sale.product_id)))
+        db.session.execute(insert(SalesDaily).from_select(
+            columns, select(day, literal(ALL_PRODUCTS), *counters).group_by(day)))
+
+        # El mensual sale del diario (mucho más pequeño que 'sale')
+        month = _month_of(SalesDaily.dia)
+        db.session.execute(insert(SalesMonthly).from_select(
+            ['mes', 'product_id', *ROLLUP_COUNTERS],
+            select(month, SalesDaily.product_id,
+                   *[func.sum(getattr(SalesDaily, name)) for name in ROLLUP_COUNTERS])
+            .group_by(month, SalesDaily.product_id)))
+
+        db.session.commit()
+        cache.bump()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al reconstruir los resúmenes de ventas: {e}")
+        raise
+
+    return (db.session.execute(select(func.count()).select_from(SalesDaily)).scalar(),
+            db.session.execute(select(func.count()).select_from(SalesMonthly)).scalar())
+
+
+def _load_revenue_over_time(period, start, end, product_id):
+    if period == 'month':
+        model, column = SalesMonthly, SalesMonthly.mes
+        start = start.replace(day=1) if start else None
+    else:
+        model, column = SalesDaily, SalesDaily.dia
+
+    stmt = (select(column, model.unidades, model.ingresos, model.pedidos)
+            .where(model.product_id == (product_id or ALL_PRODUCTS)))
+    if start:
+        stmt = stmt.where(column >= start)
+    if end:
+        stmt = stmt.where(column <= end)
+
+    return [CachedRow(periodo=periodo, unidades=unidades, ingresos=ingresos, pedidos=pedidos)
+            for periodo, unidades, ingresos, pedidos in db.session.execute(stmt.order_by(column))]
+
+
+def get_revenue_over_time(period='day', start=None, end=None, product_id=None):
+    """
+    Evolución de las ventas leída de los resúmenes (no de la tabla 'sale').
+    - period: 'day' o 'month'.
+    - start / end: fechas (date) incluidas; opcionales.
+    - product_id: un producto concreto; por defecto, el total de la tienda.
+    Devuelve una lista de filas con 'periodo', 'unidades', 'ingresos' y 'pedidos'
+    (los periodos sin ventas no aparecen).
+    """
+    try:
+        key = 'sales:revenue:' + repr((period, start, end, product_id))
+        return cache.remember(key, lambda: _load_revenue_over_time(period, start, end, product_id))
+    except Exception as e:
+        print(f"Error al obtener la evolución de ventas: {e}")
+        return []
+
+
+def _load_top_sellers(start, end, limit, metric):
+    # Sin rango de fechas basta con el resumen mensual (menos filas)
+    if start or end:
+        model, column = SalesDaily, SalesDaily.dia
+    else:
+        model, column = SalesMonthly, SalesMonthly.mes
+
+    # Se agrupa por 'product_id + 0' para que SQLite no recorra entero el
+    # índice (product_id, ...) solo por agrupar en orden: así busca el rango
+    # de fechas en la clave primaria (dia, product_id)
+    product_id = (model.product_id + 0).label('product_id')
+    unidades = func.sum(model.unidades).label('unidades')
+    ingresos = func.sum(model.ingresos).label('ingresos')
+    pedidos = func.sum(model.pedidos).label('pedidos')
+    order = ingresos if metric == 'ingresos' else unidades
+
+    stmt = (select(product_id, Product.nombre, unidades, ingresos, pedidos)
+            .join(Product, Product.id == model.product_id)
+            .group_by(product_id, Product.nombre)
+            .order_by(order.desc(), product_id)
+            .limit(limit))
+    if start:
+        stmt = stmt.where(column >= start)
+    if end:
+        stmt = stmt.where(column <= end)
+
+    return [CachedRow(row._mapping) for row in db.session.execute(stmt)]
+
+
+def get_top_sellers(start=None, end=None, limit=TOP_SELLERS_LIMIT, metric='ingresos'):
+    """
+    Productos más vendidos, leídos de los resúmenes.
+    - start / end: fechas (date) incluidas; opcionales.
+    - metric: 'ingresos' (por defecto) o 'unidades'.
+    Devuelve filas con 'product_id', 'nombre', 'unidades', 'ingresos' y 'pedidos'.
+    """
+    try:
+        key = 'sales:top:' + repr((start, end, limit, metric))
+        return cache.remember(key, lambda: _load_top_sellers(start, end, limit, metric))
+    except Exception as e:
+        print(f"Error al obtener los productos más vendidos: {e}")
+        return []
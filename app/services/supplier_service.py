@@ -1,13 +1,22 @@
-from app import db
+from app import db, cache
+from app.cache import CachedRow
 from app.models.supplier_model import Supplier
 
+# Columnas que se guardan en la caché para cada proveedor
+SUPPLIER_FIELDS = ('id', 'nombre_empresa', 'telefono', 'direccion', 'cif',
+                   'facturacion_info', 'descuento_porcentaje', 'iva')
+
 
 def get_all_suppliers():
     """
     Obtiene todos los proveedores, ordenados por nombre.
+    El resultado se guarda en la caché hasta el siguiente cambio del catálogo.
     """
     try:
-        return Supplier.query.order_by(Supplier.nombre_empresa).all()
+        return cache.remember('suppliers:all', lambda: [
+            CachedRow.from_model(s, SUPPLIER_FIELDS)
+            for s in Supplier.query.order_by(Supplier.nombre_empresa).all()
+        ])
     except Exception as e:
         print(f"Error al obtener proveedores: {e}")
         return []
@@ -41,6 +50,7 @@ def create_supplier(form_data):
 
         db.session.add(new_supplier)
         db.session.commit()
+        cache.bump()  # El catálogo ha cambiado: invalidamos las lecturas cacheadas
         return new_supplier
     except Exception as e:
         db.session.rollback()
@@ -62,6 +72,7 @@ def update_supplier(supplier, form_data):
         supplier.iva = form_data.get('iva', 21.0)
 
         db.session.commit()
+        cache.bump()
         return supplier
     except Exception as e:
         db.session.rollback()
@@ -76,6 +87,11 @@ def delete_supplier(supplier_id):
     try:
         supplier = Supplier.query.get(supplier_id)
         if supplier:
+            # Los pedidos de compra guardan el historial de reposición: no se borran
+            if supplier.purchase_orders.first() is not None:
+                print(f"No se elimina el proveedor {supplier_id}: tiene pedidos de compra")
+                return False
+
             # ¡Importante! Antes de eliminar, desasociar productos
             # (Si no, la BD podría dar error de clave foránea)
             supplier.products.clear()
@@ -83,6 +99,7 @@ def delete_supplier(supplier_id):
 
             db.session.delete(supplier)
             db.session.commit()
+            cache.bump()
             return True
         return False
     except Exception as e:
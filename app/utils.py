@@ -1,12 +1,15 @@
 from flask_mail import Message
-from app import mail
+from app import notifier
+from app.metrics import count_stock_alert
 
 
 def send_stock_alert(product):
     """
-    Envía un correo electrónico al administrador avisando del stock bajo.
-    Se llama automáticamente desde 'sale_service.py' cuando una venta
-    deja el stock por debajo del umbral mínimo (10%).
+    Encola un correo electrónico al administrador avisando del stock bajo.
+    Se llama desde 'alert_service.py' cuando una venta deja el stock por
+    debajo del umbral mínimo (10%) y la alerta del producto estaba armada.
+    El envío real lo hace el 'notifier' en segundo plano, así la venta
+    no espera al servidor SMTP. Devuelve True si el correo quedó encolado.
     """
     try:
         # Configuración del mensaje
@@ -35,10 +38,56 @@ def send_stock_alert(product):
         Tu App de Suministros Informáticos
         """
 
-        # Enviar el correo usando la instancia 'mail' configurada en __init__.py
-        mail.send(msg)
-        print(f"Correo de alerta enviado exitosamente para el producto: {product.nombre}")
+        # Encolar el correo (el mensaje ya está construido: el hilo de envío
+        # no necesita tocar el objeto 'product' ni la sesión de la BD)
+        queued = notifier.enqueue(msg)
+        count_stock_alert('encolada' if queued else 'descartada')
+        return queued
 
     except Exception as e:
         # Imprimimos el error en la consola para no detener la aplicación si el correo falla
-        print(f"Error al enviar correo de alerta: {e}")
\ No newline at end of file
+        print(f"Error al encolar correo de alerta: {e}")
+        count_stock_alert('error')
+        return False
+
+
+def send_stock_digest(rows):
+    """
+    Encola UN correo con todos los productos que han bajado del umbral desde
+    el último resumen (filas con nombre, referencia, cantidad_stock,
+    stock_objetivo y alerta_fecha). Devuelve True si quedó encolado.
+    """
+    try:
+        msg = Message(
+            subject=f'⚠️ Resumen de Alertas de Stock: {len(rows)} producto(s)',
+            sender='noreply@tutienda.com',
+            recipients=['admin@tutienda.com']
+        )
+
+        lines = '\n'.join(
+            f"        - {row.nombre} ({row.referencia or 'N/A'}): "
+            f"{row.cantidad_stock} de {row.stock_objetivo} unidades"
+            f"{row.alerta_fecha.strftime(', desde el %d/%m/%Y %H:%M') if row.alerta_fecha else ''}"
+            for row in rows
+        )
+        msg.body = f"""
+        Hola Administrador,
+
+        Estos productos han bajado del nivel mínimo de inventario desde el último resumen:
+
+{lines}
+
+        Por favor, contacta a los proveedores para realizar un reabastecimiento.
+
+        Atentamente,
+        Tu App de Suministros Informáticos
+        """
+
+        queued = notifier.enqueue(msg)
+        count_stock_alert('encolada' if queued else 'descartada')
+        return queued
+
+    except Exception as e:
+        print(f"Error al encolar el resumen de alertas: {e}")
+        count_stock_alert('error')
+        return False
\ No newline at end of file
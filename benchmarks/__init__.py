@@ -0,0 +1,6 @@
+"""
+Pruebas de carga y benchmarks de la aplicación.
+
+Cada módulo se ejecuta por separado, por ejemplo:
+    python -m benchmarks.stress_checkout
+"""
@@ -0,0 +1,99 @@
+"""
+Memoria de la exportación de ventas en streaming.
+
+Genera una tabla de ventas grande (1.000.000 por defecto), la descarga por
+'/exportar/ventas.csv' leyendo la respuesta trozo a trozo y mide la memoria
+residente (RSS) del proceso durante la descarga. Si la exportación es de
+verdad en streaming, la RSS se mantiene plana aunque la tabla crezca.
+
+Uso:
+    python -m benchmarks.export_memory --sales 1000000 [--gzip]
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from app import create_app, db, bcrypt
+from app.models.product_model import Product
+from app.models.sale_model import Sale
+from app.models.user_model import User
+
+
+def rss_mb():
+    """RSS actual del proceso en MB (Linux: /proc; si no, el máximo alcanzado)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def seed(app, total):
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(username='contabilidad', role='admin',
+                            password_hash=bcrypt.generate_password_hash('export').decode('utf-8')))
+        db.session.add_all([Product(nombre=f'Producto {i}', referencia=f'EXP-{i}', precio=10 + i,
+                                    cantidad_stock=100, stock_objetivo=100) for i in range(50)])
+        db.session.commit()
+
+        start = datetime(2025, 1, 1)
+        batch = []
+        for i in range(total):
+            batch.append({'fecha': start + timedelta(seconds=i * 30), 'cantidad': 1 + i % 3,
+                          'precio_unitario': 10 + i % 50, 'user_id': 1, 'product_id': 1 + i % 50})
+            if len(batch) == 20000:
+                db.session.execute(db.insert(Sale), batch)
+                batch = []
+        if batch:
+            db.session.execute(db.insert(Sale), batch)
+        db.session.commit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Memoria de la exportación de ventas en streaming.')
+    parser.add_argument('--sales', type=int, default=1_000_000)
+    parser.add_argument('--gzip', action='store_true')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'export.db')}",
+                          'WTF_CSRF_ENABLED': False})
+
+        start = time.perf_counter()
+        seed(app, args.sales)
+        print(f"{args.sales} ventas generadas en {time.perf_counter() - start:.1f} s")
+
+        client = app.test_client()
+        client.post('/login', data={'username': 'contabilidad', 'password': 'export'})
+
+        url = '/exportar/ventas.csv' + ('?gzip=1' if args.gzip else '')
+        rss_before = rss_mb()
+        rss_peak = rss_before
+        received = 0
+        chunks = 0
+
+        start = time.perf_counter()
+        response = client.get(url, buffered=False)
+        for chunk in response.response:
+            received += len(chunk)
+            chunks += 1
+            if chunks % 50 == 0:
+                rss_peak = max(rss_peak, rss_mb())
+        response.close()
+        elapsed = time.perf_counter() - start
+        rss_peak = max(rss_peak, rss_mb())
+
+    print(f"Descargados {received / 2 ** 20:.1f} MB en {chunks} trozos ({elapsed:.1f} s, "
+          f"{args.sales / elapsed:.0f} filas/s)")
+    print(f"RSS antes: {rss_before:.1f} MB, máxima durante la descarga: {rss_peak:.1f} MB "
+          f"(+{rss_peak - rss_before:.1f} MB)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
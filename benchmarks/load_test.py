@@ -0,0 +1,325 @@
+"""
+Prueba de carga de las rutas reales de la aplicación.
+
+Varios hilos (cada uno con sus clientes de pruebas, uno como cliente y otro
+como administrador) lanzan una mezcla de peticiones contra las rutas de
+verdad durante un tiempo fijo:
+
+    product_list  GET  /productos/
+    search        GET  /productos/?q=...
+    buy_product   POST /ventas/comprar/<id>
+    my_sales      GET  /ventas/mis-compras
+    dashboard     GET  /productos/dashboard         (administrador)
+    generate_pdf  GET  /productos/reporte_pdf?limit=25  (una página, al momento)
+
+Por escenario se mide la latencia (p50 / p95 / p99), las peticiones por
+segundo, los errores y las consultas SQL por petición. El resultado sale en
+JSON (por pantalla o en --output) para comparar ejecuciones; con --compare
+se muestran las diferencias con un resultado anterior.
+
+Uso:
+    python -m benchmarks.seed --database-url sqlite:///bench.db --sales 2000000
+    python -m benchmarks.load_test --database-url sqlite:///bench.db --threads 8 --duration 60 \\
+        --output resultados/$(date +%F).json --compare resultados/anterior.json
+
+Sin --database-url se genera una BD temporal pequeña (ver --seed-*).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import event, func, select
+
+from app import create_app, db
+from app.models.product_model import Product
+from app.models.user_model import User
+from benchmarks.search_benchmark import BUSQUEDAS
+from benchmarks.seed import ADMINS, PASSWORD, seed_database
+
+# Peso de cada escenario en la mezcla por defecto
+DEFAULT_MIX = {
+    'product_list': 30,
+    'search': 20,
+    'buy_product': 20,
+    'my_sales': 15,
+    'dashboard': 10,
+    'generate_pdf': 5,
+}
+
+
+# --- Escenarios: (cliente, administrador, datos, rng) -> respuesta ---
+
+def product_list(client, admin, data, rng):
+    return client.get('/productos/')
+
+
+def search(client, admin, data, rng):
+    return client.get('/productos/', query_string={'q': rng.choice(BUSQUEDAS)})
+
+
+def buy_product(client, admin, data, rng):
+    return client.post(f'/ventas/comprar/{rng.choice(data["product_ids"])}',
+                       data={'cantidad': rng.randint(1, 3)})
+
+
+def my_sales(client, admin, data, rng):
+    return client.get('/ventas/mis-compras')
+
+
+def dashboard(client, admin, data, rng):
+    return admin.get('/productos/dashboard')
+
+
+def generate_pdf(client, admin, data, rng):
+    return admin.get('/productos/reporte_pdf', query_string={'limit': 25})
+
+
+SCENARIOS = {fn.__name__: fn for fn in (product_list, search, buy_product, my_sales,
+                                         dashboard, generate_pdf)}
+
+
+# --- Medición ---
+
+class QueryCounter:
+    """Cuenta las sentencias SQL de cada hilo (cada petición se atiende en su hilo)."""
+
+    def __init__(self, engine):
+        self._local = threading.local()
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.count = getattr(self._local, 'count', 0) + 1
+
+    @property
+    def count(self):
+        return getattr(self._local, 'count', 0)
+
+
+def percentile(samples, p):
+    """Percentil por rango más cercano de una lista ya ordenada."""
+    if not samples:
+        return None
+    return samples[min(len(samples) - 1, max(0, int(round(p / 100 * len(samples))) - 1))]
+
+
+def summarize(latencies, queries, errors, elapsed):
+    latencies = sorted(latencies)
+    total = len(latencies)
+    return {
+        'peticiones': total,
+        'errores': errors,
+        'por_segundo': round(total / elapsed, 2) if elapsed else 0,
+        'media_ms': round(sum(latencies) / total, 2) if total else None,
+        'p50_ms': round(percentile(latencies, 50), 2) if total else None,
+        'p95_ms': round(percentile(latencies, 95), 2) if total else None,
+        'p99_ms': round(percentile(latencies, 99), 2) if total else None,
+        'max_ms': round(latencies[-1], 2) if total else None,
+        'consultas_media': round(sum(queries) / total, 2) if total else None,
+        'consultas_max': max(queries) if total else None,
+    }
+
+
+def login(app, username):
+    client = app.test_client()
+    response = client.post('/login', data={'username': username, 'password': PASSWORD})
+    if response.status_code != 302:
+        raise RuntimeError(f'No se pudo iniciar sesión como {username} (¿BD generada con benchmarks.seed?).')
+    return client
+
+
+def run(app, mix, threads, duration, warmup, seed):
+    """Lanza la carga y devuelve {escenario: resumen} y el tiempo medido."""
+    with app.app_context():
+        data = {'product_ids': db.session.execute(select(Product.id)).scalars().all()}
+        clientes = db.session.execute(select(User.username).where(User.role == 'cliente')
+                                      .order_by(User.id).limit(threads)).scalars().all()
+        counter = QueryCounter(db.engine)
+
+    names, weights = list(mix), list(mix.values())
+    results = defaultdict(lambda: {'latencies': [], 'queries': [], 'errors': 0})
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(threads + 1)
+    stop = threading.Event()
+
+    def worker(n):
+        rng = random.Random(seed + n)
+        try:
+            client = login(app, clientes[n % len(clientes)])
+            admin = login(app, f'admin{n % ADMINS}')
+            for name in names:  # Calentamiento: plantillas, caché, conexiones
+                for _ in range(warmup):
+                    SCENARIOS[name](client, admin, data, rng)
+        except Exception:
+            start_barrier.abort()  # Que no se queden esperando los demás hilos
+            raise
+
+        local = defaultdict(lambda: {'latencies': [], 'queries': [], 'errors': 0})
+        start_barrier.wait()
+        while not stop.is_set():
+            name = rng.choices(names, weights)[0]
+            queries_before = counter.count
+            started = time.perf_counter()
+            response = SCENARIOS[name](client, admin, data, rng)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            response.close()
+
+            entry = local[name]
+            entry['latencies'].append(elapsed_ms)
+            entry['queries'].append(counter.count - queries_before)
+            if response.status_code >= 400:
+                entry['errors'] += 1
+
+        with lock:
+            for name, entry in local.items():
+                results[name]['latencies'].extend(entry['latencies'])
+                results[name]['queries'].extend(entry['queries'])
+                results[name]['errors'] += entry['errors']
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    try:
+        start_barrier.wait()
+    except threading.BrokenBarrierError:
+        stop.set()
+        for t in pool:
+            t.join()
+        raise RuntimeError('Algún hilo no ha podido preparar sus clientes (ver el error de arriba).')
+    started = time.perf_counter()
+    time.sleep(duration)
+    stop.set()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    summary = {name: summarize(results[name]['latencies'], results[name]['queries'],
+                               results[name]['errors'], elapsed) for name in names}
+    summary['total'] = summarize([ms for r in results.values() for ms in r['latencies']],
+                                 [q for r in results.values() for q in r['queries']],
+                                 sum(r['errors'] for r in results.values()), elapsed)
+    return summary, elapsed
+
+
+# --- Informe ---
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def dataset_size(app):
+    from app.models.sale_model import Sale
+    from app.models.supplier_model import Supplier
+
+    with app.app_context():
+        return {name: db.session.execute(select(func.count()).select_from(model)).scalar()
+                for name, model in (('productos', Product), ('proveedores', Supplier),
+                                    ('usuarios', User), ('ventas', Sale))}
+
+
+def compare(current, previous):
+    """Diferencias de p95 y peticiones/s con un resultado anterior."""
+    lines = [f"Comparado con {previous['meta'].get('commit')} ({previous['meta'].get('fecha')}):"]
+    for name, now in current['escenarios'].items():
+        before = previous['escenarios'].get(name)
+        if not before or not now['peticiones'] or not before['peticiones']:
+            continue
+        p95 = (now['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+        rate = (now['por_segundo'] - before['por_segundo']) / before['por_segundo'] * 100
+        lines.append(f"  {name:<13} p95 {before['p95_ms']:>8.1f} -> {now['p95_ms']:>8.1f} ms ({p95:+.0f}%)  "
+                     f"{before['por_segundo']:>7.1f} -> {now['por_segundo']:>7.1f} pet/s ({rate:+.0f}%)")
+    return '\n'.join(lines)
+
+
+def parse_mix(value):
+    """'product_list=3,search=1' -> {'product_list': 3, 'search': 1}"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Escenario desconocido: {name} (opciones: {', '.join(SCENARIOS)})")
+        mix[name] = float(weight) if weight else 1.0
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Prueba de carga de las rutas reales.')
+    parser.add_argument('--database-url', help='BD generada con benchmarks.seed (por defecto, una temporal)')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=30, help='Segundos de medida')
+    parser.add_argument('--warmup', type=int, default=2, help='Peticiones de calentamiento por escenario e hilo')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help='Escenarios y pesos, p. ej. "product_list=3,buy_product=1"')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--seed-products', type=int, default=5_000)
+    parser.add_argument('--seed-sales', type=int, default=200_000)
+    parser.add_argument('--output', help='Guarda el resultado en este fichero JSON')
+    parser.add_argument('--compare', help='Resultado JSON anterior con el que comparar')
+    args = parser.parse_args(argv)
+
+    config = {
+        'MAIL_SUPPRESS_SEND': True,
+        'WTF_CSRF_ENABLED': False,
+        'RATELIMIT_ENABLED': False,  # Todos los hilos inician sesión a la vez
+        'PASSWORD_WORKERS': 0,
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.database_url:
+            app = create_app({**config, 'SQLALCHEMY_DATABASE_URI': args.database_url})
+        else:
+            app = create_app({**config, 'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'carga.db')}",
+                              'BCRYPT_LOG_ROUNDS': 4})
+            print(f"Generando datos ({args.seed_products} productos, {args.seed_sales} ventas)...",
+                  file=sys.stderr)
+            seed_database(app, products=args.seed_products, sales=args.seed_sales, users=200, seed=args.seed)
+
+        summary, elapsed = run(app, args.mix, args.threads, args.duration, args.warmup, args.seed)
+        result = {
+            'meta': {
+                'fecha': datetime.now().isoformat(timespec='seconds'),
+                'commit': git_commit(),
+                'python': platform.python_version(),
+                'cpus': os.cpu_count(),
+                'hilos': args.threads,
+                'duracion_s': round(elapsed, 2),
+                'mezcla': args.mix,
+                'bd': app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0],
+                'perfil_bd': app.config['DB_PROFILE'],
+                'datos': dataset_size(app),
+            },
+            'escenarios': {name: summary[name] for name in args.mix},
+            'total': summary['total'],
+        }
+        app.extensions['notifier'].shutdown()
+
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print(compare(result, json.load(f)), file=sys.stderr)
+
+    return 0 if result['total']['errores'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Benchmark de inicios de sesión concurrentes (el "cambio de turno" de la tienda).
+
+Lanza una ráfaga de logins desde varios hilos (cada uno con su cliente de
+pruebas) y, a la vez, un hilo que pide una página ligera para ver cuánto
+se retrasa el resto del servidor mientras se calcula bcrypt.
+
+Compara bcrypt en el propio hilo (--workers 0) con el pool de procesos:
+
+    python -m benchmarks.login_benchmark --workers 0
+    python -m benchmarks.login_benchmark --workers 4 --threads 16 --logins 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from app import create_app, db
+from app.models.user_model import User
+
+PASSWORD = 'contraseña-de-prueba'
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] if samples else 0.0
+
+
+def setup_users(app, total):
+    with app.app_context():
+        db.create_all()
+        # Todos comparten el mismo hash: solo nos interesa el coste de comprobarlo
+        password_hash = User(username='plantilla', password=PASSWORD).password_hash
+        db.session.add_all([User(username=f'empleado{i}', password_hash=password_hash, role='cliente')
+                            for i in range(total)])
+        db.session.commit()
+
+
+def run(app, threads, logins):
+    latencies, light_latencies = [], []
+    failures = [0]
+    lock = threading.Lock()
+    next_login = iter(range(logins))
+    done = threading.Event()
+
+    def login_worker():
+        client = app.test_client()
+        while True:
+            with lock:
+                i = next(next_login, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            response = client.post('/login', data={'username': f'empleado{i % threads}',
+                                                   'password': PASSWORD})
+            elapsed = (time.perf_counter() - start) * 1000
+            client.get('/logout')
+            with lock:
+                latencies.append(elapsed)
+                if response.status_code != 302:
+                    failures[0] += 1
+
+    def light_worker():
+        # Petición que no toca bcrypt: mide si el servidor sigue respondiendo
+        client = app.test_client()
+        while not done.is_set():
+            start = time.perf_counter()
+            client.get('/login')
+            light_latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.01)
+
+    light = threading.Thread(target=light_worker)
+    pool = [threading.Thread(target=login_worker) for _ in range(threads)]
+
+    start = time.perf_counter()
+    light.start()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    light.join()
+
+    return latencies, light_latencies, failures[0], elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark de inicios de sesión concurrentes.')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--logins', type=int, default=80)
+    parser.add_argument('--rounds', type=int, default=10, help='BCRYPT_LOG_ROUNDS')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Procesos para bcrypt (0 = en el hilo de la petición)')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'login.db')}",
+            'WTF_CSRF_ENABLED': False,
+            'BCRYPT_LOG_ROUNDS': args.rounds,
+            'PASSWORD_WORKERS': args.workers,
+            'RATELIMIT_ENABLED': False,  # Aquí medimos bcrypt, no el límite de intentos
+        })
+        setup_users(app, args.threads)
+
+        # Calentamos el pool (arrancar los procesos no cuenta en la medida)
+        with app.app_context():
+            User.query.first().check_password(PASSWORD)
+
+        latencies, light, failures, elapsed = run(app, args.threads, args.logins)
+        app.extensions['passwords'].shutdown()
+
+    print(f"bcrypt coste {args.rounds}, {args.workers or 'sin'} procesos, "
+          f"{args.threads} hilos, {os.cpu_count()} CPUs")
+    print(f"  Logins: {len(latencies)} en {elapsed:.2f} s -> {len(latencies) / elapsed:.1f} logins/s "
+          f"({failures} fallidos)")
+    print(f"  Latencia login ms: p50 {statistics.median(latencies):.0f}, "
+          f"p95 {percentile(latencies, 0.95):.0f}, máx {max(latencies):.0f}")
+    if light:
+        print(f"  Página ligera durante la ráfaga ms: p50 {statistics.median(light):.1f}, "
+              f"p95 {percentile(light, 0.95):.1f}, máx {max(light):.1f}")
+    return 0 if failures == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
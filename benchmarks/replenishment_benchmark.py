@@ -0,0 +1,49 @@
+"""
+Tiempo de la propuesta de reposición (replenishment_service) por fases:
+lectura de la BD (demanda agregada en SQL), cálculo con NumPy sobre todo el
+catálogo y resumen por proveedor para el dashboard.
+
+Uso:
+    python -m benchmarks.seed --database-url sqlite:///bench.db --products 100000 --sales 2000000 --days 730
+    python -m benchmarks.replenishment_benchmark --database-url sqlite:///bench.db --repeat 3
+"""
+import argparse
+import sys
+import time
+from datetime import date
+
+from app import create_app
+from app.services import replenishment_service as rs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tiempo de la propuesta de reposición.')
+    parser.add_argument('--database-url', required=True, help='BD generada con benchmarks.seed')
+    parser.add_argument('--history-days', type=int, default=rs.HISTORY_DAYS)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if rs.np is None:
+        print('Hace falta NumPy.')
+        return 1
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': args.database_url, 'PASSWORD_WORKERS': 0})
+    print(f"{'lectura':>9} {'cálculo':>9} {'resumen':>9} {'total':>9}   productos  a pedir")
+    with app.app_context():
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            data = rs._load(args.history_days, date.today())
+            loaded = time.perf_counter()
+            plan = rs._compute(data, args.history_days, rs.LEAD_TIME_DAYS, rs.REVIEW_DAYS, rs.SERVICE_Z)
+            computed = time.perf_counter()
+            summary = rs._summarize(plan, rs.PLAN_TOP_N)
+            finished = time.perf_counter()
+
+            print(f"{loaded - started:>8.2f}s {computed - loaded:>8.2f}s {finished - computed:>8.2f}s "
+                  f"{finished - started:>8.2f}s   {summary['totales']['productos']:>9} "
+                  f"{summary['totales']['a_pedir']:>8}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
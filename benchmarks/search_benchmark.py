@@ -0,0 +1,124 @@
+"""
+Benchmark de la búsqueda de productos: ilike ('%texto%') frente a FTS5.
+
+Genera un catálogo sintético (100.000 productos por defecto) y mide, para
+varias búsquedas típicas, el tiempo de:
+  - la primera página de resultados (orden por nombre con ilike,
+    por relevancia con FTS5),
+  - el total de coincidencias (lo que cuesta recorrer todos los resultados).
+
+Uso:
+    python -m benchmarks.search_benchmark --products 100000 --repeat 20
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import func, select
+
+from app import create_app, db
+from app.models.product_model import Product
+from app.services import product_service
+
+FAMILIAS = ['Ratón', 'Teclado', 'Monitor', 'Cable', 'Portátil', 'Impresora',
+            'Auriculares', 'Disco', 'Memoria', 'Router', 'Webcam', 'Altavoz']
+ADJETIVOS = ['inalámbrico', 'óptico', 'mecánico', 'gaming', 'ergonómico', 'compacto',
+             'profesional', 'USB-C', 'bluetooth', 'retroiluminado', 'curvo', 'portátil']
+MARCAS = ['Logitech', 'HP', 'Dell', 'Lenovo', 'Asus', 'Acer', 'Samsung', 'Kingston']
+
+BUSQUEDAS = ['raton', 'teclado mecanico', 'imp', 'logitech inalambrico', 'USB', '00042']
+
+
+def seed(app, total, rng):
+    with app.app_context():
+        db.create_all()
+        batch = []
+        for i in range(total):
+            familia = rng.choice(FAMILIAS)
+            batch.append({
+                'nombre': f'{familia} {rng.choice(ADJETIVOS)} {rng.choice(MARCAS)} {i % 997}',
+                'referencia': f'{familia[:3].upper()}-{i:05d}',
+                'descripcion': f'{familia} {rng.choice(ADJETIVOS)} de {rng.choice(MARCAS)}, '
+                               f'ideal para oficina y {rng.choice(ADJETIVOS)}.',
+                'precio': round(rng.uniform(5, 900), 2),
+                'cantidad_stock': rng.randint(0, 500),
+                'stock_objetivo': 100,
+            })
+            if len(batch) == 5000:
+                db.session.execute(db.insert(Product), batch)
+                batch = []
+        if batch:
+            db.session.execute(db.insert(Product), batch)
+        db.session.commit()
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return result, statistics.mean(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def ilike_first_page(query, limit=25):
+    return (Product.query.filter(product_service._search_filter(query))
+            .order_by(Product.nombre, Product.id).limit(limit).all())
+
+
+def ilike_count(query):
+    return db.session.execute(
+        select(func.count()).select_from(Product).where(product_service._search_filter(query))
+    ).scalar()
+
+
+def fts_first_page(query, limit=25):
+    matches = product_service._fts_matches(query)
+    return (Product.query.join(matches, Product.id == matches.c.product_id)
+            .order_by(matches.c.score, Product.id).limit(limit).all())
+
+
+def fts_count(query):
+    return db.session.execute(
+        select(func.count()).select_from(product_service._fts_matches(query))
+    ).scalar()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark de búsqueda: ilike frente a FTS5.')
+    parser.add_argument('--products', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'search.db')}"})
+
+        start = time.perf_counter()
+        seed(app, args.products, random.Random(args.seed))
+        print(f"Catálogo de {args.products} productos generado en {time.perf_counter() - start:.1f} s\n")
+
+        header = f"{'búsqueda':<24}{'método':<8}{'página ms':>11}{'p95':>8}{'total ms':>10}{'p95':>8}{'resultados':>12}"
+        print(header)
+        print('-' * len(header))
+
+        with app.app_context():
+            for query in BUSQUEDAS:
+                for name, first_page, count in (('ilike', ilike_first_page, ilike_count),
+                                                ('fts5', fts_first_page, fts_count)):
+                    _, page_mean, page_p95 = timed(lambda: first_page(query), args.repeat)
+                    total, count_mean, count_p95 = timed(lambda: count(query), args.repeat)
+                    print(f"{query:<24}{name:<8}{page_mean:>11.2f}{page_p95:>8.2f}"
+                          f"{count_mean:>10.2f}{count_p95:>8.2f}{total:>12}")
+
+    print("\nNota: ilike no ignora tildes ('raton' no encuentra 'Ratón') ni busca en la descripción.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
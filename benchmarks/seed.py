@@ -0,0 +1,160 @@
+"""
+Datos sintéticos para las pruebas de carga.
+
+Genera en bloque proveedores, productos (con sus proveedores), usuarios y
+ventas agrupadas en pedidos repartidos en los últimos días, y recalcula los
+resúmenes de ventas. Con la misma semilla se obtienen siempre los mismos
+datos, así que dos ejecuciones del benchmark son comparables.
+
+Todos los usuarios tienen la contraseña PASSWORD: 'admin0', 'admin1'... son
+administradores y 'cliente0', 'cliente1'... clientes.
+
+Uso:
+    python -m benchmarks.seed --database-url sqlite:///bench.db --products 100000 --sales 2000000
+"""
+import argparse
+import itertools
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app import create_app, db
+from app.models.product_model import Product, product_supplier_association
+from app.models.sale_model import Sale
+from app.models.supplier_model import Supplier
+from app.models.user_model import User
+from app.services import sale_service
+from benchmarks.search_benchmark import ADJETIVOS, FAMILIAS, MARCAS
+
+PASSWORD = 'carga-de-prueba'
+ADMINS = 5  # Usuarios administradores (el resto son clientes)
+CIUDADES = ['Madrid', 'Barcelona', 'Valencia', 'Sevilla', 'Bilbao', 'Zaragoza', 'Málaga']
+
+
+def _insert(model_or_table, rows, batch_size):
+    """INSERT múltiple por lotes (sin crear objetos del ORM)."""
+    for i in range(0, len(rows), batch_size):
+        db.session.execute(db.insert(model_or_table), rows[i:i + batch_size])
+
+
+def _suppliers(rng, total):
+    return [{
+        'nombre_empresa': f'{rng.choice(MARCAS)} Distribución {i:04d} S.L.',
+        'telefono': f'9{rng.randint(10000000, 99999999)}',
+        'direccion': f'Calle {rng.choice(FAMILIAS)} {rng.randint(1, 200)}, {rng.choice(CIUDADES)}',
+        'cif': f'B{i:08d}',
+        'descuento_porcentaje': rng.choice([0.0, 0.0, 2.5, 5.0, 10.0]),
+        'iva': rng.choice([21.0, 21.0, 21.0, 10.0]),
+    } for i in range(total)]
+
+
+def _products(rng, total):
+    rows = []
+    for i in range(total):
+        familia = rng.choice(FAMILIAS)
+        objetivo = rng.choice([50, 100, 200, 500, 1000])
+        rows.append({
+            'nombre': f'{familia} {rng.choice(ADJETIVOS)} {rng.choice(MARCAS)} {i % 997}',
+            'referencia': f'{familia[:3].upper()}-{i:06d}',
+            'descripcion': f'{familia} {rng.choice(ADJETIVOS)} de {rng.choice(MARCAS)}, '
+                           f'ideal para oficina y {rng.choice(ADJETIVOS)}.',
+            'precio': round(rng.lognormvariate(3.5, 1.0), 2),
+            'ubicacion': f'Pasillo {rng.randint(1, 40)}-{rng.choice("ABCDEF")}',
+            # Casi todo con stock de sobra; algunos bajo el umbral de alerta
+            'cantidad_stock': rng.randint(0, objetivo // 10) if rng.random() < 0.05
+            else rng.randint(objetivo, objetivo * 50),
+            'stock_objetivo': objetivo,
+        })
+    return rows
+
+
+def seed_database(app, products=10_000, suppliers=200, users=1_000, sales=1_000_000,
+                  days=730, seed=42, batch_size=20_000):
+    """
+    Crea las tablas (si faltan) y las llena. Devuelve el número de filas
+    creadas de cada tipo.
+    """
+    if users <= ADMINS:
+        raise ValueError(f'Hacen falta más de {ADMINS} usuarios (los {ADMINS} primeros son administradores).')
+    rng = random.Random(seed)
+
+    with app.app_context():
+        db.create_all()
+        if db.session.execute(select(func.count()).select_from(Product)).scalar():
+            raise RuntimeError('La base de datos ya tiene productos: usa una vacía.')
+
+        _insert(Supplier, _suppliers(rng, suppliers), batch_size)
+        _insert(Product, _products(rng, products), batch_size)
+        product_rows = db.session.execute(select(Product.id, Product.precio)).all()
+        supplier_ids = db.session.execute(select(Supplier.id)).scalars().all()
+
+        # Cada producto tiene entre 1 y 3 proveedores
+        links = []
+        for product_id, _ in product_rows:
+            for supplier_id in rng.sample(supplier_ids, min(len(supplier_ids), rng.randint(1, 3))):
+                links.append({'product_id': product_id, 'supplier_id': supplier_id})
+        _insert(product_supplier_association, links, batch_size)
+
+        # Un solo hash para todos: calcular bcrypt un millón de veces no aporta nada
+        password_hash = User(username='plantilla', password=PASSWORD).password_hash
+        _insert(User, [{'username': f'admin{i}' if i < ADMINS else f'cliente{i - ADMINS}',
+                        'password_hash': password_hash,
+                        'role': 'admin' if i < ADMINS else 'cliente'}
+                       for i in range(users)], batch_size)
+        user_ids = db.session.execute(select(User.id).where(User.role == 'cliente')).scalars().all()
+        db.session.commit()
+
+        # Ventas: pedidos de 1 a 4 líneas (las líneas de un pedido comparten fecha).
+        # Unos pocos productos venden mucho más que el resto (distribución de Pareto).
+        start = datetime.utcnow() - timedelta(days=days)
+        seconds = days * 24 * 3600
+        # Acumulados una sola vez: con 'weights', random.choices los recalcula en cada llamada
+        cum_weights = list(itertools.accumulate(rng.paretovariate(1.2) for _ in product_rows))
+        batch, created = [], 0
+        while created < sales:
+            fecha = start + timedelta(seconds=rng.randrange(seconds))
+            user_id = rng.choice(user_ids)
+            lines = min(rng.randint(1, 4), sales - created)
+            for product_id, precio in rng.choices(product_rows, cum_weights=cum_weights, k=lines):
+                batch.append({'fecha': fecha, 'cantidad': rng.randint(1, 5), 'precio_unitario': precio,
+                              'user_id': user_id, 'product_id': product_id})
+            created += lines
+            if len(batch) >= batch_size:
+                db.session.execute(db.insert(Sale), batch)
+                batch = []
+        if batch:
+            db.session.execute(db.insert(Sale), batch)
+        db.session.commit()
+
+        sale_service.rebuild_sales_rollups()
+
+    return {'proveedores': suppliers, 'productos': products, 'usuarios': users, 'ventas': sales,
+            'relaciones_proveedor': len(links)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Genera datos sintéticos para las pruebas de carga.')
+    parser.add_argument('--database-url', required=True, help='BD vacía (p. ej. sqlite:///bench.db)')
+    parser.add_argument('--products', type=int, default=10_000)
+    parser.add_argument('--suppliers', type=int, default=200)
+    parser.add_argument('--users', type=int, default=1_000)
+    parser.add_argument('--sales', type=int, default=1_000_000)
+    parser.add_argument('--days', type=int, default=730, help='Días de historial de ventas')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': args.database_url, 'PASSWORD_WORKERS': 0})
+    start = time.perf_counter()
+    counts = seed_database(app, products=args.products, suppliers=args.suppliers, users=args.users,
+                           sales=args.sales, days=args.days, seed=args.seed)
+    elapsed = time.perf_counter() - start
+
+    print(', '.join(f'{total} {name}' for name, total in counts.items()) + f' en {elapsed:.1f} s')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
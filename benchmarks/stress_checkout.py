@@ -0,0 +1,132 @@
+"""
+Prueba de estrés del proceso de compra.
+
+Lanza miles de compras concurrentes (varios hilos, cada uno con su propio
+contexto de aplicación) contra un mismo producto y comprueba que:
+  - el stock nunca queda en negativo,
+  - las unidades vendidas coinciden con las ventas registradas,
+  - no se vende más de lo que había.
+
+Uso:
+    python -m benchmarks.stress_checkout --threads 16 --purchases 5000 --stock 2000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from app import create_app, db
+from app.models.product_model import Product
+from app.models.sale_model import Sale
+from app.models.user_model import User
+from app.services import sale_service
+
+
+def build_app(db_path):
+    return create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'MAIL_SUPPRESS_SEND': True,  # Las alertas se encolan pero no salen a Internet
+    })
+
+
+def setup_data(app, stock, objetivo):
+    with app.app_context():
+        db.create_all()
+        user = User(username='estres', password_hash='x', role='cliente')
+        product = Product(nombre='Ratón USB', referencia='STRESS-1', precio=9.99,
+                          cantidad_stock=stock, stock_objetivo=objetivo)
+        db.session.add_all([user, product])
+        db.session.commit()
+        return user.id, product.id
+
+
+def run(app, user_id, product_id, threads, purchases, max_qty, seed):
+    rng = random.Random(seed)
+    quantities = [rng.randint(1, max_qty) for _ in range(purchases)]
+    results = Counter()
+    results_lock = threading.Lock()
+    next_index = iter(range(purchases))
+    index_lock = threading.Lock()
+
+    def worker():
+        local = Counter()
+        with app.app_context():
+            while True:
+                with index_lock:
+                    i = next(next_index, None)
+                if i is None:
+                    break
+                success, _, outcome = sale_service.process_sale(user_id, product_id, quantities[i])
+                if success:
+                    local['ok'] += 1
+                    local['unidades'] += quantities[i]
+                elif outcome == sale_service.SALE_OUT_OF_STOCK:
+                    local['sin_stock'] += 1
+                else:
+                    local['error'] += 1
+            db.session.remove()
+        with results_lock:
+            results.update(local)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+def verify(app, product_id, stock_inicial, results):
+    with app.app_context():
+        product = db.session.get(Product, product_id)
+        vendidas = db.session.query(db.func.coalesce(db.func.sum(Sale.cantidad), 0)).scalar()
+        ventas = Sale.query.count()
+
+    checks = {
+        'stock_no_negativo': product.cantidad_stock >= 0,
+        'stock_cuadra_con_ventas': stock_inicial - product.cantidad_stock == vendidas,
+        'ventas_registradas': ventas == results['ok'],
+        'unidades_registradas': vendidas == results['unidades'],
+    }
+    return product.cantidad_stock, checks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Prueba de estrés de compras concurrentes.')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--purchases', type=int, default=5000)
+    parser.add_argument('--stock', type=int, default=2000)
+    parser.add_argument('--objetivo', type=int, default=100)
+    parser.add_argument('--max-qty', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = build_app(os.path.join(tmp, 'stress.db'))
+        user_id, product_id = setup_data(app, args.stock, args.objetivo)
+
+        results, elapsed = run(app, user_id, product_id, args.threads,
+                               args.purchases, args.max_qty, args.seed)
+        stock_final, checks = verify(app, product_id, args.stock, results)
+        app.extensions['notifier'].shutdown()
+
+    print(f"Compras intentadas: {args.purchases} en {args.threads} hilos")
+    print(f"  Vendidas:  {results['ok']} ({results['unidades']} unidades)")
+    print(f"  Sin stock: {results['sin_stock']}")
+    print(f"  Errores:   {results['error']}")
+    print(f"  Stock final: {stock_final} (inicial {args.stock})")
+    print(f"  Tiempo: {elapsed:.2f} s -> {args.purchases / elapsed:.0f} compras/s")
+    for name, ok in checks.items():
+        print(f"  [{'OK' if ok else 'FALLO'}] {name}")
+
+    return 0 if all(checks.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""Estado de las alertas de stock
+
+Revision ID: a5d9e2f7c318
+Revises: f3b8d2c6e157
+Create Date: 2026-10-18 18:02:44.731905
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5d9e2f7c318'
+down_revision = 'f3b8d2c6e157'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Sin batch_alter_table: en SQLite recrearía la tabla 'product' y se
+    # perderían los triggers de la búsqueda de texto completo.
+    op.add_column('product', sa.Column('alerta_estado', sa.String(length=10), server_default='armada',
+                                       nullable=False))
+    op.add_column('product', sa.Column('alerta_fecha', sa.DateTime(), nullable=True))
+    op.create_index('ix_product_alerta_estado', 'product', ['alerta_estado'], unique=False)
+
+    # Los productos que ya están bajo el umbral ya han recibido su aviso:
+    # no se repite hasta que se repongan.
+    op.execute("UPDATE product SET alerta_estado = 'notificada' "
+               "WHERE stock_objetivo > 0 AND cantidad_stock * 10 <= stock_objetivo")
+
+
+def downgrade():
+    op.drop_index('ix_product_alerta_estado', table_name='product')
+    op.drop_column('product', 'alerta_fecha')
+    op.drop_column('product', 'alerta_estado')
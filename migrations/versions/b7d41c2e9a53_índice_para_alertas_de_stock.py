@@ -0,0 +1,27 @@
+"""Índice para alertas de stock
+
+Revision ID: b7d41c2e9a53
+Revises: 3fb59995c7e6
+Create Date: 2026-10-18 10:05:12.418230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d41c2e9a53'
+down_revision = '3fb59995c7e6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Índice sobre la expresión que usa Product.stock_alert en SQL
+    # (cantidad_stock * 10 - stock_objetivo <= 0  <=>  stock <= 10% del objetivo)
+    op.create_index('ix_product_stock_alert', 'product',
+                    [sa.text('cantidad_stock * 10 - stock_objetivo')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_product_stock_alert', table_name='product')
@@ -0,0 +1,63 @@
+"""Búsqueda de texto completo de productos (FTS5)
+
+Revision ID: d5f0b3a8c217
+Revises: c2a9e7f14d86
+Create Date: 2026-10-18 13:20:05.771642
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5f0b3a8c217'
+down_revision = 'c2a9e7f14d86'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 solo existe en SQLite: en otros motores la búsqueda sigue con ilike
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+            nombre, referencia, descripcion,
+            content='product', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    """)
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS product_fts_ai AFTER INSERT ON product BEGIN
+            INSERT INTO product_fts(rowid, nombre, referencia, descripcion)
+            VALUES (new.id, new.nombre, new.referencia, new.descripcion);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS product_fts_ad AFTER DELETE ON product BEGIN
+            INSERT INTO product_fts(product_fts, rowid, nombre, referencia, descripcion)
+            VALUES ('delete', old.id, old.nombre, old.referencia, old.descripcion);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS product_fts_au AFTER UPDATE OF nombre, referencia, descripcion ON product BEGIN
+            INSERT INTO product_fts(product_fts, rowid, nombre, referencia, descripcion)
+            VALUES ('delete', old.id, old.nombre, old.referencia, old.descripcion);
+            INSERT INTO product_fts(rowid, nombre, referencia, descripcion)
+            VALUES (new.id, new.nombre, new.referencia, new.descripcion);
+        END
+    """)
+
+    # Indexar los productos que ya existían
+    op.execute("INSERT INTO product_fts(product_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS product_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS product_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS product_fts_ai")
+    op.execute("DROP TABLE IF EXISTS product_fts")
@@ -0,0 +1,86 @@
+"""
+Fixtures comunes: una app con SQLite en memoria (tablas nuevas en cada
+prueba), un servidor SMTP local (app/mail_stub.py) y usuarios de prueba.
+
+Ejecutar desde la raíz del proyecto:
+    python -m pytest -q
+"""
+import pytest
+
+from app import create_app, db, notifier
+from app.mail_stub import LocalSMTPServer
+from tests.helpers import login, make_user
+
+TEST_CONFIG = {
+    'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+    'WTF_CSRF_ENABLED': False,
+    'BCRYPT_LOG_ROUNDS': 4,
+    'PASSWORD_WORKERS': 0,  # bcrypt en el propio hilo
+    'SQL_PROFILER_ENABLED': False,
+    # Sin servidor de correo por defecto: las pruebas de correo usan el fixture 'smtp'
+    'MAIL_SUPPRESS_SEND': True,
+    'MAIL_SERVER': '127.0.0.1',
+    'MAIL_USE_TLS': False,
+    'MAIL_USERNAME': None,
+    'MAIL_PASSWORD': None,
+    'MAIL_RETRY_BACKOFF': 0.01,
+}
+
+
+@pytest.fixture
+def smtp():
+    """Servidor SMTP local en un puerto libre; 'smtp.messages' guarda lo recibido."""
+    with LocalSMTPServer(port=0) as server:
+        yield server
+
+
+def _make_app(config):
+    app = create_app(dict(TEST_CONFIG, **config))
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    notifier.shutdown()  # El notificador es global: que la siguiente app arranque sus hilos
+
+
+@pytest.fixture
+def app(request):
+    """
+    App de pruebas. Configuración extra con el marcador:
+        @pytest.mark.app_config(STOCK_ALERT_DIGEST=True)
+    """
+    marker = request.node.get_closest_marker('app_config')
+    yield from _make_app(marker.kwargs if marker else {})
+
+
+@pytest.fixture
+def mail_app(smtp, request):
+    """App que envía los correos de verdad al servidor SMTP local."""
+    marker = request.node.get_closest_marker('app_config')
+    config = dict(marker.kwargs if marker else {}, MAIL_SUPPRESS_SEND=False, MAIL_PORT=smtp.port)
+    yield from _make_app(config)
+
+
+@pytest.fixture
+def admin(app):
+    return make_user('admin', role='admin')
+
+
+@pytest.fixture
+def customer(app):
+    return make_user('cliente', role='cliente')
+
+
+@pytest.fixture
+def admin_client(app, admin):
+    client = app.test_client()
+    login(client, 'admin')
+    return client
+
+
+@pytest.fixture
+def customer_client(app, customer):
+    client = app.test_client()
+    login(client, 'cliente')
+    return client
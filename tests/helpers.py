@@ -0,0 +1,40 @@
+"""Datos de prueba y utilidades para las pruebas (las fixtures están en conftest.py)."""
+from email.header import decode_header, make_header
+
+from app import db
+from app.models.product_model import Product
+from app.models.supplier_model import Supplier
+from app.models.user_model import User
+
+
+def make_user(username, password='secreto123', role='cliente'):
+    user = User(username=username, role=role)
+    user.password = password
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def make_product(nombre, stock=100, objetivo=100, precio=10.0, referencia=None, suppliers=()):
+    product = Product(nombre=nombre, referencia=referencia or nombre.upper(), precio=precio,
+                      cantidad_stock=stock, stock_objetivo=objetivo)
+    product.suppliers.extend(suppliers)
+    db.session.add(product)
+    db.session.commit()
+    return product
+
+
+def make_supplier(nombre, **fields):
+    supplier = Supplier(nombre_empresa=nombre, **fields)
+    db.session.add(supplier)
+    db.session.commit()
+    return supplier
+
+
+def login(client, username, password='secreto123'):
+    return client.post('/login', data={'username': username, 'password': password})
+
+
+def subjects(smtp):
+    """Asuntos (decodificados) de los correos recibidos por el SMTP local."""
+    return [str(make_header(decode_header(message['Subject']))) for message in smtp.messages]
@@ -0,0 +1,71 @@
+"""Alertas de stock: un solo aviso por bajada, rearme y resumen periódico (alert_service)."""
+import pytest
+
+from app import db, notifier
+from app.models.product_model import ALERT_ARMED, ALERT_NOTIFIED, ALERT_PENDING, Product
+from app.services import alert_service, sale_service
+from tests.helpers import make_product, make_user, subjects
+
+
+def _state(product_id):
+    return db.session.get(Product, product_id, populate_existing=True).alerta_estado
+
+
+def test_two_sales_below_threshold_send_one_alert(mail_app, smtp):
+    customer = make_user('cliente')  # El fixture 'customer' crearía otra app
+    product = make_product('Ratón', stock=12, objetivo=100)
+
+    sale_service.process_sale(customer.id, product.id, 3)  # 9 < 10% del objetivo
+    sale_service.process_sale(customer.id, product.id, 1)
+
+    assert notifier.drain(timeout=5)
+    assert subjects(smtp) == ['⚠️ Alerta de Stock: Ratón']
+    assert _state(product.id) == ALERT_NOTIFIED
+
+
+def test_restock_above_band_rearms_the_alert(app, customer):
+    product = make_product('Ratón', stock=12, objetivo=100)
+    sale_service.process_sale(customer.id, product.id, 3)
+
+    product.cantidad_stock = 15  # Dentro de la banda (<= 20%): sigue avisado
+    db.session.commit()
+    assert alert_service.rearm_alerts([product.id]) == 0
+
+    product.cantidad_stock = 21
+    db.session.commit()
+    assert alert_service.rearm_alerts([product.id]) == 1
+    assert _state(product.id) == ALERT_ARMED
+
+
+@pytest.mark.app_config(STOCK_ALERT_DIGEST=True)
+def test_digest_sends_one_mail_for_every_pending_alert(mail_app, smtp):
+    customer = make_user('cliente')
+    mouse = make_product('Ratón', stock=12, objetivo=100)
+    keyboard = make_product('Teclado', stock=5, objetivo=20)
+    sale_service.process_cart(customer.id, [(mouse.id, 3), (keyboard.id, 4)])
+    assert (_state(mouse.id), _state(keyboard.id)) == (ALERT_PENDING, ALERT_PENDING)
+
+    assert alert_service.send_alert_digest() == 2
+    assert alert_service.send_alert_digest() == 0  # Ya no queda nada pendiente
+
+    assert notifier.drain(timeout=5)
+    assert subjects(smtp) == ['⚠️ Resumen de Alertas de Stock: 2 producto(s)']
+    assert (_state(mouse.id), _state(keyboard.id)) == (ALERT_NOTIFIED, ALERT_NOTIFIED)
+
+
+@pytest.mark.app_config(STOCK_ALERT_DIGEST=True)
+def test_digest_is_enqueued_after_commit_and_released_on_failure(app, customer, monkeypatch):
+    product = make_product('Ratón', stock=12, objetivo=100)
+    sale_service.process_sale(customer.id, product.id, 3)
+    states = []
+
+    def failing_digest(rows):
+        db.session.rollback()  # Si el cambio de estado no estuviera confirmado, se perdería
+        states.append(_state(product.id))
+        return False
+
+    monkeypatch.setattr(alert_service, 'send_stock_digest', failing_digest)
+
+    assert alert_service.send_alert_digest() == 0
+    assert states == [ALERT_NOTIFIED]
+    assert _state(product.id) == ALERT_PENDING  # Entra en el próximo resumen
@@ -0,0 +1,92 @@
+"""API JSON (/api/v1): pedidos, respuestas condicionales y niveles de stock."""
+import pytest
+
+from app.services import sale_service
+from tests.helpers import make_product
+
+
+@pytest.mark.parametrize('items, status', [
+    ([], 400),
+    ([{'product_id': 1, 'cantidad': -1}], 400),
+    ([{'product_id': 999, 'cantidad': 1}], 404),
+    ([{'product_id': 1, 'cantidad': 50}], 409),
+    ([{'product_id': 1, 'cantidad': 2}], 201),
+])
+def test_checkout_status_codes(app, customer_client, items, status):
+    make_product('Ratón', stock=5)
+
+    response = customer_client.post('/api/v1/pedidos', json={'items': items})
+
+    assert response.status_code == status
+    assert response.get_json()['ok'] is (status == 201)
+
+
+def test_checkout_status_does_not_depend_on_message_text(app, customer_client, monkeypatch):
+    monkeypatch.setattr(sale_service, '_process_cart',
+                        lambda user_id, lines: (False, 'Mensaje reescrito', sale_service.SALE_OUT_OF_STOCK))
+
+    response = customer_client.post('/api/v1/pedidos', json={'items': [{'product_id': 1, 'cantidad': 1}]})
+
+    assert response.status_code == 409
+
+
+def test_checkout_requires_json(app, customer_client):
+    assert customer_client.post('/api/v1/pedidos', data={'product_id': 1}).status_code == 415
+
+
+def test_if_modified_since_sees_two_writes_in_the_same_second(app, customer_client, monkeypatch):
+    from app import cache
+    from app.routes import api_routes
+
+    make_product('Ratón', stock=5)
+    clock = [1_000_000.2]
+    monkeypatch.setattr(api_routes.time, 'time', lambda: clock[0])
+    monkeypatch.setattr(cache, 'last_modified', lambda: 1_000_000.1)
+
+    first = customer_client.get('/api/v1/stock')
+    since = first.headers['Last-Modified']
+
+    # Segunda escritura en el mismo segundo; el cliente revalida solo por fecha
+    monkeypatch.setattr(cache, 'last_modified', lambda: 1_000_000.7)
+    clock[0] = 1_000_003.0
+    second = customer_client.get('/api/v1/stock', headers={'If-Modified-Since': since})
+    assert second.status_code == 200
+
+    third = customer_client.get('/api/v1/stock', headers={'If-Modified-Since': second.headers['Last-Modified']})
+    assert third.status_code == 304
+
+
+def test_etag_revalidation(app, customer_client):
+    make_product('Ratón', stock=5)
+
+    first = customer_client.get('/api/v1/productos')
+    assert customer_client.get('/api/v1/productos', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    customer_client.post('/api/v1/pedidos', json={'items': [{'product_id': 1, 'cantidad': 1}]})
+    assert customer_client.get('/api/v1/productos', headers={'If-None-Match': first.headers['ETag']}).status_code == 200
+
+
+def test_stock_is_paged_by_cursor(app, customer_client):
+    for i in range(5):
+        make_product(f'Producto {i}', stock=i, objetivo=100)
+
+    first = customer_client.get('/api/v1/stock?limit=2&fields=nombre,cantidad_stock').get_json()
+    assert first['items'] == [{'nombre': 'Producto 0', 'cantidad_stock': 0},
+                              {'nombre': 'Producto 1', 'cantidad_stock': 1}]
+
+    names = [item['nombre'] for item in first['items']]
+    cursor = first['next_cursor']
+    while cursor:
+        page = customer_client.get(f'/api/v1/stock?limit=2&after={cursor}').get_json()
+        names += [item['nombre'] for item in page['items']]
+        cursor = page['next_cursor']
+    assert names == [f'Producto {i}' for i in range(5)]
+
+
+def test_stock_alerts_only(app, customer_client):
+    make_product('Agotado', stock=1, objetivo=100)
+    make_product('Lleno', stock=100, objetivo=100)
+
+    items = customer_client.get('/api/v1/stock?alertas=1&fields=nombre,stock_alert').get_json()['items']
+
+    assert items == [{'nombre': 'Agotado', 'stock_alert': True}]
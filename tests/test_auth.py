@@ -0,0 +1,70 @@
+"""Inicio de sesión y registro cuando el pool de bcrypt está saturado."""
+import atexit
+
+from app import passwords
+from app.passwords import PasswordHasher, PasswordHasherBusy
+from tests.helpers import login, make_user
+
+
+def _saturate(monkeypatch):
+    def busy(fn, *args):
+        raise PasswordHasherBusy('Demasiados inicios de sesión a la vez.')
+
+    monkeypatch.setattr(passwords, '_execute', busy)
+
+
+def test_wrong_password_is_rejected(app):
+    make_user('ana')
+
+    response = login(app.test_client(), 'ana', 'otra-clave')
+
+    assert response.status_code == 200
+    assert 'Inicio de sesión fallido' in response.get_data(as_text=True)
+
+
+def test_busy_hasher_asks_to_retry_instead_of_rejecting_credentials(app, monkeypatch):
+    make_user('ana')
+    _saturate(monkeypatch)
+
+    response = login(app.test_client(), 'ana')
+
+    body = response.get_data(as_text=True)
+    assert response.status_code == 503
+    assert response.headers['Retry-After']
+    assert 'servidor está ocupado' in body
+    assert 'Inicio de sesión fallido' not in body
+
+
+def test_busy_attempts_do_not_count_against_the_rate_limit(app, monkeypatch):
+    make_user('ana')
+    client = app.test_client()
+    _saturate(monkeypatch)
+
+    limit, _ = app.config['RATE_LIMITS']['login']['username']
+    for _ in range(limit + 2):
+        assert login(client, 'ana').status_code == 503
+
+    monkeypatch.undo()
+    response = login(client, 'ana')
+    assert response.status_code == 302  # Entra: los intentos ocupados no gastaron fichas
+
+
+def test_busy_hasher_on_register(app, monkeypatch):
+    _saturate(monkeypatch)
+
+    response = app.test_client().post('/register', data={
+        'username': 'nuevo', 'password': 'secreto123', 'confirm_password': 'secreto123'})
+
+    assert response.status_code == 503
+    assert 'servidor está ocupado' in response.get_data(as_text=True)
+
+
+def test_shutdown_hook_is_registered_once(app, monkeypatch):
+    registered = []
+    monkeypatch.setattr(atexit, 'register', registered.append)
+    hasher = PasswordHasher()
+
+    for _ in range(3):
+        hasher.init_app(app)
+
+    assert registered == [hasher.shutdown]
@@ -0,0 +1,116 @@
+"""Caché del catálogo con versión global (app/cache.py), con los dos backends."""
+import time
+
+import pytest
+from flask import Flask
+
+from app.cache import CatalogCache, SQLiteCacheBackend
+from app.services import product_service
+from tests.helpers import make_product
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def catalog_cache(request, tmp_path):
+    app = Flask(__name__, instance_path=str(tmp_path))
+    app.config.update(CACHE_BACKEND=request.param, CACHE_PATH=str(tmp_path / 'cache.db'))
+    return CatalogCache(app)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Reloj de pruebas: 'clock.now' es lo que devuelve time.time()."""
+    class Clock:
+        now = time.time()
+
+    monkeypatch.setattr(time, 'time', lambda: Clock.now)
+    return Clock
+
+
+def test_remember_loads_once_per_version(catalog_cache):
+    catalogue = ['Ratón']
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return list(catalogue)
+
+    assert catalog_cache.remember('products', loader) == ['Ratón']
+    catalogue.append('Teclado')  # Escritura sin 'bump()': se sigue sirviendo lo guardado
+    assert catalog_cache.remember('products', loader) == ['Ratón']
+
+    catalog_cache.bump()
+
+    assert catalog_cache.remember('products', loader) == ['Ratón', 'Teclado']
+    assert len(loads) == 2
+
+
+def test_failed_loader_caches_nothing(catalog_cache):
+    def broken():
+        raise RuntimeError('BD caída')
+
+    with pytest.raises(RuntimeError):
+        catalog_cache.remember('products', broken)
+    assert catalog_cache.remember('products', lambda: 'ok') == 'ok'
+
+
+def test_entries_expire_after_their_ttl(catalog_cache, clock):
+    catalog_cache.remember('stats', lambda: 1, ttl=60)
+    catalog_cache.set('user:1', 'admin', ttl=60)
+
+    clock.now += 59
+    assert catalog_cache.remember('stats', lambda: 2, ttl=60) == 1
+    assert catalog_cache.get('user:1') == 'admin'
+
+    clock.now += 2
+    assert catalog_cache.remember('stats', lambda: 2, ttl=60) == 2
+    assert catalog_cache.get('user:1') is None
+
+
+def test_unversioned_entries_survive_bump(catalog_cache):
+    catalog_cache.set('user:1', 'admin')
+
+    catalog_cache.bump()
+
+    assert catalog_cache.get('user:1') == 'admin'
+    catalog_cache.delete('user:1')
+    assert catalog_cache.get('user:1') is None
+
+
+def test_bump_records_last_modified(catalog_cache, clock):
+    clock.now = 1_700_000_000.0
+    catalog_cache.bump()
+    clock.now += 30
+
+    assert catalog_cache.last_modified() == 1_700_000_000.0
+
+
+def test_lru_drops_the_least_recently_used(tmp_path):
+    app = Flask(__name__, instance_path=str(tmp_path))
+    app.config.update(CACHE_MAX_ENTRIES=2)
+    catalog_cache = CatalogCache(app)
+    catalog_cache.set('a', 1)
+    catalog_cache.set('b', 2)
+    catalog_cache.get('a')
+
+    catalog_cache.set('c', 3)
+
+    assert (catalog_cache.get('a'), catalog_cache.get('b'), catalog_cache.get('c')) == (1, None, 3)
+
+
+def test_sqlite_backend_shares_the_version_between_processes(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    worker_a, worker_b = SQLiteCacheBackend(path), SQLiteCacheBackend(path)
+
+    version = worker_a.bump_version()
+
+    assert worker_b.get_version() == version
+
+
+def test_service_reads_are_fresh_after_a_write(app):
+    mouse = make_product('Ratón')
+    make_product('Teclado')
+    assert [p.nombre for p in product_service.get_all_products()] == ['Ratón', 'Teclado']
+
+    assert product_service.delete_product(mouse.id)  # Hace 'bump()'
+
+    assert [p.nombre for p in product_service.get_all_products()] == ['Teclado']
@@ -0,0 +1,17 @@
+"""Cursores de la paginación por clave (app/cursors.py)."""
+from datetime import datetime
+
+from app.cursors import decode_key, encode_key
+
+
+def test_round_trip_with_types():
+    cursor = encode_key([datetime(2026, 1, 2, 3, 4).isoformat(), 7])
+
+    assert decode_key(cursor, (datetime.fromisoformat, int)) == (datetime(2026, 1, 2, 3, 4), 7)
+
+
+def test_invalid_cursors_are_ignored():
+    assert decode_key(None, (str, int)) is None
+    assert decode_key('no-es-base64!', (str, int)) is None
+    assert decode_key(encode_key(['solo uno']), (str, int)) is None
+    assert decode_key(encode_key(['x', 'no es un número']), (str, int)) is None
@@ -0,0 +1,51 @@
+"""Importación de productos por lotes (import_service.import_products)."""
+import io
+
+from sqlalchemy import text
+
+from app import db
+from app.models.product_model import Product
+from app.services import import_service
+from tests.helpers import make_product
+
+HEADER = 'nombre;referencia;precio;cantidad_stock;stock_objetivo\n'
+
+
+def _csv(*lines):
+    return io.StringIO(HEADER + ''.join(line + '\n' for line in lines))
+
+
+def test_import_creates_and_updates_by_reference(app):
+    make_product('Ratón', stock=5, referencia='RAT-1')
+
+    result = import_service.import_products(
+        _csv('Ratón inalámbrico;RAT-1;12,50;40;50', 'Teclado;TEC-1;20;10;20'), 'csv')
+
+    assert (result['filas'], result['creados'], result['actualizados']) == (2, 1, 1)
+    assert result['errores'] == []
+    mouse = Product.query.filter_by(referencia='RAT-1').one()
+    assert (mouse.nombre, mouse.precio, mouse.cantidad_stock) == ('Ratón inalámbrico', 12.5, 40)
+
+
+def test_invalid_rows_are_reported_without_stopping(app):
+    result = import_service.import_products(
+        _csv('Ratón;RAT-1;5;10;20', 'Sin referencia;;5;10;20', 'Teclado;TEC-1;abc;10;20'), 'csv')
+
+    assert result['creados'] == 1
+    assert [e['fila'] for e in result['errores']] == [3, 4]
+
+
+def test_rejected_row_does_not_sink_the_rest_of_the_batch(app):
+    # La base de datos rechaza una fila que ha pasado la validación
+    db.session.execute(text(
+        "CREATE TRIGGER rechaza_mala BEFORE INSERT ON product WHEN NEW.referencia = 'MALA' "
+        "BEGIN SELECT RAISE(ABORT, 'referencia rechazada'); END"))
+    db.session.commit()
+    lines = [f'Producto {i};REF-{i};5;10;20' for i in range(7)]
+    lines.insert(4, 'Producto malo;MALA;5;10;20')
+
+    result = import_service.import_products(_csv(*lines), 'csv', batch_size=8)
+
+    assert result['creados'] == 7
+    assert [(e['fila'], e['referencia']) for e in result['errores']] == [(6, 'MALA')]
+    assert Product.query.count() == 7
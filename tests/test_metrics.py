@@ -0,0 +1,39 @@
+"""Métricas de Prometheus en /metrics (app/metrics.py)."""
+import pytest
+
+prometheus_client = pytest.importorskip('prometheus_client')
+
+from app import create_app, db  # noqa: E402
+from tests.conftest import TEST_CONFIG  # noqa: E402
+
+
+def test_metrics_are_private_without_a_token(app):
+    assert app.test_client().get('/metrics').status_code == 403
+
+
+def test_metrics_are_public_in_debug_without_a_token(app):
+    app.debug = True
+
+    response = app.test_client().get('/metrics')
+
+    assert response.status_code == 200
+    assert b'app_request_duration_seconds' in response.data
+
+
+@pytest.mark.app_config(METRICS_TOKEN='secreto')
+def test_metrics_require_the_bearer_token(app):
+    client = app.test_client()
+
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer otro'}).status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer secreto'}).status_code == 200
+
+
+def test_pool_size_is_not_added_up_by_each_app(tmp_path):
+    config = dict(TEST_CONFIG, SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "metrics.db"}')
+    for _ in range(3):
+        app = create_app(config)
+
+    with app.app_context():
+        size = db.engine.pool.size()
+    assert prometheus_client.REGISTRY.get_sample_value('app_db_pool_size') == size
@@ -0,0 +1,112 @@
+"""Envío de correos en segundo plano (app/notifications.py) contra el SMTP local."""
+import atexit
+import threading
+import time
+
+import pytest
+from flask_mail import Message
+
+from app import notifier
+from app.notifications import NotificationDispatcher
+from app.services import alert_service
+from tests.helpers import make_product, subjects
+
+
+def _message(subject):
+    return Message(subject=subject, sender='noreply@tutienda.com', recipients=['admin@tutienda.com'],
+                   body='Prueba')
+
+
+def test_delivers_queued_messages_over_one_connection(mail_app, smtp):
+    for i in range(3):
+        assert notifier.enqueue(_message(f'Correo {i}'))
+
+    assert notifier.drain(timeout=5)
+    assert subjects(smtp) == ['Correo 0', 'Correo 1', 'Correo 2']
+    assert smtp.messages[0]['X-Envelope-To'] == 'admin@tutienda.com'
+    assert smtp.connections == 1  # La conexión SMTP se reutiliza
+
+
+@pytest.mark.app_config(MAIL_MAX_RETRIES=3, MAIL_RETRY_BACKOFF=0.01)
+def test_retries_with_exponential_backoff(mail_app, smtp, monkeypatch):
+    mail = mail_app.extensions['mail']
+    real_connect, failures = mail.connect, []
+
+    def flaky_connect():
+        if len(failures) < 2:
+            failures.append(1)
+            raise ConnectionRefusedError('SMTP caído')
+        return real_connect()
+
+    waits, real_sleep = [], time.sleep
+
+    def recording_sleep(seconds):
+        if threading.current_thread().name.startswith('mail-worker'):
+            waits.append(seconds)
+        real_sleep(seconds)
+
+    monkeypatch.setattr(mail, 'connect', flaky_connect)
+    monkeypatch.setattr(time, 'sleep', recording_sleep)
+
+    notifier.enqueue(_message('Reintentado'))
+    assert notifier.drain(timeout=5)
+
+    assert subjects(smtp) == ['Reintentado']
+    assert waits == [0.01, 0.02]  # Se duplica en cada intento
+
+
+@pytest.mark.app_config(MAIL_MAX_RETRIES=1, MAIL_RETRY_BACKOFF=0.0)
+def test_gives_up_after_max_retries(mail_app, smtp, monkeypatch):
+    attempts = []
+
+    def broken_connect():
+        attempts.append(1)
+        raise ConnectionRefusedError('SMTP caído')
+
+    monkeypatch.setattr(mail_app.extensions['mail'], 'connect', broken_connect)
+
+    notifier.enqueue(_message('Perdido'))
+    notifier.enqueue(_message('También perdido'))
+    assert notifier.drain(timeout=5)
+
+    assert smtp.messages == []
+    assert len(attempts) == 4  # 2 intentos por correo, y el worker sigue vivo
+
+
+@pytest.mark.app_config(MAIL_QUEUE_MAXSIZE=2)
+def test_drops_messages_when_queue_is_full(mail_app, smtp, monkeypatch):
+    monkeypatch.setattr(notifier, '_ensure_workers', lambda: None)  # Nadie vacía la cola
+
+    assert notifier.enqueue(_message('1'))
+    assert notifier.enqueue(_message('2'))
+    assert not notifier.enqueue(_message('3'))  # No bloquea: se descarta
+
+
+def test_shutdown_drains_queue_and_rejects_new_messages(mail_app, smtp):
+    smtp.delay = 0.005  # Servidor lento: la cola sigue llena al apagar
+    for i in range(5):
+        notifier.enqueue(_message(f'Pendiente {i}'))
+
+    notifier.shutdown()
+
+    assert len(smtp.messages) == 5
+    assert not notifier.enqueue(_message('Tarde'))
+
+
+def test_stock_alert_reaches_smtp(mail_app, smtp):
+    product = make_product('Ratón', stock=5, objetivo=100)
+    alert_service.notify([product])
+
+    assert notifier.drain(timeout=5)
+    assert subjects(smtp) == ['⚠️ Alerta de Stock: Ratón']
+
+
+def test_shutdown_hook_is_registered_once(app, monkeypatch):
+    registered = []
+    monkeypatch.setattr(atexit, 'register', registered.append)
+    dispatcher = NotificationDispatcher()
+
+    for _ in range(3):
+        dispatcher.init_app(app)
+
+    assert registered == [dispatcher.shutdown]
@@ -0,0 +1,129 @@
+"""Pedidos de compra a proveedores: creación y recepción en una sola transacción (purchase_service)."""
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models.product_model import ALERT_ARMED, ALERT_NOTIFIED, Product
+from app.models.purchase_order_model import ORDER_CANCELLED, ORDER_OPEN, ORDER_RECEIVED, PurchaseOrder
+from app.services import alert_service, purchase_service
+from tests.helpers import make_product, make_supplier
+
+
+def _stock(product_id):
+    return db.session.get(Product, product_id, populate_existing=True).cantidad_stock
+
+
+def _order(order_id):
+    return db.session.get(PurchaseOrder, order_id, populate_existing=True)
+
+
+@pytest.fixture
+def supplier(app):
+    return make_supplier('Distribuciones Norte')
+
+
+def test_parse_order_lines_resolves_references(app):
+    mouse = make_product('Ratón', referencia='RAT-1')
+    keyboard = make_product('Teclado', referencia='TEC-1')
+
+    lines = purchase_service.parse_order_lines('RAT-1, 10\n# comentario\n\nTEC-1;5\nRAT-1\t2')
+
+    assert lines == [(mouse.id, 10), (keyboard.id, 5), (mouse.id, 2)]
+    with pytest.raises(ValueError, match='línea 1'):
+        purchase_service.parse_order_lines('RAT-1 diez')
+    with pytest.raises(ValueError, match='NO-EXISTE'):
+        purchase_service.parse_order_lines('NO-EXISTE, 1')
+
+
+def test_create_merges_repeated_products(app, supplier):
+    mouse = make_product('Ratón', precio=5.0)
+
+    order, _ = purchase_service.create_purchase_order(supplier.id, [(mouse.id, 3), (mouse.id, 2)])
+
+    assert [(line.product_id, line.cantidad, line.precio_unitario) for line in order.lines] == [(mouse.id, 5, 5.0)]
+    assert order.estado == ORDER_OPEN
+
+
+def test_receive_adds_stock_and_rearms_alerts(app, supplier):
+    mouse = make_product('Ratón', stock=5, objetivo=100)
+    keyboard = make_product('Teclado', stock=50, objetivo=100)
+    mouse.alerta_estado = ALERT_NOTIFIED
+    db.session.commit()
+    order, _ = purchase_service.create_purchase_order(supplier.id, [(mouse.id, 40), (keyboard.id, 10)])
+    keyboard_line = next(line.id for line in order.lines if line.product_id == keyboard.id)
+
+    success, message = purchase_service.receive_purchase_order(order.id, {keyboard_line: 4})
+
+    assert success, message
+    assert (_stock(mouse.id), _stock(keyboard.id)) == (45, 54)  # Del teclado solo llegaron 4
+    assert db.session.get(Product, mouse.id).alerta_estado == ALERT_ARMED
+    assert _order(order.id).estado == ORDER_RECEIVED
+    assert sorted(line.cantidad_recibida for line in _order(order.id).lines) == [4, 40]
+
+
+def test_order_cannot_be_received_twice(app, supplier):
+    mouse = make_product('Ratón', stock=5)
+    order, _ = purchase_service.create_purchase_order(supplier.id, [(mouse.id, 10)])
+
+    assert purchase_service.receive_purchase_order(order.id)[0]
+    success, message = purchase_service.receive_purchase_order(order.id)
+
+    assert not success and 'ya está recibido' in message
+    assert _stock(mouse.id) == 15
+
+
+def test_cancelled_or_unknown_orders_are_not_received(app, supplier):
+    mouse = make_product('Ratón', stock=5)
+    order, _ = purchase_service.create_purchase_order(supplier.id, [(mouse.id, 10)])
+    assert purchase_service.cancel_purchase_order(order.id)[0]
+
+    assert purchase_service.receive_purchase_order(order.id) == (False, f'El pedido #{order.id} ya está cancelado.')
+    assert purchase_service.receive_purchase_order(9999) == (False, 'Pedido no encontrado.')
+    assert _order(order.id).estado == ORDER_CANCELLED
+    assert _stock(mouse.id) == 5
+
+
+def test_lines_from_another_order_are_rejected(app, supplier):
+    mouse = make_product('Ratón', stock=5)
+    first, _ = purchase_service.create_purchase_order(supplier.id, [(mouse.id, 10)])
+    second, _ = purchase_service.create_purchase_order(supplier.id, [(mouse.id, 10)])
+
+    success, _ = purchase_service.receive_purchase_order(first.id, {second.lines[0].id: 1})
+
+    assert not success
+    assert _order(first.id).estado == ORDER_OPEN
+
+
+def test_failed_receive_rolls_back_everything(app, supplier, monkeypatch):
+    mouse = make_product('Ratón', stock=5)
+    order, _ = purchase_service.create_purchase_order(supplier.id, [(mouse.id, 10)])
+
+    def broken_rearm(product_ids=None):
+        raise RuntimeError('fallo a mitad de la recepción')
+
+    monkeypatch.setattr(alert_service, 'rearm_alerts', broken_rearm)
+
+    assert purchase_service.receive_purchase_order(order.id) == (False, 'Error al recibir el pedido.')
+    assert _order(order.id).estado == ORDER_OPEN
+    assert _stock(mouse.id) == 5
+
+
+def _statements_to_receive(supplier, products):
+    order, _ = purchase_service.create_purchase_order(supplier.id, [(product.id, 1) for product in products])
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        assert purchase_service.receive_purchase_order(order.id)[0]
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    return len(statements)
+
+
+def test_receive_statement_count_does_not_depend_on_lines(app, supplier):
+    products = [make_product(f'Producto {i}') for i in range(20)]
+
+    assert _statements_to_receive(supplier, products[:2]) == _statements_to_receive(supplier, products)
@@ -0,0 +1,50 @@
+"""Planes de ejecución de las consultas calientes (app/query_plans.py)."""
+from datetime import date, timedelta
+
+import pytest
+
+from app import cache
+from app.query_plans import capture_statements, explain, plan_problems
+from app.services import product_service, sale_service
+from tests.helpers import make_product
+
+
+def _plans(fn):
+    cache.bump()  # Que la consulta llegue a la BD
+    return [explain(statement, parameters) for statement, parameters in capture_statements(fn)]
+
+
+def test_stock_alerts_search_the_alert_index(app):
+    for i in range(30):
+        make_product(f'Producto {i:02}', stock=5 if i % 10 == 0 else 80, objetivo=100)
+
+    plans = _plans(product_service.get_stock_alerts)
+
+    assert len(plans) == 1
+    assert any(line.startswith('SEARCH product USING INDEX ix_product_stock_alert') for line in plans[0]), plans
+    assert [p.nombre for p in product_service.get_stock_alerts()] == ['Producto 00', 'Producto 10', 'Producto 20']
+
+
+@pytest.mark.parametrize('line, problems', [
+    ('SCAN product', ['SCAN product']),
+    ('SCAN product USING INDEX ix_product_nombre_id', ['SCAN product USING INDEX ix_product_nombre_id']),
+    ('SCAN sale USING INDEX ix_sale_fecha_id', ['SCAN sale USING INDEX ix_sale_fecha_id']),
+    ('SCAN sales_daily USING COVERING INDEX ix_sales_daily_product_dia_unidades',
+     ['SCAN sales_daily USING INDEX ix_sales_daily_product_dia_unidades']),
+    ('SCAN product_1', ['SCAN product']),  # Alias de SQLAlchemy
+    ('SEARCH product USING INDEX ix_product_stock_alert (<expr><?)', []),
+    ('SEARCH sale USING INTEGER PRIMARY KEY (rowid=?)', []),
+    ('SCAN anon_1', []),  # Subconsulta materializada, no una tabla
+    ('SCAN CONSTANT ROW', []),
+    ('USE TEMP B-TREE FOR ORDER BY', ['ORDER BY sin índice']),
+    ('USE TEMP B-TREE FOR GROUP BY', []),
+])
+def test_plan_problems(app, line, problems):
+    assert plan_problems([line]) == problems
+
+
+def test_top_sellers_search_the_date_range(app):
+    plans = _plans(lambda: sale_service.get_top_sellers(start=date.today() - timedelta(days=7)))
+
+    assert len(plans) == 1
+    assert not [p for p in plan_problems(plans[0]) if p.startswith('SCAN')], plans
@@ -0,0 +1,83 @@
+"""Límite de intentos de login/registro con cubos de fichas (app/ratelimit.py)."""
+import pytest
+
+from app import limiter
+from app.ratelimit import MemoryRateLimitBackend, SQLiteRateLimitBackend
+from tests.helpers import login, make_user
+
+LIMITS = {'login': {'ip': (3, 60), 'username': (2, 60)}}
+
+
+def _client(app, ip):
+    client = app.test_client()
+    client.environ_base['REMOTE_ADDR'] = ip
+    return client
+
+
+@pytest.mark.app_config(RATE_LIMITS=LIMITS)
+def test_too_many_attempts_for_one_username_get_429(app):
+    make_user('ana')
+
+    for i in range(2):
+        assert login(_client(app, f'10.0.0.{i}'), 'ana', 'mala').status_code == 200
+    response = login(_client(app, '10.0.0.9'), 'ana', 'mala')
+
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) == 30  # Una ficha cada 30 s (2 por minuto)
+    assert login(_client(app, '10.0.0.9'), 'otro', 'mala').status_code == 200  # Otro usuario sí entra
+
+
+@pytest.mark.app_config(RATE_LIMITS=LIMITS)
+def test_too_many_attempts_from_one_ip_get_429(app):
+    client = _client(app, '10.0.0.1')
+
+    for name in ('ana', 'luis', 'eva'):
+        assert login(client, name, 'mala').status_code == 200
+    response = login(client, 'pepe', 'mala')
+
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) == 20
+    assert login(_client(app, '10.0.0.2'), 'pepe', 'mala').status_code == 200
+
+
+@pytest.mark.app_config(RATE_LIMITS=LIMITS)
+def test_viewing_the_form_does_not_spend_tokens(app):
+    make_user('ana')
+    client = _client(app, '10.0.0.1')
+
+    for _ in range(10):
+        assert client.get('/login').status_code == 200
+
+    assert login(client, 'ana').status_code == 302
+
+
+@pytest.mark.app_config(RATE_LIMITS=LIMITS, RATELIMIT_ENABLED=False)
+def test_disabled_limiter_admits_everything(app):
+    client = _client(app, '10.0.0.1')
+
+    for _ in range(5):
+        assert login(client, 'ana', 'mala').status_code == 200
+
+
+@pytest.mark.app_config(RATE_LIMITS=LIMITS)
+def test_refund_returns_the_token(app):
+    keys = {'ip': '10.0.0.1', 'username': 'ana'}
+    assert limiter.check('login', keys) == 0
+    assert limiter.check('login', keys) == 0
+    assert limiter.check('login', keys) > 0  # Sin fichas para 'ana'
+
+    limiter.refund('login', keys)
+
+    assert limiter.check('login', keys) == 0
+
+
+@pytest.mark.parametrize('backend', ['memory', 'sqlite'])
+def test_refund_never_exceeds_capacity(backend, tmp_path):
+    buckets = MemoryRateLimitBackend() if backend == 'memory' else SQLiteRateLimitBackend(
+        str(tmp_path / 'ratelimit.db'))
+    now = 1000.0
+
+    for _ in range(3):  # Devoluciones con el cubo lleno
+        buckets.consume('login:ip:10.0.0.1', 2, 1 / 30, now, cost=-1)
+
+    assert [buckets.consume('login:ip:10.0.0.1', 2, 1 / 30, now)[0] for _ in range(3)] == [True, True, False]
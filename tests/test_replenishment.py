@@ -0,0 +1,136 @@
+"""Propuesta de reposición vectorizada (replenishment_service)."""
+import numpy as np
+import pytest
+
+from app import db
+from app.models.sale_model import Sale
+from app.services import replenishment_service, sale_service
+from tests.helpers import make_product, make_supplier
+
+
+def _data(products, demand=(), on_order=(), suppliers=(), links=()):
+    """Los arrays que devuelve '_load', a partir de listas de tuplas."""
+    def columns(rows, dtypes):
+        return [np.array(values, dtype=dtype) for values, dtype in
+                zip(list(zip(*rows)) or [()] * len(dtypes), dtypes)]
+
+    return {
+        'products': columns(products, (np.int64, np.float64, np.float64, np.float64)),
+        'demand': columns(demand, (np.int64, np.float64, np.float64, np.int64)),
+        'on_order': columns(on_order, (np.int64, np.float64)),
+        'suppliers': columns(suppliers, (np.int64, np.float64, np.float64)),
+        'links': columns(links, (np.int64, np.int64)),
+    }
+
+
+def _compute(data, history_days=30, lead_time=7, review_days=14, service_z=0.0):
+    return replenishment_service._compute(data, history_days, lead_time, review_days, service_z)
+
+
+def _steady(product_id, per_day, days=30):
+    """Demanda constante: 'per_day' unidades cada día de la ventana."""
+    return (product_id, per_day * days, per_day * per_day * days, days - 1)
+
+
+def test_steady_demand_orders_up_to_the_target():
+    plan = _compute(_data([(1, 10.0, 10, 100)], demand=[_steady(1, 2)]))
+
+    assert plan['demanda_diaria'][0] == pytest.approx(2.0)
+    assert plan['desviacion'][0] == pytest.approx(0.0)
+    assert plan['dias_cobertura'][0] == pytest.approx(5.0)
+    assert plan['punto_pedido'][0] == pytest.approx(14.0)  # 2 x 7 días de plazo
+    assert plan['cantidad'][0] == 32  # 2 x (7 + 14) - 10
+
+
+def test_products_without_sales_are_not_ordered():
+    plan = _compute(_data([(1, 10.0, 0, 100), (2, 10.0, 5, 100)], demand=[_steady(2, 1)]))
+
+    assert plan['demanda_diaria'][0] == 0
+    assert plan['dias_cobertura'][0] == np.inf
+    assert plan['cantidad'][0] == 0  # Aunque el stock sea 0: sin demanda no hay propuesta
+    assert plan['cantidad'][1] > 0
+
+
+def test_new_products_are_measured_from_their_first_sale():
+    plan = _compute(_data([(1, 10.0, 0, 100), (2, 10.0, 0, 100)],
+                          demand=[(1, 10, 20, 4), (2, 30, 30, 400)]))
+
+    assert plan['demanda_diaria'][0] == pytest.approx(2.0)  # 10 unidades en 5 días
+    assert plan['demanda_diaria'][1] == pytest.approx(1.0)  # Más antiguo que la ventana: 30 días
+
+
+def test_units_on_order_count_as_stock():
+    products = [(1, 10.0, 10, 100), (2, 10.0, 10, 100)]
+    demand = [_steady(1, 2), _steady(2, 2)]
+
+    plan = _compute(_data(products, demand, on_order=[(1, 5), (2, 2)]))
+
+    assert plan['en_camino'].tolist() == [5, 2]
+    assert plan['cantidad'][0] == 0  # 10 + 5 ya supera el punto de pedido (14)
+    assert plan['cantidad'][1] == 30  # 42 - (10 + 2)
+
+
+def test_cheapest_supplier_after_discount_and_iva():
+    products = [(1, 100.0, 0, 100), (2, 100.0, 0, 100), (3, 100.0, 0, 100)]
+    demand = [_steady(1, 1), _steady(2, 1), _steady(3, 1)]
+    suppliers = [(10, 10.0, 21.0),  # 0.9 x 1.21 = 1.089
+                 (20, 0.0, 4.0),  # 1.04: el más barato
+                 (30, 0.0, 4.0)]  # Empata con 20: gana el primero
+    links = [(1, 10), (1, 20), (2, 10), (3, 30), (3, 20)]
+
+    plan = _compute(_data(products, demand, suppliers=suppliers, links=links))
+
+    assert plan['supplier_ids'][plan['supplier']].tolist() == [20, 10, 20]
+    assert plan['bruto'][1] == pytest.approx(2100.0)  # 21 unidades x 100
+    assert plan['descuento'][1] == pytest.approx(210.0)
+    assert plan['iva'][1] == pytest.approx(1890.0 * 0.21)
+    assert plan['total'][1] == pytest.approx(1890.0 * 1.21)
+
+
+def test_products_without_supplier_are_costed_without_discount_or_iva():
+    plan = _compute(_data([(1, 10.0, 0, 100)], demand=[_steady(1, 1)],
+                          suppliers=[(10, 50.0, 21.0)]))
+
+    assert plan['supplier'][0] == -1
+    assert plan['total'][0] == pytest.approx(plan['bruto'][0])
+
+
+def test_sales_of_deleted_products_are_ignored():
+    plan = _compute(_data([(2, 10.0, 0, 100), (4, 10.0, 0, 100)],
+                          demand=[_steady(1, 9), _steady(3, 9), _steady(4, 1), _steady(7, 9)],
+                          on_order=[(3, 50), (9, 50)]))
+
+    assert plan['demanda_diaria'].tolist() == pytest.approx([0.0, 1.0])
+    assert plan['en_camino'].tolist() == [0, 0]
+
+
+# --- Con la base de datos (resúmenes de ventas y dashboard) ---
+
+def test_plan_groups_lines_by_supplier(app, customer):
+    supplier = make_supplier('Distribuciones Norte', descuento_porcentaje=10.0, iva=21.0)
+    mouse = make_product('Ratón', stock=20, precio=10.0, suppliers=[supplier])
+    cable = make_product('Cable', stock=20, precio=2.0)
+    make_product('Sin ventas', stock=0)
+    sale_service.process_cart(customer.id, [(mouse.id, 10), (cable.id, 10)])
+
+    plan = replenishment_service.get_replenishment_plan(refresh=True)
+
+    assert plan is not None
+    assert {row.nombre_empresa: row.lineas for row in plan['proveedores']} == {
+        'Distribuciones Norte': 1, replenishment_service.NO_SUPPLIER: 1}
+    assert {line.nombre: line.proveedor for line in plan['lineas']} == {
+        'Ratón': 'Distribuciones Norte', 'Cable': replenishment_service.NO_SUPPLIER}
+    assert (plan['totales']['productos'], plan['totales']['a_pedir']) == (3, 2)
+
+
+def test_plan_ignores_rollups_of_deleted_products(app, customer):
+    mouse = make_product('Ratón', stock=20)
+    gone = make_product('Descatalogado', stock=20)
+    sale_service.process_cart(customer.id, [(mouse.id, 10), (gone.id, 10)])
+    Sale.query.filter_by(product_id=gone.id).delete()
+    db.session.delete(gone)
+    db.session.commit()  # sales_daily conserva la fila del producto borrado
+
+    plan = replenishment_service.get_replenishment_plan(refresh=True)
+
+    assert [line.nombre for line in plan['lineas']] == ['Ratón']
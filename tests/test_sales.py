@@ -0,0 +1,98 @@
+"""Venta de un carrito en una sola transacción (sale_service.process_cart) y códigos HTTP."""
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.models.product_model import Product
+from app.models.sale_model import Sale
+from app.models.sales_rollup_model import ALL_PRODUCTS, SalesDaily
+from app.services import sale_service
+from tests.helpers import make_product
+
+
+def _stock(product_id):
+    return db.session.get(Product, product_id, populate_existing=True).cantidad_stock
+
+
+def test_cart_sells_every_line_in_one_order(app, customer):
+    mouse = make_product('Ratón', stock=10, precio=5.0)
+    keyboard = make_product('Teclado', stock=3, precio=20.0)
+
+    success, _, outcome = sale_service.process_cart(
+        customer.id, [(mouse.id, 2), (keyboard.id, 3), (mouse.id, 1)])
+
+    assert (success, outcome) == (True, sale_service.SALE_OK)
+    assert (_stock(mouse.id), _stock(keyboard.id)) == (7, 0)
+    sales = Sale.query.order_by(Sale.product_id).all()
+    assert [(s.product_id, s.cantidad) for s in sales] == [(mouse.id, 3), (keyboard.id, 3)]
+    assert len({s.fecha for s in sales}) == 1  # Mismo pedido
+    total = SalesDaily.query.filter_by(product_id=ALL_PRODUCTS).one()
+    assert (total.unidades, total.ingresos, total.pedidos) == (6, 75.0, 1)
+
+
+def test_cart_without_stock_for_one_line_sells_nothing(app, customer):
+    mouse = make_product('Ratón', stock=10)
+    keyboard = make_product('Teclado', stock=1)
+
+    success, message, outcome = sale_service.process_cart(customer.id, [(mouse.id, 2), (keyboard.id, 5)])
+
+    assert (success, outcome) == (False, sale_service.SALE_OUT_OF_STOCK)
+    assert 'Teclado' in message
+    assert (_stock(mouse.id), _stock(keyboard.id)) == (10, 1)  # Se deshizo la primera línea
+    assert Sale.query.count() == 0
+    assert SalesDaily.query.count() == 0
+
+
+def test_failure_after_stock_update_rolls_back(app, customer, monkeypatch):
+    mouse = make_product('Ratón', stock=10)
+
+    def broken_rollups(*args):
+        raise RuntimeError('fallo de la BD')
+
+    monkeypatch.setattr(sale_service, '_update_rollups', broken_rollups)
+    success, _, outcome = sale_service.process_cart(customer.id, [(mouse.id, 4)])
+
+    assert (success, outcome) == (False, sale_service.SALE_ERROR)
+    assert _stock(mouse.id) == 10
+    assert Sale.query.count() == 0
+
+
+@pytest.mark.parametrize('items, status', [
+    ([], 400),
+    ([{'product_id': 'x', 'cantidad': 1}], 400),
+    ('no es una lista', 400),
+    ([{'product_id': 1, 'cantidad': 0}], 400),
+    ([{'product_id': 999, 'cantidad': 1}], 404),
+    ([{'product_id': 1, 'cantidad': 50}], 409),
+    ([{'product_id': 1, 'cantidad': 2}], 200),
+])
+def test_checkout_status_codes(app, customer_client, items, status):
+    make_product('Ratón', stock=5)
+
+    response = customer_client.post('/ventas/carrito', json={'items': items})
+
+    assert response.status_code == status
+    assert response.get_json()['ok'] is (status == 200)
+
+
+def test_checkout_internal_error_is_500(app, customer_client, monkeypatch):
+    mouse = make_product('Ratón', stock=5)
+    monkeypatch.setattr(sale_service, '_update_rollups', lambda *args: 1 / 0)
+
+    response = customer_client.post('/ventas/carrito', json={'items': [{'product_id': mouse.id, 'cantidad': 1}]})
+
+    assert response.status_code == 500
+
+
+def test_top_sellers_read_the_rollups(app, customer):
+    mouse = make_product('Ratón', stock=10, precio=5.0)
+    keyboard = make_product('Teclado', stock=10, precio=20.0)
+    sale_service.process_cart(customer.id, [(mouse.id, 3), (keyboard.id, 1)])
+
+    by_revenue = sale_service.get_top_sellers(start=datetime.utcnow().date())
+    by_units = sale_service.get_top_sellers(start=datetime.utcnow().date(), metric='unidades')
+
+    assert [(row.product_id, row.nombre, row.ingresos) for row in by_revenue] == [
+        (keyboard.id, 'Teclado', 20.0), (mouse.id, 'Ratón', 15.0)]
+    assert [row.product_id for row in by_units] == [mouse.id, keyboard.id]